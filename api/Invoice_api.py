@@ -1,22 +1,25 @@
-﻿import copy
-import time
-from typing import Any, Dict, List, Optional, Tuple, Union
+﻿from typing import Any, Dict, List, Optional, Tuple, Union
 
 import httpx
 
-from api.base import safe_post
+from api.base import async_safe_post, safe_post
 from conftest import access_token
 from utils.file_loader import (
     get_data_file_path,
-    load_yaml_data,
+    load_yaml_section,
 )
 from utils.logger import logger
+from utils.poller import Poller
 
 APPLY_INVOICE_ENDPOINT = "/hr/retail/invoice/batchApply"
 INVOICE_DETAIL_ENDPOINT = "/hr/retail/invoice/detail"
 INVOICE_REFRESH_ENDPOINT = "/hr/retail/invoice/refreshInvoiceStatus"
 RED_PUNCH_ENDPOINT = "/hr/retail/invoice/redPunch"
 
+# 开票状态轮询：总等待时间与最大间隔（与原先 5 次 × 2s 的等待时长一致）
+INVOICE_POLL_TIMEOUT = 8
+INVOICE_POLL_MAX_INTERVAL = 2
+
 
 # 加载开票请求参数
 
@@ -28,15 +31,11 @@ def _load_invoice_payload(section: str = "orderInvoice") -> Dict[str, Any]:
         section: YAML 中的配置段名称，默认为 "orderInvoice"（基于订单开票）
                无订单开票时使用 "noneorderInvoice"
     """
-    raw_data = load_yaml_data(get_data_file_path("invoice_data.yaml")) or {}
-    if not isinstance(raw_data, dict):
-        raise ValueError("data/invoice_data.yaml 缺少或无效")
-
-    payload = raw_data.get(section)
+    payload = load_yaml_section(get_data_file_path("invoice_data.yaml"), section)
     if not isinstance(payload, dict):
         raise ValueError(f"data/invoice_data.yaml 缺少 {section} 配置")
 
-    return copy.deepcopy(payload)
+    return payload
 
 
 # 构建单独开票请求参数
@@ -200,6 +199,31 @@ def execute_apply_invoice(
         return invoice_id
 
 
+async def async_execute_apply_invoice(
+        client: httpx.AsyncClient,
+        payload: Dict[str, Any],
+        *,
+        token_id: Optional[str] = None,
+        return_response: bool = False,
+        parse_response: bool = True,
+) -> Union[str, Tuple[str, Dict[str, Any]], httpx.Response]:
+    """execute_apply_invoice 的异步版本"""
+    resp = await async_safe_post(
+        client,
+        APPLY_INVOICE_ENDPOINT,
+        json=payload,
+        headers={"Authorization": f"Bearer {token_id}"},
+    )
+
+    if not parse_response:
+        return resp
+
+    invoice_id, response_json = _parse_apply_invoice_response(resp)
+    if return_response:
+        return invoice_id, response_json
+    return invoice_id
+
+
 # 申请开票（一站式：构建参数 + 执行请求）
 def apply_invoice_for_order(
         client: httpx.Client,
@@ -220,6 +244,39 @@ def apply_invoice_for_order(
     )
 
 
+async def async_apply_invoice_for_order(
+        client: httpx.AsyncClient,
+        order_id: str,
+        *,
+        token_id: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+        return_response: bool = False,
+) -> Union[str, Tuple[str, Dict[str, Any]]]:
+    """apply_invoice_for_order 的异步版本"""
+    payload = build_apply_invoice_payload(order_id, token_id, extra=extra)
+
+    return await async_execute_apply_invoice(
+        client,
+        payload,
+        token_id=token_id,
+        return_response=return_response,
+    )
+
+
+# 解析开票状态响应
+
+
+def _parse_invoice_status(response_json: Any, attempt: int) -> Optional[str]:
+    if not isinstance(response_json, dict):
+        raise ValueError("开票状态响应不是字典")
+    logger.info("开票详情响应（第%s次）: %s", attempt, response_json)
+
+    data = response_json.get("data")
+    status = data.get("status") if isinstance(data, dict) else None
+    logger.info("开票状态=%s", status)
+    return status
+
+
 # 封装查询开票状态接口
 def query_invoice_status(
         client: httpx.Client,
@@ -227,13 +284,14 @@ def query_invoice_status(
         *,
         token_id: Optional[str] = None,
         return_response: bool = False,
+        timeout: float = INVOICE_POLL_TIMEOUT,
 ) -> Union[str, Tuple[str, Dict[str, Any]]]:
-    token_id = token_id
-    max_attempts = 5
+    """轮询开票详情直到状态为 INVOICED，按退避节奏轮询，超时抛出 RuntimeError"""
     last_status: Optional[str] = None
     last_response: Optional[Dict[str, Any]] = None
 
-    for attempt in range(1, max_attempts + 1):
+    poller = Poller(timeout, max_interval=INVOICE_POLL_MAX_INTERVAL, label=f"开票状态 {invoice_id}")
+    for attempt in poller:
         resp = safe_post(
             client,
             INVOICE_DETAIL_ENDPOINT,
@@ -241,26 +299,49 @@ def query_invoice_status(
             headers={"Authorization": f"Bearer {token_id}"},
         )
         response_json = resp.json()
-        if not isinstance(response_json, dict):
-            raise ValueError("开票状态响应不是字典")
+        last_status = _parse_invoice_status(response_json, attempt)
         last_response = response_json
-        logger.info("开票详情响应（%s/%s）: %s", attempt, max_attempts, response_json)
+        if last_status == "INVOICED":
+            if return_response:
+                return str(last_status), response_json
+            return str(last_status)
+
+    raise RuntimeError(
+        f"开票状态在 {timeout}s（{poller.stats.polls} 次轮询）后仍未成功: "
+        f"invoice_id={invoice_id}, status={last_status}, response={last_response}"
+    )
 
-        data = last_response.get("data") if isinstance(
-            last_response, dict) else None
-        last_status = data.get("status") if isinstance(data, dict) else None
 
-        logger.info("开票状态=%s", last_status)
+async def async_query_invoice_status(
+        client: httpx.AsyncClient,
+        invoice_id: str,
+        *,
+        token_id: Optional[str] = None,
+        return_response: bool = False,
+        timeout: float = INVOICE_POLL_TIMEOUT,
+) -> Union[str, Tuple[str, Dict[str, Any]]]:
+    """query_invoice_status 的异步版本，轮询间隔不阻塞事件循环"""
+    last_status: Optional[str] = None
+    last_response: Optional[Dict[str, Any]] = None
+
+    poller = Poller(timeout, max_interval=INVOICE_POLL_MAX_INTERVAL, label=f"开票状态 {invoice_id}")
+    async for attempt in poller:
+        resp = await async_safe_post(
+            client,
+            INVOICE_DETAIL_ENDPOINT,
+            json={"id": invoice_id, "token": token_id},
+            headers={"Authorization": f"Bearer {token_id}"},
+        )
+        response_json = resp.json()
+        last_status = _parse_invoice_status(response_json, attempt)
+        last_response = response_json
         if last_status == "INVOICED":
             if return_response:
                 return str(last_status), response_json
             return str(last_status)
 
-        if attempt < max_attempts:
-            time.sleep(2)
-
     raise RuntimeError(
-        f"开票状态在{max_attempts}次轮询后仍未成功: "
+        f"开票状态在 {timeout}s（{poller.stats.polls} 次轮询）后仍未成功: "
         f"invoice_id={invoice_id}, status={last_status}, response={last_response}"
     )
 
@@ -285,6 +366,23 @@ def refresh_invoice_status(
     return resp.json()
 
 
+async def async_refresh_invoice_status(
+        client: httpx.AsyncClient,
+        invoice_id: str,
+        *,
+        token_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """refresh_invoice_status 的异步版本"""
+    resp = await async_safe_post(
+        client,
+        INVOICE_REFRESH_ENDPOINT,
+        json={"id": invoice_id, "token": token_id},
+        headers={"Authorization": f"Bearer {token_id}"},
+    )
+    logger.info("发票状态刷新接口响应: %s", resp.json())
+    return resp.json()
+
+
 # 封装红冲接口
 def red_punch_invoice(
         client: httpx.Client,
@@ -301,3 +399,20 @@ def red_punch_invoice(
     )
     logger.info("红冲接口响应: %s", resp.json())
     return resp.json()
+
+
+async def async_red_punch_invoice(
+        client: httpx.AsyncClient,
+        invoice_id: str,
+        *,
+        token_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """red_punch_invoice 的异步版本"""
+    resp = await async_safe_post(
+        client,
+        RED_PUNCH_ENDPOINT,
+        json={"id": invoice_id, "tokenId": token_id},
+        headers={"Authorization": f"Bearer {token_id}"},
+    )
+    logger.info("红冲接口响应: %s", resp.json())
+    return resp.json()
@@ -2,13 +2,18 @@
 import json
 import time
 import uuid
+from contextlib import asynccontextmanager, contextmanager
 from functools import wraps
-from typing import Dict, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 
 import httpx
 
-from config import config
+from utils import timing
+from utils.circuit_breaker import breakers
 from utils.logger import logger
+from utils.metrics import registry as metrics
+from utils.rate_limiter import rate_limits
+from utils.retry_policy import RetryPolicy, default_policy
 
 #测试提交
 
@@ -17,8 +22,83 @@ def generate_trace_id() -> str:
     return str(uuid.uuid4())
 
 
+class ApiResponse:
+    """httpx.Response 的包装：响应体首次访问时解析一次并缓存
+
+    其余属性（status_code、text、headers、request 等）透传给原始响应。
+    json() 返回的是同一个缓存对象，调用方如需修改请自行拷贝。
+    """
+
+    __slots__ = ("_response", "_json", "_parsed")
+
+    def __init__(self, response: httpx.Response):
+        self._response = response
+        self._json: Any = None
+        self._parsed = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+    def __repr__(self) -> str:
+        return f"<ApiResponse [{self._response.status_code}]>"
+
+    @property
+    def raw(self) -> httpx.Response:
+        """原始 httpx.Response"""
+        return self._response
+
+    def json(self, **kwargs: Any) -> Any:
+        """解析并缓存 JSON 响应体，解析失败时抛出 JSONDecodeError 且不缓存"""
+        if not self._parsed:
+            self._json = self._response.json(**kwargs)
+            self._parsed = True
+        return self._json
+
+    def _body_get(self, key: str, default: Any = None) -> Any:
+        body = self.json()
+        return body.get(key, default) if isinstance(body, dict) else default
+
+    @property
+    def code(self) -> Optional[str]:
+        """业务码 code，统一转为字符串"""
+        value = self._body_get("code")
+        return None if value is None else str(value)
+
+    @property
+    def success(self) -> Optional[bool]:
+        """业务结果 success"""
+        value = self._body_get("success")
+        return value if isinstance(value, bool) else None
+
+    @property
+    def msg(self) -> Optional[str]:
+        """业务提示 msg"""
+        value = self._body_get("msg")
+        return None if value is None else str(value)
+
+    @property
+    def data(self) -> Any:
+        """业务数据 data"""
+        return self._body_get("data")
+
+    @property
+    def data_dict(self) -> Dict[str, Any]:
+        """data 为字典时返回 data，否则返回空字典"""
+        data = self.data
+        return data if isinstance(data, dict) else {}
+
+    @property
+    def data_line(self) -> List[Dict[str, Any]]:
+        """老接口的 DataLine 列表，缺失时返回空列表"""
+        value = self._body_get("DataLine")
+        return value if isinstance(value, list) else []
+
+
 def retry_on_failure(max_retries: int = 3, delay: int = 2):
-    """HTTP 调用的重试装饰器"""
+    """HTTP 调用的重试装饰器（固定间隔、任何 HTTPError 都重试）
+
+    safe_post 已改用 utils.retry_policy.RetryPolicy，此装饰器保留给其他调用方。
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -33,7 +113,33 @@ def retry_on_failure(max_retries: int = 3, delay: int = 2):
                             f"请求失败，{delay}s 后重试 "
                             f"({attempt + 1}/{max_retries}): {e}"
                         )
-                        time.sleep(delay)
+                        timing.sleep(delay, timing.SITE_RETRY)
+                    else:
+                        logger.error(
+                            f"请求失败，重试 {max_retries} 次后仍失败: {e}"
+                        )
+            raise last_exception
+        return wrapper
+    return decorator
+
+
+def async_retry_on_failure(max_retries: int = 3, delay: int = 2):
+    """异步 HTTP 调用的重试装饰器，行为与 retry_on_failure 一致"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            last_exception = None
+            for attempt in range(max_retries):
+                try:
+                    return await func(*args, **kwargs)
+                except httpx.HTTPError as e:
+                    last_exception = e
+                    if attempt < max_retries - 1:
+                        logger.warning(
+                            f"请求失败，{delay}s 后重试 "
+                            f"({attempt + 1}/{max_retries}): {e}"
+                        )
+                        await timing.async_sleep(delay, timing.SITE_RETRY)
                     else:
                         logger.error(
                             f"请求失败，重试 {max_retries} 次后仍失败: {e}"
@@ -43,8 +149,36 @@ def retry_on_failure(max_retries: int = 3, delay: int = 2):
     return decorator
 
 
+# handle_response 判定结果分类（用于压测统计）
+OUTCOME_OK = "ok"
+OUTCOME_REJECTED = "rejected"
+OUTCOME_INVALID_JSON = "invalid_json"
+
+
+def _is_callback_ok(status_code: int, response_json: Any) -> bool:
+    return status_code == 200 and response_json.get("data") == "OK"
+
+
+def classify_response(response: Union[httpx.Response, ApiResponse]) -> str:
+    """按 handle_response 的判定规则给响应归类，不记录日志
+
+    返回 ok / rejected（业务失败）/ http_<状态码> / invalid_json
+    """
+    try:
+        response_json = response.json()
+    except ValueError:
+        return OUTCOME_INVALID_JSON
+    if not isinstance(response_json, dict):
+        return OUTCOME_INVALID_JSON
+    if _is_callback_ok(response.status_code, response_json):
+        return OUTCOME_OK
+    if response.status_code != 200:
+        return f"http_{response.status_code}"
+    return OUTCOME_REJECTED
+
+
 def handle_response(
-    response: httpx.Response, order_id: Optional[str] = None
+    response: Union[httpx.Response, ApiResponse], order_id: Optional[str] = None
 ) -> Tuple[bool, Optional[Dict]]:
     """解析 JSON 响应并记录详细信息"""
     logger.info(f"状态码: {response.status_code}")
@@ -56,7 +190,7 @@ def handle_response(
             json.dumps(response_json, indent=2, ensure_ascii=False),
         )
 
-        if response.status_code == 200 and response_json.get("data") == "OK":
+        if _is_callback_ok(response.status_code, response_json):
             order_info = f"订单 {order_id}" if order_id else "请求"
             logger.info(f"[成功] {order_info} 成功")
             return True, response_json
@@ -74,56 +208,225 @@ def handle_response(
         return False, None
 
 
-@retry_on_failure(max_retries=config.RETRY_TIMES, delay=config.RETRY_INTERVAL)
+def _check_biz_code(response: ApiResponse) -> None:
+    """校验业务码，code=500 或 success=false 时抛出 RuntimeError"""
+    try:
+        response_json = response.json()
+    except json.JSONDecodeError as e:
+        logger.error(f"响应不是合法 JSON: {response.text}, 错误={e}")
+        raise ValueError("响应不是合法 JSON") from e
+
+    code = response_json.get("code")
+    success = response_json.get("success")
+    if str(code) == "500" or success is False:
+        msg = response_json.get("msg")
+        trace = response_json.get("traceId")
+        logger.error(
+            f"业务错误: code={code}, success={success}, msg={msg}, traceId={trace}"
+        )
+        raise RuntimeError(
+            f"业务错误: code={code}, msg={msg}, traceId={trace}"
+        )
+
+
+def _record_request(endpoint: str, seconds: float, *, response: Optional[httpx.Response] = None,
+                    error: Optional[BaseException] = None) -> None:
+    """记录用例网络耗时、接口指标与熔断状态，请求未完成时状态记为异常类名"""
+    timing.record_network(seconds)
+    breakers.record(endpoint, error, response)
+    if response is not None:
+        metrics.record(endpoint, seconds, response.status_code, len(response.content))
+    else:
+        metrics.record(endpoint, seconds, type(error).__name__)
+
+
+def _log_http_error(e: httpx.HTTPError, trace_id: str) -> None:
+    """按异常类型记录带追踪号的错误日志"""
+    if isinstance(e, httpx.HTTPStatusError):
+        logger.error(
+            f"状态码错误（追踪号: {trace_id}）: "
+            f"{e.response.status_code} - {e}"
+        )
+    elif isinstance(e, httpx.RequestError):
+        logger.error(f"请求错误（追踪号: {trace_id}）: {e}")
+    else:
+        logger.error(f"网络错误（追踪号: {trace_id}）: {e}")
+
+
 def safe_post(
     client: httpx.Client,
     endpoint: str,
     trace_id: Optional[str] = None,
     check_biz_code: bool = False,
+    retry_policy: Optional[RetryPolicy] = None,
     **kwargs,
-) -> httpx.Response:
-    """带重试和错误日志的 POST 请求"""
+) -> ApiResponse:
+    """带重试和错误日志的 POST 请求，返回响应体只解析一次的 ApiResponse
+
+    重试规则见 utils.retry_policy：只重试连接/读超时与 502/503/504，
+    指数退避 + 全抖动，受会话重试预算限制。
+    所属服务已熔断时直接抛出 CircuitOpenError（见 utils.circuit_breaker），不发请求也不重试。
+    开启 RATE_LIMIT_ENABLED 时每次尝试发出前按服务前缀取令牌（见 utils.rate_limiter）。
+    """
+    return (retry_policy or default_policy).call(
+        endpoint, _safe_post_once, client, endpoint, trace_id, check_biz_code, kwargs)
+
+
+def _safe_post_once(
+    client: httpx.Client,
+    endpoint: str,
+    trace_id: Optional[str],
+    check_biz_code: bool,
+    kwargs: Dict[str, Any],
+) -> ApiResponse:
     trace_id = trace_id or generate_trace_id()
-    start_time = time.time()
 
     try:
-        logger.info(f"发送请求 {endpoint}，追踪号={trace_id}")
-        response = client.post(endpoint, **kwargs)
-        elapsed_time = time.time() - start_time
-        logger.info(f"请求耗时: {elapsed_time:.2f}s")
+        with breakers.guard(endpoint):
+            rate_limits.acquire(endpoint)
+            logger.info(f"发送请求 {endpoint}，追踪号={trace_id}")
+            start_time = time.time()
+            try:
+                response = client.post(endpoint, **kwargs)
+            except httpx.HTTPError as e:
+                _record_request(endpoint, time.time() - start_time, error=e)
+                raise
+            elapsed_time = time.time() - start_time
+            _record_request(endpoint, elapsed_time, response=response)
+            logger.info(f"请求耗时: {elapsed_time:.2f}s")
+
+            response.raise_for_status()
+            api_response = ApiResponse(response)
 
-        response.raise_for_status()
+            if check_biz_code:
+                _check_biz_code(api_response)
+
+            return api_response
+
+    except httpx.HTTPError as e:
+        _log_http_error(e, trace_id)
+        raise
 
-        if check_biz_code:
+
+async def async_safe_post(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    trace_id: Optional[str] = None,
+    check_biz_code: bool = False,
+    retry_policy: Optional[RetryPolicy] = None,
+    **kwargs,
+) -> ApiResponse:
+    """safe_post 的异步版本，建议配合 utils.async_helper.get_async_client 共享连接池"""
+    return await (retry_policy or default_policy).acall(
+        endpoint, _async_safe_post_once, client, endpoint, trace_id, check_biz_code, kwargs)
+
+
+async def _async_safe_post_once(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    trace_id: Optional[str],
+    check_biz_code: bool,
+    kwargs: Dict[str, Any],
+) -> ApiResponse:
+    return await _async_request_once(client, "POST", endpoint, trace_id, check_biz_code, kwargs)
+
+
+async def _async_request_once(
+    client: httpx.AsyncClient,
+    method: str,
+    endpoint: str,
+    trace_id: Optional[str],
+    check_biz_code: bool,
+    kwargs: Dict[str, Any],
+    *,
+    acquire_rate_limit: bool = True,
+) -> ApiResponse:
+    """发出一次请求：熔断检查、限速、网络耗时/接口指标/熔断状态记录与错误日志
+
+    utils.async_helper 的批量请求在进入自适应限流名额前已取限速令牌，传 acquire_rate_limit=False。
+    """
+    trace_id = trace_id or generate_trace_id()
+
+    try:
+        with breakers.guard(endpoint):
+            if acquire_rate_limit:
+                await rate_limits.async_acquire(endpoint)
+            logger.info(f"发送请求 {endpoint}，追踪号={trace_id}")
+            start_time = time.time()
             try:
-                response_json = response.json()
-            except json.JSONDecodeError as e:
-                logger.error(f"响应不是合法 JSON: {response.text}, 错误={e}")
-                raise ValueError("响应不是合法 JSON") from e
-
-            code = response_json.get("code")
-            success = response_json.get("success")
-            if str(code) == "500" or success is False:
-                msg = response_json.get("msg")
-                trace = response_json.get("traceId")
-                logger.error(
-                    f"业务错误: code={code}, success={success}, msg={msg}, traceId={trace}"
-                )
-                raise RuntimeError(
-                    f"业务错误: code={code}, msg={msg}, traceId={trace}"
-                )
-
-        return response
-
-    except httpx.HTTPStatusError as e:
-        logger.error(
-            f"状态码错误（追踪号: {trace_id}）: "
-            f"{e.response.status_code} - {e}"
-        )
+                response = await client.request(method, endpoint, **kwargs)
+            except httpx.HTTPError as e:
+                _record_request(endpoint, time.time() - start_time, error=e)
+                raise
+            elapsed_time = time.time() - start_time
+            _record_request(endpoint, elapsed_time, response=response)
+            logger.info(f"请求耗时: {elapsed_time:.2f}s")
+
+            response.raise_for_status()
+            api_response = ApiResponse(response)
+
+            if check_biz_code:
+                _check_biz_code(api_response)
+
+            return api_response
+
+    except httpx.HTTPError as e:
+        _log_http_error(e, trace_id)
         raise
-    except httpx.RequestError as e:
-        logger.error(f"请求错误（追踪号: {trace_id}）: {e}")
+
+
+@contextmanager
+def safe_stream_post(
+    client: httpx.Client,
+    endpoint: str,
+    trace_id: Optional[str] = None,
+    **kwargs,
+) -> Iterator[httpx.Response]:
+    """流式 POST：响应头到达即交给调用方边读边处理，退出时关闭响应
+
+    响应体读到一半无法安全重试，因此不做重试；状态码错误时抛出 HTTPStatusError。
+    """
+    trace_id = trace_id or generate_trace_id()
+    try:
+        with breakers.guard(endpoint):
+            rate_limits.acquire(endpoint)
+            logger.info(f"发送流式请求 {endpoint}，追踪号={trace_id}")
+            try:
+                with client.stream("POST", endpoint, **kwargs) as response:
+                    breakers.record(endpoint, response=response)
+                    response.raise_for_status()
+                    yield response
+            except httpx.HTTPError as e:
+                if not isinstance(e, httpx.HTTPStatusError):
+                    breakers.record(endpoint, e)
+                raise
+    except httpx.HTTPError as e:
+        _log_http_error(e, trace_id)
         raise
+
+
+@asynccontextmanager
+async def async_safe_stream_post(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    trace_id: Optional[str] = None,
+    **kwargs,
+) -> AsyncIterator[httpx.Response]:
+    """safe_stream_post 的异步版本"""
+    trace_id = trace_id or generate_trace_id()
+    try:
+        with breakers.guard(endpoint):
+            await rate_limits.async_acquire(endpoint)
+            logger.info(f"发送流式请求 {endpoint}，追踪号={trace_id}")
+            try:
+                async with client.stream("POST", endpoint, **kwargs) as response:
+                    breakers.record(endpoint, response=response)
+                    response.raise_for_status()
+                    yield response
+            except httpx.HTTPError as e:
+                if not isinstance(e, httpx.HTTPStatusError):
+                    breakers.record(endpoint, e)
+                raise
     except httpx.HTTPError as e:
-        logger.error(f"网络错误（追踪号: {trace_id}）: {e}")
+        _log_http_error(e, trace_id)
         raise
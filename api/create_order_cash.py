@@ -4,7 +4,7 @@ import httpx
 
 from api.base import safe_post
 from utils.file_loader import (
-    load_yaml_data,
+    load_yaml_section,
     get_data_file_path,
 )
 from utils.logger import logger
@@ -65,8 +65,9 @@ def build_request_params(
         order_id: Optional[str] = None,
         actual_pay_amount: Optional[float] = None,
 ) -> Dict[str, Any]:
-    read_payload = load_yaml_data(get_data_file_path("order_data.yaml")) or {}
-    final_payload = read_payload.get(data_List_name)
+    # 模板缓存返回的是独立副本，可直接修改
+    final_payload = load_yaml_section(
+        get_data_file_path("order_data.yaml"), data_List_name)
     if not isinstance(final_payload, dict):
         raise ValueError(
             f"缺少或无效的配置段: {data_List_name!r}")
@@ -75,7 +76,6 @@ def build_request_params(
         final_payload["payAmount"] = actual_pay_amount
         final_payload["offlinePayParameter"]["guestPayment"] = actual_pay_amount
 
-    final_payload = final_payload.copy()
     final_payload["tokenId"] = token_id
     if actual_pay_amount is not None:
         final_payload["actualPayAmount"] = actual_pay_amount
@@ -134,7 +134,7 @@ def add_order(client: httpx.Client, token, actual_pay_amount, section: Optional[
                      headers={"Authorization": f"Bearer {token}"},
                      json=payload)
     logger.info("新增订单接口响应: %s", resp.json())
-    order_id = resp.json()["data"]["orderId"]
+    order_id = resp.data["orderId"]
     return resp, order_id
 
 
@@ -207,7 +207,7 @@ def get_system_pay_type(client: httpx.Client, token, section: Optional[str] = No
                      headers={"Authorization": f"Bearer {token}"},
                      json=payload)
     logger.info("获取支付金额接口响应: %s", resp.json())
-    actual_pay_amount = resp.json()["data"]["itemsAmountActuallyPaid"]
+    actual_pay_amount = resp.data["itemsAmountActuallyPaid"]
     return actual_pay_amount, resp.json()
 
 # 更新购物车优惠计划接口
@@ -240,7 +240,7 @@ def get_shoppingcart_gift_list(client: httpx.Client, token):
                      json=payload)
     logger.info("获取赠品列表接口响应: %s", resp.json())
     # 提取赠品列表第一个赠品的 specId 和 quantity
-    data = resp.json().get("data", {})
+    data = resp.data_dict
     # 从 itemsPage.content 中获取第一个赠品的 specId
     content = data.get("itemsPage", {}).get("content", [])
     spec_id = content[0].get("specId", "") if content else ""
@@ -286,7 +286,7 @@ def get_card_card_options(client: httpx.Client, token):
                      headers={"Authorization": f"Bearer {token}"},
                      json=payload)
     logger.info("获取购物卡充值列表接口响应: %s", resp.json())
-    data = resp.json().get("DataLine", [{}])[0]
+    data = (resp.data_line or [{}])[0]
     coId = data.get("coId", "")
     giveItemId = data.get("giveItemId", "")
     saleValue = data.get("saleValue", 0)
@@ -320,9 +320,10 @@ def card_top_up(client: httpx.Client, token, coId, giveItemId, saleValue):
                      headers={"Authorization": f"Bearer {token}"},
                      json=payload)
     logger.info("生成卡充值记录接口响应: %s", resp.json())
-    orderId = resp.json().get("orderId", "")
-    payAmount = resp.json().get("payAmount", 0)
-    orderType = resp.json().get("orderType", "")
+    resp_json = resp.json()
+    orderId = resp_json.get("orderId", "")
+    payAmount = resp_json.get("payAmount", 0)
+    orderType = resp_json.get("orderType", "")
     return resp, orderId, payAmount, orderType
 
 # 查询购物卡充值记录接口
@@ -337,7 +338,7 @@ def query_card_top_up_record(client: httpx.Client, token, order_id):
                      json=payload)
     logger.info("查询购物卡充值记录接口响应: %s", resp.json())
     # 遍历 pageData.content 查找匹配的充值记录
-    content = resp.json().get("data", {}).get("pageData", {}).get("content", [])
+    content = resp.data_dict.get("pageData", {}).get("content", [])
     source_id = ""
     for record in content:
         if record.get("sourceId") == order_id:
@@ -419,7 +420,7 @@ def get_card_bag(client: httpx.Client, token, actual_pay_amount):
                      json=payload)
     logger.info("获取卡包列表接口响应: %s", resp.json())
     # 遍历卡包列表，查找 balance >= actual_pay_amount 的实体卡
-    data_line = resp.json().get("DataLine", [])
+    data_line = resp.data_line
     card_no = ""
     for card in data_line:
         balance = float(card.get("balance", 0))
@@ -444,7 +445,7 @@ def shop_cart_entity_card_pre_calculate(client: httpx.Client, token, card_no):
                      json=payload)
     logger.info("实体卡计算接口响应: %s", resp.json())
     # 提取 payAmount
-    pay_amount = resp.json().get("data", {}).get("payAmount", 0)
+    pay_amount = resp.data_dict.get("payAmount", 0)
     return pay_amount, resp
 
 
@@ -5,7 +5,7 @@ import time
 import httpx
 
 from api.base import safe_post
-from utils.file_loader import load_yaml_data, get_data_file_path
+from utils.file_loader import load_yaml_section, get_data_file_path
 from utils.logger import logger
 
 # 获取开交班状态接口（v2）
@@ -29,12 +29,11 @@ def build_handover_params(
     Returns:
         请求参数字典
     """
-    read_payload = load_yaml_data(get_data_file_path("order_data.yaml")) or {}
-    final_payload = read_payload.get(data_key)
+    final_payload = load_yaml_section(
+        get_data_file_path("order_data.yaml"), data_key)
     if not isinstance(final_payload, dict):
         raise ValueError(f"缺少或无效的配置段: {data_key!r}")
 
-    final_payload = final_payload.copy()
     final_payload["tokenId"] = token_id
     return final_payload
 
@@ -67,8 +66,7 @@ def get_handover_state(client: httpx.Client, token_id: str) -> Tuple[int, Dict[s
     logger.info("获取开交班状态接口响应: %s", response_data)
 
     # v2接口通过 data.code 判断状态，0=已开班
-    data = response_data.get("data", {})
-    state_code = data.get("code", -1)
+    state_code = resp.data_dict.get("code", -1)
     return state_code, response_data
 
 
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""美团订单全生命周期场景：推单 → 等待落库 → 取消/退款 → 等待 R4
+
+多个订单在同一事件循环中并发推进，各自独立经过每个阶段，
+按阶段统计耗时分布，用于衡量对接服务的整链路吞吐。
+"""
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, List, Sequence
+
+import httpx
+
+from api.mt_order_callback import (
+    async_mt_cancel_order,
+    async_mt_push_order,
+    async_mt_refund_order,
+)
+from assertions.order_api_assert import (
+    async_assert_order_persisted_via_list_detail,
+    async_assert_order_status_via_detail,
+)
+from assertions.order_db_assert import (
+    async_assert_order_created,
+    async_assert_order_status,
+)
+from utils.histogram import LatencyHistogram
+from utils.logger import logger
+
+STAGE_PUSH = "push"
+STAGE_PERSIST = "persist"
+STAGE_REVERSE = "reverse"
+STAGE_STATUS = "status"
+STAGE_TOTAL = "total"
+STAGES = (STAGE_PUSH, STAGE_PERSIST, STAGE_REVERSE, STAGE_STATUS, STAGE_TOTAL)
+
+ACTION_CANCEL = "cancel"
+ACTION_REFUND = "refund"
+_ACTIONS = {
+    ACTION_CANCEL: async_mt_cancel_order,
+    ACTION_REFUND: async_mt_refund_order,
+}
+
+EXPECTED_FINAL_STATUS = "R4"
+
+
+class StageFailed(Exception):
+    """生命周期某阶段失败"""
+
+    def __init__(self, stage: str, reason: str):
+        super().__init__(f"{stage}: {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+class DbOrderTracker:
+    """FAT 环境：通过共享数据库监视器等待订单落库与状态变更
+
+    所有在途订单合并为每周期一次 IN 查询，见 utils.db_watcher。
+    """
+
+    def __init__(self, persist_watcher, status_watcher, *, timeout: int = 10):
+        self.persist_watcher = persist_watcher
+        self.status_watcher = status_watcher
+        self.timeout = timeout
+
+    async def wait_persisted(self, client: httpx.AsyncClient, mt_order_id: str) -> str:
+        await async_assert_order_created(self.persist_watcher, mt_order_id, timeout=self.timeout)
+        return mt_order_id
+
+    async def wait_status(self, client: httpx.AsyncClient, handle: str, expected_status: str) -> None:
+        await async_assert_order_status(
+            self.status_watcher, handle, expected_status, timeout=self.timeout)
+
+
+class ApiOrderTracker:
+    """非 FAT 环境：通过订单列表+详情接口等待订单落库与状态变更
+
+    落库由共享的 OrderListPoller 统一翻页确认，状态按订单轮询详情。
+    """
+
+    def __init__(self, token_id: str, poller, *, timeout: int = 60, interval: float = 2):
+        self.token_id = token_id
+        self.poller = poller
+        self.timeout = timeout
+        self.interval = interval
+
+    async def wait_persisted(self, client: httpx.AsyncClient, mt_order_id: str) -> str:
+        return await async_assert_order_persisted_via_list_detail(
+            client, self.token_id, mt_order_id, timeout=self.timeout, poller=self.poller)
+
+    async def wait_status(self, client: httpx.AsyncClient, handle: str, expected_status: str) -> None:
+        await async_assert_order_status_via_detail(
+            client, self.token_id, handle, expected_status,
+            timeout=self.timeout, interval=self.interval)
+
+
+def parse_action_mix(text: str) -> List[str]:
+    """解析动作配比，如 cancel=1,refund=3，返回按配比交错的动作序列"""
+    weights: Dict[str, int] = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in _ACTIONS:
+            raise ValueError(f"未知的动作: {name!r}，可选: {', '.join(_ACTIONS)}")
+        weights[name] = int(weight or 1)
+    if not any(weights.values()):
+        raise ValueError(f"动作配比不能全为 0: {text!r}")
+
+    # 交错排列（cancel=1,refund=3 → refund, cancel, refund, refund），避免同类动作扎堆
+    sequence: List[str] = []
+    credit = dict.fromkeys(weights, 0)
+    total = sum(weights.values())
+    for _ in range(total):
+        for name, weight in weights.items():
+            credit[name] += weight
+        chosen = max(credit, key=credit.get)
+        credit[chosen] -= total
+        sequence.append(chosen)
+    return sequence
+
+
+class LifecycleStats:
+    """生命周期场景统计：各阶段耗时分布与结果分类"""
+
+    def __init__(self):
+        self.stages: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in STAGES}
+        self.outcomes: Counter = Counter()
+        self.actions: Counter = Counter()
+        self.started_at = 0.0
+        self.finished_at = 0.0
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = max(self.finished_at - self.started_at, 1e-9)
+        completed = self.outcomes.get("completed", 0)
+        return {
+            "orders": sum(self.outcomes.values()),
+            "completed": completed,
+            "elapsed_s": round(elapsed, 3),
+            "completed_per_s": round(completed / elapsed, 2),
+            "actions": dict(self.actions),
+            "outcomes": dict(self.outcomes.most_common()),
+            "stages": {stage: hist.summary() for stage, hist in self.stages.items()},
+        }
+
+
+async def _run_order(
+    client: httpx.AsyncClient,
+    tracker,
+    action: str,
+    stats: LifecycleStats,
+) -> None:
+    loop = asyncio.get_running_loop()
+    stage = STAGE_PUSH
+    started = mark = loop.time()
+
+    def _finish_stage(name: str) -> None:
+        nonlocal mark
+        now = loop.time()
+        stats.stages[name].record(now - mark)
+        mark = now
+
+    try:
+        result, mt_order_id = await async_mt_push_order(client)
+        if result != "OK":
+            raise StageFailed(stage, "rejected")
+        _finish_stage(STAGE_PUSH)
+
+        stage = STAGE_PERSIST
+        handle = await tracker.wait_persisted(client, str(mt_order_id))
+        _finish_stage(STAGE_PERSIST)
+
+        stage = STAGE_REVERSE
+        result = await _ACTIONS[action](client, mt_order_id)
+        if result != "OK":
+            raise StageFailed(stage, "rejected")
+        _finish_stage(STAGE_REVERSE)
+
+        stage = STAGE_STATUS
+        await tracker.wait_status(client, handle, EXPECTED_FINAL_STATUS)
+        _finish_stage(STAGE_STATUS)
+    except StageFailed as e:
+        stats.outcomes[f"{e.stage}:{e.reason}"] += 1
+        return
+    except AssertionError as e:
+        logger.warning(f"订单生命周期在 {stage} 阶段超时: {e}")
+        stats.outcomes[f"{stage}:timeout"] += 1
+        return
+    except (httpx.HTTPError, RuntimeError, ValueError) as e:
+        logger.warning(f"订单生命周期在 {stage} 阶段出错: {e}")
+        stats.outcomes[f"{stage}:{type(e).__name__}"] += 1
+        return
+
+    stats.stages[STAGE_TOTAL].record(loop.time() - started)
+    stats.outcomes["completed"] += 1
+
+
+async def run_lifecycle(
+    client: httpx.AsyncClient,
+    tracker,
+    orders: int,
+    *,
+    concurrency: int = 10,
+    actions: Sequence[str] = (ACTION_CANCEL, ACTION_REFUND),
+    progress_interval: float = 10.0,
+) -> LifecycleStats:
+    """保持 concurrency 个订单在途，直到跑完 orders 个订单生命周期
+
+    tracker 提供 wait_persisted / wait_status，FAT 用 DbOrderTracker，
+    其他环境用 ApiOrderTracker。actions 按序轮流分配给每个订单。
+    """
+    stats = LifecycleStats()
+    loop = asyncio.get_running_loop()
+    next_index = 0
+    next_progress = loop.time() + progress_interval
+
+    async def _worker() -> None:
+        nonlocal next_index, next_progress
+        while next_index < orders:
+            action = actions[next_index % len(actions)]
+            next_index += 1
+            stats.actions[action] += 1
+            await _run_order(client, tracker, action, stats)
+
+            if loop.time() >= next_progress:
+                next_progress += progress_interval
+                p99 = stats.stages[STAGE_TOTAL].percentile(99)
+                logger.info(
+                    f"生命周期进度: 已开始={next_index}/{orders}, "
+                    f"整链路p99={p99 * 1000 if p99 is not None else 0:.1f}ms, "
+                    f"结果={dict(stats.outcomes)}"
+                )
+
+    stats.started_at = time.time()
+    await asyncio.gather(*(_worker() for _ in range(min(concurrency, orders))))
+    stats.finished_at = time.time()
+    return stats
+
+
+def format_lifecycle_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"订单数: {report['orders']}  完成: {report['completed']}  耗时: {report['elapsed_s']}s",
+        f"整链路吞吐: {report['completed_per_s']} 单/s",
+        "动作分布: " + ", ".join(f"{k}={v}" for k, v in report["actions"].items()),
+        "结果分布: " + ", ".join(f"{k}={v}" for k, v in report["outcomes"].items()),
+    ]
+    for stage, summary in report["stages"].items():
+        lines.append(
+            f"{stage}: " + ", ".join(
+                f"{name[:-3]}={value}ms" for name, value in summary.items()
+                if name.endswith("_ms") and value is not None
+            )
+        )
+    return "\n".join(lines)
+
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""开环压测工具：按固定到达速率驱动美团回调接口
+
+用法:
+    python -m api.loadgen push --rate 200/s --duration 10m
+    python -m api.loadgen push --rate 500/s --duration 30s --standin
+    python -m api.loadgen lifecycle --orders 1000 --concurrency 50 --mix cancel=1,refund=1
+
+开环：请求按计划时间发出，与响应快慢无关；延迟从计划发出时间算起，
+因此服务变慢导致的排队时间会计入结果，避免协调遗漏（coordinated omission）。
+lifecycle 为闭环场景：保持固定数量的订单在途，统计各阶段耗时（见 api.lifecycle）。
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from api.base import classify_response
+from api.lifecycle import (
+    ApiOrderTracker,
+    DbOrderTracker,
+    format_lifecycle_report,
+    parse_action_mix,
+    run_lifecycle,
+)
+from api.login_api import async_login
+from assertions.order_list_poller import OrderListPoller
+from api.mt_order_callback import PUSH_ORDER_ENDPOINT, load_push_template
+from config import config
+from utils.db_watcher import order_persist_watcher, order_status_watcher
+from utils.histogram import LatencyHistogram
+from utils.http_client import async_warm_up, client_limits, create_async_client
+from utils.id_allocator import (
+    DEFAULT_WORKER_BITS,
+    SnowflakeIdAllocator,
+    resolve_worker_id,
+    set_mt_order_id_allocator,
+)
+from utils.latency import LatencyDistribution
+from utils.logger import logger
+from utils.rate_limiter import rate_limits
+from utils.standin_server import StandinServer
+
+OUTCOME_DROPPED = "dropped"
+OUTCOME_TIMEOUT = "timeout"
+
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+_RATE_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(text: str) -> float:
+    """解析时长，如 500ms / 30s / 10m / 1h，纯数字按秒计"""
+    match = re.fullmatch(r"\s*([\d.]+)\s*(ms|s|m|h)?\s*", text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"无效的时长: {text!r}")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2) or "s"]
+
+
+def parse_rate(text: str) -> float:
+    """解析速率，如 200/s / 6000/m，纯数字按每秒计"""
+    match = re.fullmatch(r"\s*([\d.]+)\s*(?:/\s*(s|m|h))?\s*", text)
+    if not match or float(match.group(1)) <= 0:
+        raise argparse.ArgumentTypeError(f"无效的速率: {text!r}")
+    return float(match.group(1)) / _RATE_UNITS[match.group(2) or "s"]
+
+
+class LoadStats:
+    """压测统计：结果分类、延迟（含排队）与服务时间分布"""
+
+    def __init__(self):
+        self.outcomes: Counter = Counter()
+        self.latency = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+        self.scheduled = 0
+        self.started_at = 0.0
+        self.finished_at = 0.0
+
+    def record(self, outcome: str, latency: Optional[float] = None,
+               service_time: Optional[float] = None) -> None:
+        self.outcomes[outcome] += 1
+        if latency is not None:
+            self.latency.record(latency)
+        if service_time is not None:
+            self.service_time.record(service_time)
+
+    def merge(self, other: "LoadStats") -> None:
+        """合并其他进程的统计结果"""
+        self.outcomes.update(other.outcomes)
+        self.latency.merge(other.latency)
+        self.service_time.merge(other.service_time)
+        self.scheduled += other.scheduled
+        self.started_at = min(self.started_at or other.started_at, other.started_at)
+        self.finished_at = max(self.finished_at, other.finished_at)
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = max(self.finished_at - self.started_at, 1e-9)
+        completed = sum(v for k, v in self.outcomes.items() if k != OUTCOME_DROPPED)
+        return {
+            "scheduled": self.scheduled,
+            "completed": completed,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(completed / elapsed, 2),
+            "ok_rps": round(self.outcomes.get("ok", 0) / elapsed, 2),
+            "outcomes": dict(self.outcomes.most_common()),
+            "latency": self.latency.summary(),
+            "service_time": self.service_time.summary(),
+        }
+
+
+async def _send_push(
+    client: httpx.AsyncClient,
+    payload: Dict[str, str],
+    intended: float,
+    stats: LoadStats,
+) -> None:
+    loop = asyncio.get_running_loop()
+    # 限速等待计入延迟（从计划发出时间算起），不计入服务时间
+    await rate_limits.async_acquire(PUSH_ORDER_ENDPOINT)
+    sent = loop.time()
+    try:
+        response = await client.post(PUSH_ORDER_ENDPOINT, data=payload)
+        outcome = classify_response(response)
+    except httpx.TimeoutException:
+        outcome = OUTCOME_TIMEOUT
+    except httpx.HTTPError as e:
+        outcome = type(e).__name__
+    done = loop.time()
+    stats.record(outcome, latency=done - intended, service_time=done - sent)
+
+
+async def run_push_load(
+    base_url: str,
+    rate: float,
+    duration: float,
+    *,
+    max_in_flight: int = 10000,
+    timeout: float = config.DEFAULT_TIMEOUT,
+    progress_interval: float = 10.0,
+) -> LoadStats:
+    """按固定速率推单，返回统计结果"""
+    template = load_push_template()
+    stats = LoadStats()
+    in_flight = set()
+    total = int(rate * duration)
+    interval = 1.0 / rate
+
+    limits = client_limits(max_connections=min(max_in_flight, config.ASYNC_MAX_CONNECTIONS), asynchronous=True)
+    async with create_async_client(base_url, timeout=timeout, limits=limits) as client:
+        # 开始计时前建好连接，避免首批请求的建连耗时计入延迟
+        await async_warm_up(client)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        stats.started_at = time.time()
+        next_progress = start + progress_interval
+
+        for i in range(total):
+            intended = start + i * interval
+            delay = intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            stats.scheduled += 1
+            if len(in_flight) >= max_in_flight:
+                # 超出在途上限直接计为丢弃，不阻塞调度（保持开环）
+                stats.record(OUTCOME_DROPPED)
+                continue
+
+            payload, _ = template.render()
+            task = asyncio.create_task(_send_push(client, payload, intended, stats))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+            if loop.time() >= next_progress:
+                next_progress += progress_interval
+                p99 = stats.latency.percentile(99)
+                logger.info(
+                    f"压测进度: 已调度={stats.scheduled}/{total}, 在途={len(in_flight)}, "
+                    f"p99={p99 * 1000 if p99 is not None else 0:.1f}ms, 结果={dict(stats.outcomes)}"
+                )
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        stats.finished_at = time.time()
+
+    return stats
+
+
+def _run_push_worker(worker_id: Optional[int], base_url: str, rate: float,
+                     duration: float, max_in_flight: int, timeout: float) -> LoadStats:
+    # 每个压测进程使用不同的 worker 编号（未显式指定时各自租用），保证订单号不重复
+    set_mt_order_id_allocator(SnowflakeIdAllocator(prefix=config.MT_ORDER_ID_PREFIX, worker_id=worker_id))
+    return asyncio.run(run_push_load(
+        base_url, rate, duration, max_in_flight=max_in_flight, timeout=timeout))
+
+
+def run_push_load_multiprocess(
+    base_url: str,
+    rate: float,
+    duration: float,
+    processes: int,
+    *,
+    max_in_flight: int = 10000,
+    timeout: float = config.DEFAULT_TIMEOUT,
+) -> LoadStats:
+    """多进程推单压测，速率与在途上限均分到各进程，结果合并返回"""
+    if processes > 1 << DEFAULT_WORKER_BITS:
+        raise ValueError(f"进程数不能超过订单号 worker 数 {1 << DEFAULT_WORKER_BITS}")
+    if config.MT_ORDER_ID_WORKER:
+        # 显式指定时各进程依次使用 MT_ORDER_ID_WORKER 起的连续编号
+        worker_base = resolve_worker_id(DEFAULT_WORKER_BITS)
+        worker_ids: List[Optional[int]] = [worker_base + index for index in range(processes)]
+        if worker_ids[-1] >= 1 << DEFAULT_WORKER_BITS:
+            raise ValueError(
+                f"MT_ORDER_ID_WORKER={worker_base} 起的 {processes} 个 worker 编号超出范围 "
+                f"[0, {(1 << DEFAULT_WORKER_BITS) - 1}]")
+    else:
+        worker_ids = [None] * processes
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(
+                _run_push_worker, worker_id, base_url, rate / processes,
+                duration, max(1, max_in_flight // processes), timeout,
+            )
+            for worker_id in worker_ids
+        ]
+        results = [future.result() for future in futures]
+
+    stats = results[0]
+    for other in results[1:]:
+        stats.merge(other)
+    return stats
+
+
+def _format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"调度请求: {report['scheduled']}  完成: {report['completed']}  "
+        f"耗时: {report['elapsed_s']}s",
+        f"吞吐: {report['throughput_rps']} req/s  成功: {report['ok_rps']} req/s",
+        "结果分布: " + ", ".join(f"{k}={v}" for k, v in report["outcomes"].items()),
+    ]
+    for title, key in (("延迟（含排队）", "latency"), ("服务时间", "service_time")):
+        summary = report[key]
+        lines.append(
+            f"{title}: " + ", ".join(
+                f"{name[:-3]}={value}ms" for name, value in summary.items()
+                if name.endswith("_ms") and value is not None
+            )
+        )
+    return "\n".join(lines)
+
+
+async def _run_lifecycle_command(args, base_url: str, use_db: bool):
+    async with create_async_client(base_url, timeout=args.timeout) as client:
+        await async_warm_up(client)
+        watchers: list = []
+        if use_db:
+            watchers = [
+                order_persist_watcher(interval=args.poll_interval),
+                order_status_watcher(interval=args.poll_interval),
+            ]
+            tracker = DbOrderTracker(*watchers, timeout=args.wait_timeout)
+        else:
+            token_id = await async_login(client)
+            poller = OrderListPoller(
+                token_id, base_url=base_url, interval=args.poll_interval, max_pages=args.max_pages)
+            watchers = [poller]
+            tracker = ApiOrderTracker(
+                token_id, poller, timeout=args.wait_timeout, interval=args.poll_interval)
+        try:
+            return await run_lifecycle(
+                client,
+                tracker,
+                args.orders,
+                concurrency=args.concurrency,
+                actions=args.mix,
+            )
+        finally:
+            for watcher in watchers:
+                watcher.stop()
+
+
+def _parse_mix(text: str):
+    try:
+        return parse_action_mix(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def _write_report(report: Dict[str, Any], output: Optional[str]) -> None:
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"压测报告已写入: {output}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m api.loadgen", description="美团回调开环压测")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    push = subparsers.add_parser("push", help="推单回调压测")
+    push.add_argument("--rate", type=parse_rate, required=True, help="到达速率，如 200/s")
+    push.add_argument("--duration", type=parse_duration, required=True, help="持续时长，如 10m")
+    push.add_argument("--base-url", default=None, help="目标地址，默认取 Config.get_base_url()")
+    push.add_argument("--max-in-flight", type=int, default=10000, help="最大在途请求数，超出计为丢弃")
+    push.add_argument("--timeout", type=float, default=config.DEFAULT_TIMEOUT, help="单请求超时（秒）")
+    push.add_argument("--processes", type=int, default=1, help="压测进程数，单进程发压能力不足时增加")
+    push.add_argument("--standin", action="store_true", help="启动本地替身服务并以其为目标")
+    push.add_argument("--standin-latency", type=LatencyDistribution.parse, default="0",
+                      help="替身服务延迟，如 5ms / uniform:5ms-50ms / lognormal:median=5ms,p99=80ms")
+    push.add_argument("--output", default=None, help="将 JSON 报告写入该文件")
+
+    lifecycle = subparsers.add_parser("lifecycle", help="订单全生命周期场景（推单→落库→取消/退款→R4）")
+    lifecycle.add_argument("--orders", type=int, required=True, help="订单总数")
+    lifecycle.add_argument("--concurrency", type=int, default=10, help="同时在途的订单数")
+    lifecycle.add_argument("--mix", type=_parse_mix, default=_parse_mix("cancel=1,refund=1"),
+                           help="取消/退款配比，如 cancel=1,refund=3")
+    lifecycle.add_argument("--base-url", default=None, help="目标地址，默认取 Config.get_base_url()")
+    lifecycle.add_argument("--timeout", type=float, default=config.DEFAULT_TIMEOUT, help="单请求超时（秒）")
+    lifecycle.add_argument("--wait-timeout", type=int, default=60, help="等待落库/状态变更的超时（秒）")
+    lifecycle.add_argument("--poll-interval", type=parse_duration, default=1.0, help="落库/状态轮询间隔，如 500ms")
+    lifecycle.add_argument("--max-pages", type=int, default=config.ORDER_POLL_MAX_PAGES,
+                           help="共享列表轮询每个周期最多翻页数，应覆盖在途订单数")
+    lifecycle.add_argument("--standin", action="store_true", help="启动本地替身服务并以其为目标")
+    lifecycle.add_argument("--standin-latency", type=LatencyDistribution.parse, default="0",
+                           help="替身服务延迟，如 5ms / uniform:5ms-50ms / lognormal:median=5ms,p99=80ms")
+    lifecycle.add_argument("--standin-persist-delay", type=parse_duration, default=0.5,
+                           help="替身服务落库/状态变更延迟，如 500ms")
+    lifecycle.add_argument("--output", default=None, help="将 JSON 报告写入该文件")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.base_url or config.get_base_url()
+    if args.standin:
+        server = StandinServer(
+            latency=args.standin_latency,
+            persist_delay=getattr(args, "standin_persist_delay", 0.0),
+        )
+        base_url = server.start_in_thread()
+
+    if args.command == "lifecycle":
+        # 替身服务与非 FAT 环境没有数据库，通过列表+详情接口确认落库
+        use_db = not args.standin and os.getenv("ENV", "fat") == "fat"
+        logger.info(
+            f"开始生命周期场景: 目标={base_url}, 订单数={args.orders}, 在途={args.concurrency}, "
+            f"落库确认方式={'数据库' if use_db else '列表+详情接口'}"
+        )
+        try:
+            stats = asyncio.run(_run_lifecycle_command(args, base_url, use_db))
+        finally:
+            if server is not None:
+                server.stop_thread()
+        report = stats.report()
+        report.update({"target": base_url, "concurrency": args.concurrency})
+        print(format_lifecycle_report(report))
+        _write_report(report, args.output)
+        return
+
+    logger.info(f"开始推单压测: 目标={base_url}, 速率={args.rate:g}/s, 时长={args.duration:g}s")
+    try:
+        if args.processes > 1:
+            stats = run_push_load_multiprocess(
+                base_url,
+                args.rate,
+                args.duration,
+                args.processes,
+                max_in_flight=args.max_in_flight,
+                timeout=args.timeout,
+            )
+        else:
+            stats = asyncio.run(run_push_load(
+                base_url,
+                args.rate,
+                args.duration,
+                max_in_flight=args.max_in_flight,
+                timeout=args.timeout,
+            ))
+    finally:
+        if server is not None:
+            server.stop_thread()
+
+    report = stats.report()
+    report.update({"target": base_url, "rate": args.rate, "duration_s": args.duration})
+    print(_format_report(report))
+    _write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
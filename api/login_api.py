@@ -0,0 +1,33 @@
+"""登录相关API接口"""
+from typing import Any, Dict
+
+import httpx
+
+LOGIN_ENDPOINT = "/reabam-manage-login/user/login"
+
+# 收银端登录参数
+LOGIN_PAYLOAD: Dict[str, Any] = {
+    "mobile": "19977958582",
+    "loginType": "checkstand",
+    "appType": "pc",
+    "appVersion": "1.6.2.1",
+    "loginWord": "e10adc3949ba59abbe56e057f20f883e",
+    "clientVersion": "25091901",
+    "systemVersion": "2512.29.34",
+    "companyId": ""
+}
+
+
+def _extract_token(resp: httpx.Response) -> str:
+    assert resp.status_code == 200, "获取访问令牌失败"
+    return resp.json()["data"].get("tokenId")
+
+
+def login(client: httpx.Client, url: str = LOGIN_ENDPOINT) -> str:
+    """收银端登录，返回 tokenId"""
+    return _extract_token(client.post(url, json=LOGIN_PAYLOAD))
+
+
+async def async_login(client: httpx.AsyncClient, url: str = LOGIN_ENDPOINT) -> str:
+    """收银端登录（异步），返回 tokenId"""
+    return _extract_token(await client.post(url, json=LOGIN_PAYLOAD))
@@ -4,32 +4,34 @@ from typing import Optional, Tuple
 import httpx
 
 from api.base import (
+    async_safe_post,
     handle_response,
     safe_post,
 )
 from api.mt_order_payload_builder import (
+    MtPushTemplate,
     build_mt_apply_refund_payload,
     build_mt_cancel_payload,
-    build_mt_push_payload,
 )
 from utils.file_loader import (
     get_data_file_path,
     load_yaml_data,
+    template_store,
 )
 from utils.allure_helper import attach_json, attach_text, step
 from utils.logger import logger
 
 
-def _post_and_extract(
-    client: httpx.Client,
-    endpoint: str,
-    payload: dict,
+PUSH_ORDER_ENDPOINT = "/dock/mt/v2/order/callback"
+CANCEL_ORDER_ENDPOINT = "/dock/mt/v2/order/cancel/callback"
+REFUND_ORDER_ENDPOINT = "/reabam-external-access/dock/mt/v2/order/refund/callback"
+
+
+def _extract_callback_result(
+    response: httpx.Response,
     attach_name: str,
     order_id: Optional[str] = None,
 ) -> Optional[str]:
-    # 调试：打印请求将使用的格式
-    logger.info(f"发送表单请求到 {endpoint}, payload keys: {list(payload.keys())}")
-    response = safe_post(client, endpoint, data=payload)
     # 调试：打印实际请求头
     logger.info(f"请求 Content-Type: {response.request.headers.get('content-type', 'N/A')}")
     success, response_json = handle_response(response, order_id)
@@ -42,29 +44,80 @@ def _post_and_extract(
     return None
 
 
-def mt_push_order(client: httpx.Client, mt_order_id: Optional[str] = None) -> Tuple[str, str]:
-    """推单回调"""
+def _post_and_extract(
+    client: httpx.Client,
+    endpoint: str,
+    payload: dict,
+    attach_name: str,
+    order_id: Optional[str] = None,
+) -> Optional[str]:
+    # 调试：打印请求将使用的格式
+    logger.info(f"发送表单请求到 {endpoint}, payload keys: {list(payload.keys())}")
+    response = safe_post(client, endpoint, data=payload)
+    return _extract_callback_result(response, attach_name, order_id)
+
+
+async def _async_post_and_extract(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    payload: dict,
+    attach_name: str,
+    order_id: Optional[str] = None,
+) -> Optional[str]:
+    logger.info(f"发送表单请求到 {endpoint}, payload keys: {list(payload.keys())}")
+    response = await async_safe_post(client, endpoint, data=payload)
+    return _extract_callback_result(response, attach_name, order_id)
+
+
+def load_push_template() -> MtPushTemplate:
+    """返回当前环境的推单模板（按文件缓存，文件变化后重新编译）"""
     if os.getenv("ENV") == "uat":
-        with step("加载推单数据"):
-            mt_push_data = load_yaml_data(
-                get_data_file_path("mt_delivery_data_uat.yaml"))
+        file_path = get_data_file_path("mt_delivery_data_uat.yaml")
     else:
-        with step("加载推单数据"):
-            mt_push_data = load_yaml_data(
-                get_data_file_path("mt_delivery_data.yaml"))
+        file_path = get_data_file_path("mt_delivery_data.yaml")
+    return template_store.compiled(file_path, MtPushTemplate)
+
+
+def _build_push_request(mt_order_id: Optional[str] = None) -> Tuple[dict, str]:
+    with step("加载推单数据"):
+        push_template = load_push_template()
 
     with step("构建推单请求体"):
-        final_payload, mt_order_id = build_mt_push_payload(
-            mt_push_data, mt_order_id)
+        final_payload, mt_order_id = push_template.render(mt_order_id)
         attach_text("外卖单号", mt_order_id)
         logger.info(f"推单请求体: {final_payload}")
 
+    # 添加调试日志：打印实际发送的 payload
+    logger.info(f"推单 payload 关键参数: developerId={final_payload.get('developerId')}, ePoiId={final_payload.get('ePoiId')}, sign长度={len(final_payload.get('sign', ''))}")
+    return final_payload, mt_order_id
+
+
+def mt_push_order(client: httpx.Client, mt_order_id: Optional[str] = None) -> Tuple[str, str]:
+    """推单回调"""
+    final_payload, mt_order_id = _build_push_request(mt_order_id)
+
     with step("发送推单回调"):
-        # 添加调试日志：打印实际发送的 payload
-        logger.info(f"推单 payload 关键参数: developerId={final_payload.get('developerId')}, ePoiId={final_payload.get('ePoiId')}, sign长度={len(final_payload.get('sign', ''))}")
         result = _post_and_extract(
             client,
-            "/dock/mt/v2/order/callback",
+            PUSH_ORDER_ENDPOINT,
+            final_payload,
+            attach_name="推单响应",
+            order_id=str(mt_order_id),
+        )
+        logger.info(f"推单接口返回: {result}")
+        return result, mt_order_id
+
+
+async def async_mt_push_order(
+    client: httpx.AsyncClient, mt_order_id: Optional[str] = None
+) -> Tuple[str, str]:
+    """推单回调（异步）"""
+    final_payload, mt_order_id = _build_push_request(mt_order_id)
+
+    with step("发送推单回调"):
+        result = await _async_post_and_extract(
+            client,
+            PUSH_ORDER_ENDPOINT,
             final_payload,
             attach_name="推单响应",
             order_id=str(mt_order_id),
@@ -78,8 +131,7 @@ def mt_push_order_callback(client: httpx.Client, mt_order_id: Optional[str] = No
     return mt_push_order(client, mt_order_id)
 
 
-def mt_cancel_order(client: httpx.Client, mt_order_id: str) -> Optional[str]:
-    """取消订单回调"""
+def _build_cancel_request(mt_order_id: str) -> dict:
     with step("加载取消订单数据"):
         logger.info(f"取消订单美团单号: {mt_order_id}")
         mt_cancel_data = load_yaml_data(
@@ -89,11 +141,31 @@ def mt_cancel_order(client: httpx.Client, mt_order_id: str) -> Optional[str]:
         final_payload = build_mt_cancel_payload(mt_cancel_data, mt_order_id)
         attach_text("取消订单ID", mt_order_id)
         logger.info(f"取消订单请求体: {final_payload}")
+    return final_payload
+
+
+def mt_cancel_order(client: httpx.Client, mt_order_id: str) -> Optional[str]:
+    """取消订单回调"""
+    final_payload = _build_cancel_request(mt_order_id)
 
     with step("发送取消订单回调"):
         return _post_and_extract(
             client,
-            "/dock/mt/v2/order/cancel/callback",
+            CANCEL_ORDER_ENDPOINT,
+            final_payload,
+            attach_name="取消订单响应",
+            order_id=str(mt_order_id),
+        )
+
+
+async def async_mt_cancel_order(client: httpx.AsyncClient, mt_order_id: str) -> Optional[str]:
+    """取消订单回调（异步）"""
+    final_payload = _build_cancel_request(mt_order_id)
+
+    with step("发送取消订单回调"):
+        return await _async_post_and_extract(
+            client,
+            CANCEL_ORDER_ENDPOINT,
             final_payload,
             attach_name="取消订单响应",
             order_id=str(mt_order_id),
@@ -105,8 +177,7 @@ def mt_cancel_order_callback(client: httpx.Client, order_id: str) -> Optional[st
     return mt_cancel_order(client, order_id)
 
 
-def mt_refund_order(client: httpx.Client, mt_order_id: str) -> Optional[str]:
-    """全额退款回调"""
+def _build_refund_request(mt_order_id: str) -> dict:
     with step("加载退款数据"):
         logger.info(f"美团退款订单号: {mt_order_id}")
         mt_refund_data = load_yaml_data(
@@ -116,11 +187,31 @@ def mt_refund_order(client: httpx.Client, mt_order_id: str) -> Optional[str]:
         final_payload = build_mt_apply_refund_payload(
             mt_refund_data, mt_order_id)
         logger.info(f"退款请求体: {final_payload}")
+    return final_payload
+
+
+def mt_refund_order(client: httpx.Client, mt_order_id: str) -> Optional[str]:
+    """全额退款回调"""
+    final_payload = _build_refund_request(mt_order_id)
 
     with step("发送退款回调"):
         return _post_and_extract(
             client,
-            "/reabam-external-access/dock/mt/v2/order/refund/callback",
+            REFUND_ORDER_ENDPOINT,
+            final_payload,
+            attach_name="退款响应",
+            order_id=str(mt_order_id),
+        )
+
+
+async def async_mt_refund_order(client: httpx.AsyncClient, mt_order_id: str) -> Optional[str]:
+    """全额退款回调（异步）"""
+    final_payload = _build_refund_request(mt_order_id)
+
+    with step("发送退款回调"):
+        return await _async_post_and_extract(
+            client,
+            REFUND_ORDER_ENDPOINT,
             final_payload,
             attach_name="退款响应",
             order_id=str(mt_order_id),
@@ -1,11 +1,15 @@
 """美团回调请求体的构建器"""
 import copy
 import json
+import re
+import threading
 import time
+from collections import OrderedDict
 from typing import Dict, Optional, Tuple
 
 from config import config
 from utils.allure_helper import attach_json
+from utils.id_allocator import get_mt_order_id_allocator
 from utils.logger import logger
 
 
@@ -15,66 +19,154 @@ def _require_keys(data: Dict, keys):
         raise KeyError(f"缺少必填字段: {', '.join(missing)}")
 
 
-def build_mt_push_payload(raw_data: Dict, mt_order_id: Optional[str] = None) -> Tuple[Dict[str, str], str]:
-    """构建推单回调的请求体"""
-    if not raw_data:
-        raise ValueError("原始数据为空")
+# 推单请求中随订单变化的字段，其余部分在编译模板时一次性序列化
+_PUSH_DYNAMIC_FIELDS = ("ctime", "utime", "orderId", "orderIdView")
+# 编译模板用到的原始数据配置段
+_PUSH_TEMPLATE_SECTIONS = (
+    "reconciliation_extras",
+    "poi_receive_detail",
+    "order_core_params",
+    "detail_list",
+    "extras_list",
+)
+_PUSH_FIELD_MARKER = "__mt_push_field_{}__"
+
+# 美团订单号 → 推单请求中实际发送的 ctime（毫秒），只保留最近的订单
+_PUSH_CTIME_LIMIT = 10000
+_push_ctimes: "OrderedDict[str, int]" = OrderedDict()
+_push_ctimes_lock = threading.Lock()
+
+
+def _remember_push_ctime(mt_order_id, ctime_ms: int) -> None:
+    with _push_ctimes_lock:
+        _push_ctimes[str(mt_order_id)] = ctime_ms
+        _push_ctimes.move_to_end(str(mt_order_id))
+        if len(_push_ctimes) > _PUSH_CTIME_LIMIT:
+            _push_ctimes.popitem(last=False)
+
+
+def push_ctime_ms(mt_order_id) -> Optional[int]:
+    """返回本进程推单时为该美团订单号发送的 ctime（毫秒），未推送过返回 None
+
+    落库断言与共享轮询器用它确定列表扫描的截止时间。
+    """
+    with _push_ctimes_lock:
+        return _push_ctimes.get(str(mt_order_id))
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class MtPushTemplate:
+    """预编译的推单回调模板
+
+    静态部分（reconciliation_extras、detail_list、extras_list、
+    poi_receive_detail 及订单其余字段）只序列化一次，生成请求体时
+    仅拼接 orderId/orderIdView/ctime/utime，结果与逐单构建完全一致。
+    """
+
+    __slots__ = ("_fragments", "_fields")
+
+    def __init__(self, raw_data: Dict):
+        if not raw_data:
+            raise ValueError("原始数据为空")
+
+        _require_keys(raw_data, _PUSH_TEMPLATE_SECTIONS)
+
+        poi_receive_detail = copy.deepcopy(raw_data["poi_receive_detail"])
+        poi_receive_detail["reconciliationExtras"] = _dumps(
+            raw_data["reconciliation_extras"])
+
+        order_dict = copy.deepcopy(raw_data["order_core_params"])
+        for field in _PUSH_DYNAMIC_FIELDS:
+            order_dict[field] = _PUSH_FIELD_MARKER.format(field)
+        order_dict["detail"] = _dumps(raw_data["detail_list"])
+        order_dict["extras"] = _dumps(raw_data["extras_list"])
+        order_dict["poiReceiveDetail"] = _dumps(poi_receive_detail)
+
+        # 按占位符切分序列化结果：偶数位为静态片段，奇数位为占位符
+        markers = {
+            _dumps(_PUSH_FIELD_MARKER.format(field)): field
+            for field in _PUSH_DYNAMIC_FIELDS
+        }
+        pattern = "|".join(re.escape(marker) for marker in markers)
+        parts = re.split(f"({pattern})", _dumps(order_dict))
+        if len(parts) != len(_PUSH_DYNAMIC_FIELDS) * 2 + 1:
+            raise ValueError("推单模板中存在与占位符冲突的数据")
+
+        self._fragments: Tuple[str, ...] = tuple(parts[0::2])
+        self._fields: Tuple[str, ...] = tuple(
+            markers[marker] for marker in parts[1::2])
+
+    def render_order(self, mt_order_id, timestamp_ms: int) -> str:
+        """拼接出 order 字段的 JSON 字符串"""
+        values = {
+            "ctime": timestamp_ms,
+            "utime": timestamp_ms,
+            "orderId": mt_order_id,
+            "orderIdView": mt_order_id,
+        }
+        fragments = self._fragments
+        pieces = [fragments[0]]
+        for index, field in enumerate(self._fields, start=1):
+            pieces.append(_dumps(values[field]))
+            pieces.append(fragments[index])
+        return "".join(pieces)
+
+    def render(self, mt_order_id: Optional[str] = None) -> Tuple[Dict[str, str], str]:
+        """生成推单回调请求体，返回 (请求体, 美团订单号)"""
+        timestamp_part = int(time.time() * 1000)  # 13位毫秒时间戳
+        if mt_order_id is None:
+            mt_order_id = get_mt_order_id_allocator().next_id()
+
+        final_push_payload = config.get_final_payload_params().copy()
+        final_push_payload["order"] = self.render_order(mt_order_id, timestamp_part)
+        _remember_push_ctime(mt_order_id, timestamp_part)
+
+        logger.debug(f"推单回调请求体构建完成: 订单号={mt_order_id}")
+        return final_push_payload, mt_order_id
+
+
+# 按原始数据对象缓存编译好的模板，只保留最近用到的几份。
+# 缓存项持有 raw_data 本身，保证 id 不会被其他对象复用。
+_PUSH_TEMPLATE_CACHE_SIZE = 16
+_push_templates: "OrderedDict[int, Tuple[Dict, Tuple[int, ...], MtPushTemplate]]" = OrderedDict()
+_push_templates_lock = threading.Lock()
+
+
+def _compiled_push_template(raw_data: Dict) -> MtPushTemplate:
+    """返回与 raw_data 对应的已编译模板
+
+    按对象身份命中：同一个 raw_data 且各配置段仍是同一对象时复用，不再逐次序列化内容。
+    raw_data 视为只读，修改其中的配置段后应传入新的 dict（load_yaml_data 每次都返回独立副本）。
+    """
+    if not raw_data or any(key not in raw_data for key in _PUSH_TEMPLATE_SECTIONS):
+        # 交给 MtPushTemplate 抛出与之前一致的错误
+        return MtPushTemplate(raw_data)
+    sections = tuple(id(raw_data[key]) for key in _PUSH_TEMPLATE_SECTIONS)
+    key = id(raw_data)
+    with _push_templates_lock:
+        entry = _push_templates.get(key)
+        if entry is not None and entry[0] is raw_data and entry[1] == sections:
+            _push_templates.move_to_end(key)
+            return entry[2]
+    template = MtPushTemplate(raw_data)
+    with _push_templates_lock:
+        _push_templates[key] = (raw_data, sections, template)
+        _push_templates.move_to_end(key)
+        if len(_push_templates) > _PUSH_TEMPLATE_CACHE_SIZE:
+            _push_templates.popitem(last=False)
+    return template
 
-    data = copy.deepcopy(raw_data)
-    _require_keys(
-        data,
-        [
-            "reconciliation_extras",
-            "poi_receive_detail",
-            "order_core_params",
-            "detail_list",
-            "extras_list",
-        ],
-    )
-
-    timestamp_part = int(time.time() * 1000)  # 13位毫秒时间戳
-    if mt_order_id is None:
-        mt_order_id = int("5301890" + str(timestamp_part)[-12:])
 
-    reconciliation_extras_str = json.dumps(
-        data["reconciliation_extras"],
-        ensure_ascii=False,
-        separators=(",", ":"),
-    )
-
-    poi_receive_detail = copy.deepcopy(data["poi_receive_detail"])
-    poi_receive_detail["reconciliationExtras"] = reconciliation_extras_str
-
-    order_dict = copy.deepcopy(data["order_core_params"])
-    order_dict["ctime"] = timestamp_part
-    order_dict["utime"] = timestamp_part
-    order_dict["orderId"] = mt_order_id
-    order_dict["orderIdView"] = mt_order_id
-    order_dict["detail"] = json.dumps(
-        data["detail_list"],
-        ensure_ascii=False,
-        separators=(",", ":"),
-    )
-    order_dict["extras"] = json.dumps(
-        data["extras_list"],
-        ensure_ascii=False,
-        separators=(",", ":"),
-    )
-    order_dict["poiReceiveDetail"] = json.dumps(
-        poi_receive_detail,
-        ensure_ascii=False,
-        separators=(",", ":"),
-    )
-
-    final_push_payload = config.get_final_payload_params().copy()
-    final_push_payload["order"] = json.dumps(
-        order_dict,
-        ensure_ascii=False,
-        separators=(",", ":"),
-    )
+def build_mt_push_payload(raw_data: Dict, mt_order_id: Optional[str] = None) -> Tuple[Dict[str, str], str]:
+    """构建推单回调的请求体
 
-    logger.debug(f"推单回调请求体构建完成: 订单号={mt_order_id}")
-    return final_push_payload, mt_order_id
+    同一个 raw_data 重复调用时复用已编译的模板；从 YAML 模板推单时应使用
+    api.mt_order_callback.load_push_template()，模板随文件缓存，文件变化后自动重新编译。
+    """
+    return _compiled_push_template(raw_data).render(mt_order_id)
 
 
 def build_mt_cancel_payload(raw_data: Dict, mt_order_id: str) -> Dict[str, str]:
@@ -1,37 +1,39 @@
-from typing import Any, Dict, Optional
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional
 
 import httpx
 
-from api.base import safe_post
+from api.base import (
+    async_safe_post,
+    async_safe_stream_post,
+    safe_post,
+    safe_stream_post,
+)
 from utils.allure_helper import attach_json
 from utils.file_loader import (
     get_data_file_path,
-    load_yaml_data,
+    load_yaml_section,
 )
+from utils.json_stream import JsonArrayStream, JsonKeyStream
 
 ORDER_LIST_ENDPOINT = "/retail-order-front/app/Business/Order/List"
 ORDER_DETAIL_ENDPOINT = "/retail-order-front/app/Business/Order/Dock/Detail"
 
 # 加载订单数据
 def _load_order_payload(section: str) -> Dict[str, Any]:
-    raw_data = load_yaml_data(get_data_file_path("order_data.yaml")) or {}
-    payload = raw_data.get(section)
+    payload = load_yaml_section(get_data_file_path("order_data.yaml"), section)
     if not isinstance(payload, dict):
         raise ValueError(f"data/order_data.yaml 缺少或无效的配置段: '{section}'")
-    return payload.copy()
+    return payload
 
-# POS 订单列表接口
-def pos_order_list(
-    client: httpx.Client,
+
+def _build_order_list_payload(
     token_id: str,
-    *,
-    order_remark: Optional[str] = None,
-    page_index: Optional[int] = None,
-    page_size: Optional[int] = None,
-    extra: Optional[Dict[str, Any]] = None,
-    attach: bool = False,
+    order_remark: Optional[str],
+    page_index: Optional[int],
+    page_size: Optional[int],
+    extra: Optional[Dict[str, Any]],
 ) -> Dict[str, Any]:
-    """POS 订单列表"""
     payload = _load_order_payload("orderList")
     payload["tokenId"] = token_id
 
@@ -43,6 +45,42 @@ def pos_order_list(
         payload["pageSize"] = page_size
     if extra:
         payload.update(extra)
+    return payload
+
+
+def _build_order_detail_payload(
+    token_id: str,
+    order_id: str,
+    user_id: Optional[str],
+    company_id: Optional[str],
+    extra: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    payload = _load_order_payload("orderDetail")
+    payload["tokenId"] = token_id
+    payload["orderId"] = order_id
+
+    if user_id is not None:
+        payload["userId"] = user_id
+    if company_id is not None:
+        payload["companyId"] = company_id
+    if extra:
+        payload.update(extra)
+    return payload
+
+# POS 订单列表接口
+def pos_order_list(
+    client: httpx.Client,
+    token_id: str,
+    *,
+    order_remark: Optional[str] = None,
+    page_index: Optional[int] = None,
+    page_size: Optional[int] = None,
+    extra: Optional[Dict[str, Any]] = None,
+    attach: bool = False,
+) -> Dict[str, Any]:
+    """POS 订单列表"""
+    payload = _build_order_list_payload(
+        token_id, order_remark, page_index, page_size, extra)
 
     if attach:
         attach_json("收银端订单列表请求", payload)
@@ -55,6 +93,74 @@ def pos_order_list(
 
     return resp_json
 
+
+async def async_pos_order_list(
+    client: httpx.AsyncClient,
+    token_id: str,
+    *,
+    order_remark: Optional[str] = None,
+    page_index: Optional[int] = None,
+    page_size: Optional[int] = None,
+    extra: Optional[Dict[str, Any]] = None,
+    attach: bool = False,
+) -> Dict[str, Any]:
+    """POS 订单列表（异步）"""
+    payload = _build_order_list_payload(
+        token_id, order_remark, page_index, page_size, extra)
+
+    if attach:
+        attach_json("收银端订单列表请求", payload)
+
+    resp = await async_safe_post(client, ORDER_LIST_ENDPOINT, json=payload)
+    resp_json: Dict[str, Any] = resp.json()
+
+    if attach:
+        attach_json("收银端订单列表响应", resp_json)
+
+    return resp_json
+
+
+@contextmanager
+def stream_pos_order_list(
+    client: httpx.Client,
+    token_id: str,
+    *,
+    order_remark: Optional[str] = None,
+    page_index: Optional[int] = None,
+    page_size: Optional[int] = None,
+    extra: Optional[Dict[str, Any]] = None,
+    array_key: str = "list",
+) -> Iterator[JsonArrayStream]:
+    """POS 订单列表（流式）：边读响应体边逐条产出 array_key 数组中的列表项
+
+    with stream_pos_order_list(client, token_id, page_size=200) as listing:
+        for item in listing: ...   # 提前 break 即不再读取剩余响应体
+
+    响应中没有该数组时（如 token 过期）不产出列表项，读完后 listing.document 为完整响应体。
+    """
+    payload = _build_order_list_payload(
+        token_id, order_remark, page_index, page_size, extra)
+    with safe_stream_post(client, ORDER_LIST_ENDPOINT, json=payload) as resp:
+        yield JsonArrayStream(array_key, resp.iter_bytes())
+
+
+@asynccontextmanager
+async def async_stream_pos_order_list(
+    client: httpx.AsyncClient,
+    token_id: str,
+    *,
+    order_remark: Optional[str] = None,
+    page_index: Optional[int] = None,
+    page_size: Optional[int] = None,
+    extra: Optional[Dict[str, Any]] = None,
+    array_key: str = "list",
+) -> AsyncIterator[JsonArrayStream]:
+    """POS 订单列表（流式、异步），用 async for 读取列表项"""
+    payload = _build_order_list_payload(
+        token_id, order_remark, page_index, page_size, extra)
+    async with async_safe_stream_post(client, ORDER_LIST_ENDPOINT, json=payload) as resp:
+        yield JsonArrayStream(array_key, resp.aiter_bytes())
+
 # POS 订单详情接口
 def pos_order_detail(
     client: httpx.Client,
@@ -67,16 +173,8 @@ def pos_order_detail(
     attach: bool = False,
 ) -> Dict[str, Any]:
     """POS 订单详情"""
-    payload = _load_order_payload("orderDetail")
-    payload["tokenId"] = token_id
-    payload["orderId"] = order_id
-
-    if user_id is not None:
-        payload["userId"] = user_id
-    if company_id is not None:
-        payload["companyId"] = company_id
-    if extra:
-        payload.update(extra)
+    payload = _build_order_detail_payload(
+        token_id, order_id, user_id, company_id, extra)
 
     if attach:
         attach_json("收银端订单详情请求", payload)
@@ -88,3 +186,65 @@ def pos_order_detail(
         attach_json("收银端订单详情响应", resp_json)
 
     return resp_json
+
+
+async def async_pos_order_detail(
+    client: httpx.AsyncClient,
+    token_id: str,
+    order_id: str,
+    *,
+    user_id: Optional[str] = None,
+    company_id: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+    attach: bool = False,
+) -> Dict[str, Any]:
+    """POS 订单详情（异步）"""
+    payload = _build_order_detail_payload(
+        token_id, order_id, user_id, company_id, extra)
+
+    if attach:
+        attach_json("收银端订单详情请求", payload)
+
+    resp = await async_safe_post(client, ORDER_DETAIL_ENDPOINT, json=payload)
+    resp_json: Dict[str, Any] = resp.json()
+
+    if attach:
+        attach_json("收银端订单详情响应", resp_json)
+
+    return resp_json
+
+
+@contextmanager
+def stream_pos_order_detail(
+    client: httpx.Client,
+    token_id: str,
+    order_id: str,
+    keys: Iterable[str],
+    *,
+    user_id: Optional[str] = None,
+    company_id: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> Iterator[JsonKeyStream]:
+    """POS 订单详情（流式）：边读响应体边按文档顺序产出 keys 中字段的 (键, 值)"""
+    payload = _build_order_detail_payload(
+        token_id, order_id, user_id, company_id, extra)
+    with safe_stream_post(client, ORDER_DETAIL_ENDPOINT, json=payload) as resp:
+        yield JsonKeyStream(keys, resp.iter_bytes())
+
+
+@asynccontextmanager
+async def async_stream_pos_order_detail(
+    client: httpx.AsyncClient,
+    token_id: str,
+    order_id: str,
+    keys: Iterable[str],
+    *,
+    user_id: Optional[str] = None,
+    company_id: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[JsonKeyStream]:
+    """POS 订单详情（流式、异步），用 async for 读取 (键, 值)"""
+    payload = _build_order_detail_payload(
+        token_id, order_id, user_id, company_id, extra)
+    async with async_safe_stream_post(client, ORDER_DETAIL_ENDPOINT, json=payload) as resp:
+        yield JsonKeyStream(keys, resp.aiter_bytes())
@@ -1,27 +1,28 @@
-import time
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import re
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Awaitable, Callable, Dict, Generator, List, Optional, Set, Tuple
 
 import httpx
 
 from api.order_api import (
+    ORDER_DETAIL_ENDPOINT,
+    ORDER_LIST_ENDPOINT,
+    async_pos_order_detail,
+    async_pos_order_list,
+    async_stream_pos_order_list,
     pos_order_detail,
     pos_order_list,
+    stream_pos_order_list,
 )
+from api.mt_order_payload_builder import push_ctime_ms
 from config import config
-from utils.async_helper import batch_order_details
+from utils.async_helper import as_completed_order_details, run_async
 from utils.allure_helper import attach_json, attach_text
+from utils.json_stream import JsonArrayStream
+from utils.key_path import EACH, KeyPathExtractor
 from utils.logger import logger
-
-
-def _iter_dicts(obj: Any) -> Iterable[Dict[str, Any]]:
-    stack: List[Any] = [obj]
-    while stack:
-        current = stack.pop()
-        if isinstance(current, dict):
-            yield current
-            stack.extend(current.values())
-        elif isinstance(current, list):
-            stack.extend(current)
+from utils.poller import Poller
 
 
 def _is_hex32(value: str) -> bool:
@@ -33,49 +34,171 @@ def _is_hex32(value: str) -> bool:
     return True
 
 
-def _extract_order_ids(list_resp_json: Dict[str, Any]) -> List[str]:
-    order_ids: List[str] = []
-    for d in _iter_dicts(list_resp_json):
-        if "orderId" not in d:
-            continue
-        value = d.get("orderId")
-        if isinstance(value, str) and value.strip():
-            order_ids.append(value.strip())
+_ORDER_ID_PATHS = KeyPathExtractor(("orderId",))
+
 
-    if not order_ids:
-        return []
+def _extract_list_items(list_resp_json: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """按列表顺序返回 (orderId, 列表项)，orderId 去重"""
+    items: List[Tuple[str, Dict[str, Any]]] = []
+    for _, value, d in _ORDER_ID_PATHS.extract(list_resp_json, ORDER_LIST_ENDPOINT):
+        if isinstance(value, str) and value.strip():
+            items.append((value.strip(), d))
 
     # 优先返回像 32 位十六进制的订单ID（符合常见的内部订单ID）
-    hex32 = [oid for oid in order_ids if _is_hex32(oid)]
+    hex32 = [item for item in items if _is_hex32(item[0])]
     if hex32:
-        return list(dict.fromkeys(hex32))
+        items = hex32
+
+    unique: Dict[str, Dict[str, Any]] = {}
+    for order_id, item in items:
+        unique.setdefault(order_id, item)
+    return list(unique.items())
+
+
+def _extract_order_ids(list_resp_json: Dict[str, Any]) -> List[str]:
+    return [order_id for order_id, _ in _extract_list_items(list_resp_json)]
 
-    return list(dict.fromkeys(order_ids))
+
+# 详情中可能承载外卖侧单号的字段
+_SOURCE_NO_KEYS = frozenset({
+    "SourceNo",
+    "sourceNo",
+    "outOrderNo",
+    "outOrderId",
+    "dockOrderNo",
+    "dock_order_no",
+    "orderIdView",
+    "platformOrderId",
+    "thirdOrderNo",
+})
+_SOURCE_NO_PATHS = KeyPathExtractor(_SOURCE_NO_KEYS)
+
+# 详情匹配已确认承载推送美团订单号的字段，列表项只按该字段直接比对
+_source_no_key: Optional[str] = None
+
+
+def remember_source_no_key(key: str) -> None:
+    """记录详情中与推送美团订单号相等的字段名，之后列表项带该字段时无需再拉详情"""
+    global _source_no_key
+    if key != _source_no_key:
+        logger.info(f"美团订单号字段: {key}")
+        _source_no_key = key
+
+
+def _same_value(value: Any, expected: str) -> bool:
+    # 字符串直接比较，数字等其他类型才转成字符串
+    if isinstance(value, str):
+        return value == expected
+    return str(value) == expected
 
 
 def _detail_matches_source_no(detail_resp_json: Dict[str, Any], expected_source_no: str) -> Tuple[bool, Optional[str]]:
     expected = str(expected_source_no)
 
-    candidate_keys = {
-        "SourceNo",
-        "sourceNo",
-        "outOrderNo",
-        "outOrderId",
-        "dockOrderNo",
-        "dock_order_no",
-        "orderIdView",
-        "platformOrderId",
-        "thirdOrderNo",
-    }
+    def _is_expected(match) -> bool:
+        return _same_value(match[1], expected)
 
-    for d in _iter_dicts(detail_resp_json):
-        for key, value in d.items():
-            if key in candidate_keys and value is not None and str(value) == expected:
-                return True, key
+    for key, value, _ in _SOURCE_NO_PATHS.extract(detail_resp_json, ORDER_DETAIL_ENDPOINT, _is_expected):
+        if _same_value(value, expected):
+            remember_source_no_key(key)
+            return True, key
 
     return False, None
 
 
+# 列表项中的下单/创建时间字段
+_LIST_TIME_KEYS = ("createDate", "createTime", "orderDate", "orderTime", "ctime")
+
+
+_UTC_OFFSET = re.compile(r"^(?:UTC|GMT)?([+-])(\d{1,2}):?(\d{2})?$", re.IGNORECASE)
+
+
+def server_timezone() -> tzinfo:
+    """SERVER_TIMEZONE 对应的时区：UTC 偏移（如 +08:00）或 IANA 名称（如 Asia/Shanghai）"""
+    name = config.SERVER_TIMEZONE.strip()
+    match = _UTC_OFFSET.match(name)
+    if match:
+        sign, hours, minutes = match.groups()
+        offset = timedelta(hours=int(hours), minutes=int(minutes or 0))
+        return timezone(-offset if sign == "-" else offset)
+    if name.upper() in ("UTC", "GMT", "Z"):
+        return timezone.utc
+    from zoneinfo import ZoneInfo
+    return ZoneInfo(name)
+
+
+def _parse_time_ms(value: Any) -> Optional[int]:
+    """解析毫秒/秒时间戳或 'YYYY-MM-DD HH:MM:SS'，无法解析返回 None
+
+    不带时区的时间按服务端时区（SERVER_TIMEZONE）解释，与本机时区无关。
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if value.isdigit():
+            value = int(value)
+        else:
+            try:
+                parsed = datetime.fromisoformat(value)
+            except ValueError:
+                return None
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=server_timezone())
+            return int(parsed.timestamp() * 1000)
+    if isinstance(value, (int, float)) and value > 0:
+        # 小于 1e11 视为秒级时间戳
+        return int(value * 1000) if value < 1e11 else int(value)
+    return None
+
+
+def _list_item_time_ms(item: Dict[str, Any]) -> Optional[int]:
+    for key in _LIST_TIME_KEYS:
+        if key in item:
+            parsed = _parse_time_ms(item[key])
+            if parsed is not None:
+                return parsed
+    return None
+
+
+def _list_item_source_no(item: Dict[str, Any]) -> Optional[str]:
+    """列表项在已确认字段上携带的美团订单号（不深入子结构），字段未知或缺失返回 None"""
+    if _source_no_key is None:
+        return None
+    value = item.get(_source_no_key)
+    if value is None or value == "":
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def scan_cutoff_ms(pushed_after_ms: Optional[int]) -> Optional[int]:
+    """由推单时间得到列表扫描的截止时间：早于它的订单不可能是目标订单
+
+    预留 ORDER_SCAN_CLOCK_SKEW 秒的时钟偏差，配置为负数时关闭按时间提前结束。
+    """
+    if pushed_after_ms is None or config.ORDER_SCAN_CLOCK_SKEW < 0:
+        return None
+    return pushed_after_ms - int(config.ORDER_SCAN_CLOCK_SKEW * 1000)
+
+
+def _extract_source_nos(detail_resp_json: Dict[str, Any],
+                        wanted: Optional[Set[str]] = None) -> List[Tuple[str, str]]:
+    """返回详情中所有候选字段的 (字段名, 外卖单号)，外卖单号去重
+
+    wanted 为正在等待的外卖单号：已学路径上没有其中任何一个时回退到全量遍历。
+    """
+    def _is_wanted(match) -> bool:
+        value = match[1]
+        return (value if isinstance(value, str) else str(value)) in wanted
+
+    accept = _is_wanted if wanted is not None else None
+    source_nos: Dict[str, str] = {}
+    for key, value, _ in _SOURCE_NO_PATHS.extract(detail_resp_json, ORDER_DETAIL_ENDPOINT, accept):
+        if value != "":
+            source_nos.setdefault(value if isinstance(value, str) else str(value), key)
+    return [(key, source_no) for source_no, key in source_nos.items()]
+
+
 def _check_token_expired(resp: Dict[str, Any]) -> bool:
     """检查响应是否表示 token 过期"""
     code = resp.get("code") or resp.get("ResultInt")
@@ -83,6 +206,321 @@ def _check_token_expired(resp: Dict[str, Any]) -> bool:
     return str(code) == "9999" or "登录已失效" in msg or "重登录" in msg
 
 
+async def _first_matching_detail(
+    token_id: str,
+    expected_source_no: str,
+    new_order_ids: List[str],
+    seen_order_ids: Set[str],
+    client: Optional[httpx.AsyncClient] = None,
+) -> Tuple[Optional[str], Optional[str], Optional[Dict[str, Any]]]:
+    """按完成顺序检查一批新候选的详情，匹配到外卖单号即取消其余请求
+
+    返回 (内部订单编号, 匹配字段, 最后一个详情响应)；详情请求失败的候选不计入 seen_order_ids，下个周期重试。
+    """
+    last_detail_resp: Optional[Dict[str, Any]] = None
+    async with aclosing(as_completed_order_details(token_id, new_order_ids, client=client)) as details:
+        async for index, detail_resp in details:
+            internal_order_id = new_order_ids[index]
+            last_detail_resp = detail_resp
+
+            # 跳过异步请求失败的结果
+            if "error" in detail_resp:
+                logger.warning(
+                    f"订单详情获取失败: {internal_order_id}, 错误: {detail_resp.get('error')}")
+                continue
+            seen_order_ids.add(internal_order_id)
+
+            matched, matched_key = _detail_matches_source_no(
+                detail_resp, expected_source_no)
+            if matched:
+                return internal_order_id, matched_key, detail_resp
+    return None, None, last_detail_resp
+
+
+def _attach_persisted_match(
+    expected_source_no: str,
+    internal_order_id: str,
+    matched_key: Optional[str],
+    list_resp: Dict[str, Any],
+    detail_resp: Optional[Dict[str, Any]],
+) -> None:
+    attach_text("期望的外卖单号", expected_source_no)
+    attach_text("匹配到的内部订单编号", internal_order_id)
+    if matched_key:
+        attach_text("匹配字段", matched_key)
+    attach_json("订单列表响应（匹配）", list_resp)
+    if detail_resp is not None:
+        attach_json("订单详情响应（匹配）", detail_resp)
+
+
+class _ListPageScan:
+    """逐条筛选一页列表项，得到 (需拉详情的订单ID, 列表项已带的 外卖单号→订单ID, 是否无需继续翻页)
+
+    列表按新单倒序：遇到早于 cutoff_ms 的订单后，其后所有订单（含后续页）都更早，
+    无需再拉详情或翻页；空页同样结束翻页。列表项在已确认承载美团订单号的字段
+    （见 remember_source_no_key）上带值时直接比对，不再请求详情，不相等的订单计入
+    seen_order_ids，后续周期不再检查；字段未知或列表项未带该字段时仍拉详情。
+    add() 返回 True 表示可以停止读取本页（已越过截止时间，或已直接匹配到 stop_source_no）。
+    """
+
+    def __init__(
+        self,
+        page_index: int,
+        seen_order_ids: Set[str],
+        cutoff_ms: Optional[int] = None,
+        stop_source_no: Optional[str] = None,
+    ):
+        self.page_index = page_index
+        self.seen_order_ids = seen_order_ids
+        self.cutoff_ms = cutoff_ms
+        self.stop_source_no = stop_source_no
+        self.detail_ids: List[str] = []
+        self.listed: Dict[str, str] = {}
+        self.exhausted = False
+        self.candidates = 0
+        self._page_ids: Set[str] = set()
+
+    def add(self, order_id: str, item: Dict[str, Any]) -> bool:
+        self.candidates += 1
+        if order_id in self.seen_order_ids or order_id in self._page_ids:
+            return False
+        self._page_ids.add(order_id)
+        if self.cutoff_ms is not None:
+            item_time = _list_item_time_ms(item)
+            if item_time is not None and item_time < self.cutoff_ms:
+                self.exhausted = True
+                return True
+        source_no = _list_item_source_no(item)
+        if source_no is None:
+            self.detail_ids.append(order_id)
+            return False
+        self.seen_order_ids.add(order_id)
+        self.listed[source_no] = order_id
+        return source_no == self.stop_source_no
+
+    def finish(self, streamed: bool = False) -> Tuple[List[str], Dict[str, str], bool]:
+        # 空页说明已到列表末尾
+        if not self.candidates:
+            self.exhausted = True
+        logger.info(
+            f"订单列表第{self.page_index}页{'（流式）' if streamed else ''}，候选={self.candidates}，"
+            f"需查详情={len(self.detail_ids)}，列表直接匹配={len(self.listed)}，"
+            f"无需继续翻页={self.exhausted}，已检查={len(self.seen_order_ids)}"
+        )
+        return self.detail_ids, self.listed, self.exhausted
+
+
+def _scan_list_page(
+    list_resp: Dict[str, Any],
+    page_index: int,
+    seen_order_ids: Set[str],
+    cutoff_ms: Optional[int] = None,
+) -> Tuple[List[str], Dict[str, str], bool]:
+    """检查 token 并筛选本页订单，规则见 _ListPageScan"""
+    if _check_token_expired(list_resp):
+        raise AssertionError(
+            f"Token 已过期，请重新获取。响应: {list_resp}"
+        )
+
+    scan = _ListPageScan(page_index, seen_order_ids, cutoff_ms)
+    for order_id, item in _extract_list_items(list_resp):
+        if scan.add(order_id, item):
+            break
+    return scan.finish()
+
+
+def list_array_key() -> Optional[str]:
+    """由已学到的 orderId 路径得到订单列表数组的键名，尚未学到时返回 None
+
+    流式读取列表需要知道数组键名，首页先按普通方式请求一次即可学到。
+    """
+    for path in _ORDER_ID_PATHS.learned_paths(ORDER_LIST_ENDPOINT):
+        if len(path) >= 3 and path[-2] is EACH and isinstance(path[-3], str):
+            return path[-3]
+    return None
+
+
+def _stream_item_id(item: Any) -> Optional[str]:
+    if isinstance(item, dict):
+        value = item.get("orderId")
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return None
+
+
+def _finish_list_stream(scan: _ListPageScan, listing: JsonArrayStream) -> Dict[str, Any]:
+    """流式读取结束后的检查，返回用于日志/附件的列表响应摘要"""
+    if not listing.found:
+        # 没有列表数组时整个响应体已读完，按普通响应检查 token
+        document = listing.document if isinstance(listing.document, dict) else {}
+        if _check_token_expired(document):
+            raise AssertionError(
+                f"Token 已过期，请重新获取。响应: {document}"
+            )
+        return document
+    return {
+        "streamed": True,
+        "pageIndex": scan.page_index,
+        "itemsRead": listing.items_read,
+        "bytesRead": listing.bytes_read,
+        "finished": listing.finished,
+    }
+
+
+def _scan_list_stream(
+    listing: JsonArrayStream,
+    page_index: int,
+    seen_order_ids: Set[str],
+    cutoff_ms: Optional[int] = None,
+    stop_source_no: Optional[str] = None,
+) -> Tuple[List[str], Dict[str, str], bool, Dict[str, Any]]:
+    """边读边筛选一页流式列表，可以停止时不再读取剩余响应体
+
+    返回值比 _scan_list_page 多一个列表响应摘要。
+    """
+    scan = _ListPageScan(page_index, seen_order_ids, cutoff_ms, stop_source_no)
+    for item in listing:
+        order_id = _stream_item_id(item)
+        if order_id is not None and scan.add(order_id, item):
+            break
+    summary = _finish_list_stream(scan, listing)
+    return (*scan.finish(streamed=True), summary)
+
+
+async def _async_scan_list_stream(
+    listing: JsonArrayStream,
+    page_index: int,
+    seen_order_ids: Set[str],
+    cutoff_ms: Optional[int] = None,
+    stop_source_no: Optional[str] = None,
+) -> Tuple[List[str], Dict[str, str], bool, Dict[str, Any]]:
+    """_scan_list_stream 的异步版本"""
+    scan = _ListPageScan(page_index, seen_order_ids, cutoff_ms, stop_source_no)
+    items = listing.__aiter__()
+    try:
+        async for item in items:
+            order_id = _stream_item_id(item)
+            if order_id is not None and scan.add(order_id, item):
+                break
+    finally:
+        await items.aclose()
+    summary = _finish_list_stream(scan, listing)
+    return (*scan.finish(streamed=True), summary)
+
+
+def _effective_timeout(timeout: Optional[int]) -> float:
+    return timeout if timeout is not None else max(config.DEFAULT_TIMEOUT, 30)
+
+
+# _ListDetailSearch.steps 产出的请求类型
+_FETCH_LIST_PAGE = "list_page"
+_FETCH_DETAILS = "details"
+
+
+class _ListDetailSearch:
+    """list->detail 落库查找的共享逻辑，同步/异步入口只负责执行请求与轮询等待
+
+    steps() 是一个轮询周期的翻页匹配过程：产出 (_FETCH_LIST_PAGE, page_index, array_key)
+    时回送 (需查详情的订单ID, 列表项已带的 外卖单号→订单ID, 是否无需继续翻页, 列表响应)；
+    产出 (_FETCH_DETAILS, new_order_ids) 时回送 _first_matching_detail 的结果。
+    匹配到时返回内部订单编号，否则返回 None。
+    """
+
+    def __init__(
+        self,
+        expected_source_no: str,
+        *,
+        max_pages: int,
+        pushed_after_ms: Optional[int] = None,
+        stream: Optional[bool] = None,
+    ):
+        self.expected_source_no = str(expected_source_no)
+        self.max_pages = max_pages
+        self.stream = config.ORDER_LIST_STREAM if stream is None else stream
+        self.seen_order_ids: Set[str] = set()
+        if pushed_after_ms is None:
+            pushed_after_ms = push_ctime_ms(self.expected_source_no)
+        self.cutoff_ms = scan_cutoff_ms(pushed_after_ms)
+        self.last_list_resp: Optional[Dict[str, Any]] = None
+        self.last_detail_resp: Optional[Dict[str, Any]] = None
+
+    def scan_page(self, list_resp: Dict[str, Any], page_index: int):
+        """普通（非流式）列表响应的筛选，结果格式与流式一致"""
+        return (*_scan_list_page(list_resp, page_index, self.seen_order_ids, self.cutoff_ms), list_resp)
+
+    def scan_stream(self, listing: JsonArrayStream, page_index: int):
+        return _scan_list_stream(
+            listing, page_index, self.seen_order_ids, self.cutoff_ms, self.expected_source_no)
+
+    async def async_scan_stream(self, listing: JsonArrayStream, page_index: int):
+        return await _async_scan_list_stream(
+            listing, page_index, self.seen_order_ids, self.cutoff_ms, self.expected_source_no)
+
+    def first_matching_detail(self, token_id: str, new_order_ids: List[str],
+                              client: Optional[httpx.AsyncClient] = None):
+        return _first_matching_detail(
+            token_id, self.expected_source_no, new_order_ids, self.seen_order_ids, client=client)
+
+    def steps(self) -> Generator[Tuple[Any, ...], Any, Optional[str]]:
+        for page_index in range(1, self.max_pages + 1):
+            array_key = list_array_key() if self.stream else None
+            new_order_ids, listed, exhausted, list_resp = yield _FETCH_LIST_PAGE, page_index, array_key
+            self.last_list_resp = list_resp
+            internal_order_id = listed.get(self.expected_source_no)
+            if internal_order_id is not None:
+                _attach_persisted_match(
+                    self.expected_source_no, internal_order_id, None, list_resp, None)
+                return internal_order_id
+
+            if new_order_ids:
+                # 【并发优化】并发获取订单详情，匹配到即取消其余请求
+                internal_order_id, matched_key, detail_resp = yield _FETCH_DETAILS, new_order_ids
+                self.last_detail_resp = detail_resp or self.last_detail_resp
+                if internal_order_id is not None:
+                    _attach_persisted_match(
+                        self.expected_source_no, internal_order_id, matched_key, list_resp, detail_resp)
+                    return internal_order_id
+
+            if exhausted:
+                break
+        return None
+
+    def failure(self, timeout: float) -> AssertionError:
+        if self.last_list_resp is not None:
+            attach_json("订单列表响应（最后一次）", self.last_list_resp)
+        if self.last_detail_resp is not None:
+            attach_json("订单详情响应（最后一次）", self.last_detail_resp)
+        return AssertionError(
+            f"在 {timeout}s 内未通过 list/detail 找到订单；expected_source_no={self.expected_source_no}"
+        )
+
+
+def _run_steps(steps: Generator, fetch: Callable[..., Any]) -> Any:
+    """执行 steps 产出的每个请求（fetch(*request)）并回送结果，返回 steps 的返回值"""
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(fetch(*request))
+    except StopIteration as done:
+        return done.value
+
+
+async def _async_run_steps(steps: Generator, fetch: Callable[..., Awaitable[Any]]) -> Any:
+    """_run_steps 的异步版本，fetch 为协程函数"""
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(await fetch(*request))
+    except StopIteration as done:
+        return done.value
+
+
+def _attach_poller_match(expected_source_no: str, internal_order_id: str) -> str:
+    attach_text("期望的外卖单号", expected_source_no)
+    attach_text("匹配到的内部订单编号", internal_order_id)
+    return internal_order_id
+
+
 def assert_order_persisted_via_list_detail(
     client: httpx.Client,
     token_id: str,
@@ -90,110 +528,165 @@ def assert_order_persisted_via_list_detail(
     *,
     order_remark: Optional[str] = None,
     timeout: Optional[int] = None,
-    interval: int = 2,
+    interval: float = 2,
     max_pages: int = 3,
     page_size: int = 20,
     user_id: Optional[str] = None,
     company_id: Optional[str] = None,
+    poller=None,
+    pushed_after_ms: Optional[int] = None,
+    stream: Optional[bool] = None,
 ) -> str:
     """非 FAT 环境：通过 list->detail 方式断言订单已可查询（视为落库成功）。
 
     - list 接口用于获取候选 orderId
     - detail 接口用于用外卖侧唯一号（expected_source_no）做最终匹配
+    - 传入 poller（OrderListPoller）时由共享轮询器统一翻页，本函数只等待结果
+    - pushed_after_ms 为推单 ctime（默认取本进程推单时实际发送的 ctime），列表翻到更早的订单即停止
+    - stream 为真时（默认取 ORDER_LIST_STREAM）流式读取列表，匹配或越过截止时间即停止读取
+    - 轮询按退避节奏进行，interval 为最大轮询间隔
 
     返回：匹配到的内部 orderId
     """
 
-    effective_timeout = timeout if timeout is not None else max(
-        config.DEFAULT_TIMEOUT, 30)
-    start = time.time()
-    seen_order_ids: Set[str] = set()
-
-    last_list_resp: Optional[Dict[str, Any]] = None
-    last_detail_resp: Optional[Dict[str, Any]] = None
+    effective_timeout = _effective_timeout(timeout)
+    if poller is not None:
+        return _attach_poller_match(expected_source_no, poller.wait(
+            str(expected_source_no), effective_timeout, pushed_after_ms=pushed_after_ms))
 
+    search = _ListDetailSearch(
+        expected_source_no, max_pages=max_pages, pushed_after_ms=pushed_after_ms, stream=stream)
     logger.info(
         f"开始验证订单落库，期望外卖单号: {expected_source_no}，超时: {effective_timeout}s")
 
-    while time.time() - start < effective_timeout:
-        for page_index in range(1, max_pages + 1):
-            list_resp = pos_order_list(
+    def _fetch(kind: str, *args: Any) -> Any:
+        if kind == _FETCH_DETAILS:
+            return run_async(search.first_matching_detail(token_id, *args))
+        page_index, array_key = args
+        if array_key is not None:
+            with stream_pos_order_list(
                 client,
                 token_id,
                 order_remark=order_remark,
                 page_index=page_index,
                 page_size=page_size,
-            )
-            last_list_resp = list_resp
-            logger.info(f"订单列表第{page_index}页，响应={list_resp}")
-
-            # 检查 token 是否过期
-            if _check_token_expired(list_resp):
-                raise AssertionError(
-                    f"Token 已过期，请重新获取。响应: {list_resp}"
-                )
-
-            order_ids = _extract_order_ids(list_resp)
-            # 过滤已检查的订单
-            new_order_ids = [
-                oid for oid in order_ids if oid not in seen_order_ids]
-            logger.info(
-                f"订单列表第{page_index}页，候选={len(order_ids)}，新增={len(new_order_ids)}，已检查={len(seen_order_ids)}"
-            )
+                array_key=array_key,
+            ) as listing:
+                return search.scan_stream(listing, page_index)
+        list_resp = pos_order_list(
+            client,
+            token_id,
+            order_remark=order_remark,
+            page_index=page_index,
+            page_size=page_size,
+        )
+        logger.info(f"订单列表第{page_index}页，响应={list_resp}")
+        return search.scan_page(list_resp, page_index)
 
-            if not new_order_ids:
-                continue
+    for _ in Poller(effective_timeout, max_interval=interval,
+                    label=f"list/detail 落库 {expected_source_no}"):
+        internal_order_id = _run_steps(search.steps(), _fetch)
+        if internal_order_id is not None:
+            return internal_order_id
+    raise search.failure(effective_timeout)
 
-            # 【并发优化】批量获取订单详情
-            detail_results = batch_order_details(
-                token_id, new_order_ids, max_concurrency=10)
-
-            for internal_order_id, detail_resp in zip(new_order_ids, detail_results):
-                seen_order_ids.add(internal_order_id)
-                last_detail_resp = detail_resp
-
-                # 跳过异步请求失败的结果
-                if "error" in detail_resp:
-                    logger.warning(
-                        f"订单详情获取失败: {internal_order_id}, 错误: {detail_resp.get('error')}")
-                    continue
-
-                matched, matched_key = _detail_matches_source_no(
-                    detail_resp, str(expected_source_no))
-                if matched:
-                    attach_text("期望的外卖单号", expected_source_no)
-                    attach_text("匹配到的内部订单编号", internal_order_id)
-                    if matched_key:
-                        attach_text("匹配字段", matched_key)
-                    attach_json("订单列表响应（匹配）", list_resp)
-                    attach_json("订单详情响应（匹配）", detail_resp)
-                    return internal_order_id
 
-        time.sleep(interval)
+async def async_assert_order_persisted_via_list_detail(
+    client: httpx.AsyncClient,
+    token_id: str,
+    expected_source_no: str,
+    *,
+    order_remark: Optional[str] = None,
+    timeout: Optional[int] = None,
+    interval: float = 2,
+    max_pages: int = 3,
+    page_size: int = 20,
+    poller=None,
+    pushed_after_ms: Optional[int] = None,
+    stream: Optional[bool] = None,
+) -> str:
+    """assert_order_persisted_via_list_detail 的异步版本，等待期间不阻塞事件循环
+
+    返回：匹配到的内部 orderId
+    """
+    effective_timeout = _effective_timeout(timeout)
+    if poller is not None:
+        return _attach_poller_match(expected_source_no, await poller.async_wait(
+            str(expected_source_no), effective_timeout, pushed_after_ms=pushed_after_ms))
+
+    search = _ListDetailSearch(
+        expected_source_no, max_pages=max_pages, pushed_after_ms=pushed_after_ms, stream=stream)
+
+    async def _fetch(kind: str, *args: Any) -> Any:
+        if kind == _FETCH_DETAILS:
+            return await search.first_matching_detail(token_id, *args, client=client)
+        page_index, array_key = args
+        if array_key is not None:
+            async with async_stream_pos_order_list(
+                client,
+                token_id,
+                order_remark=order_remark,
+                page_index=page_index,
+                page_size=page_size,
+                array_key=array_key,
+            ) as listing:
+                return await search.async_scan_stream(listing, page_index)
+        list_resp = await async_pos_order_list(
+            client,
+            token_id,
+            order_remark=order_remark,
+            page_index=page_index,
+            page_size=page_size,
+        )
+        return search.scan_page(list_resp, page_index)
+
+    async for _ in Poller(effective_timeout, max_interval=interval,
+                          label=f"list/detail 落库 {expected_source_no}"):
+        internal_order_id = await _async_run_steps(search.steps(), _fetch)
+        if internal_order_id is not None:
+            return internal_order_id
+    raise search.failure(effective_timeout)
 
-    if last_list_resp is not None:
-        attach_json("订单列表响应（最后一次）", last_list_resp)
-    if last_detail_resp is not None:
-        attach_json("订单详情响应（最后一次）", last_detail_resp)
 
-    raise AssertionError(
-        f"在 {effective_timeout}s 内未通过 list/detail 找到订单；expected_source_no={expected_source_no}"
-    )
+_ORDER_STATUS_PATHS = KeyPathExtractor(("orderStatus", "OrderStatus", "order_status"))
 
 
 def _extract_order_status(detail_resp_json: Dict[str, Any]) -> Optional[str]:
-    candidate_keys = {
-        "orderStatus",
-        "OrderStatus",
-        "order_status",
-    }
+    match = _ORDER_STATUS_PATHS.first(detail_resp_json, ORDER_DETAIL_ENDPOINT)
+    if match is None:
+        return None
+    return str(match[1])
 
-    for d in _iter_dicts(detail_resp_json):
-        for key in candidate_keys:
-            if key in d and d.get(key) is not None:
-                return str(d.get(key))
 
-    return None
+class _OrderStatusCheck:
+    """详情接口订单状态校验的共享逻辑，同步/异步入口只负责请求详情与轮询等待"""
+
+    def __init__(self, internal_order_id: str, expected_status: str):
+        self.internal_order_id = internal_order_id
+        self.expected_status = str(expected_status)
+        self.last_detail_resp: Optional[Dict[str, Any]] = None
+        self.last_status: Optional[str] = None
+
+    def check(self, detail_resp: Dict[str, Any]) -> Optional[str]:
+        """状态匹配时返回实际状态，否则返回 None"""
+        self.last_detail_resp = detail_resp
+        status = _extract_order_status(detail_resp)
+        self.last_status = status
+        logger.info(f"订单状态轮询：内部订单编号={self.internal_order_id}，当前状态={status}")
+
+        if status is not None and status == self.expected_status:
+            attach_text("期望订单状态", self.expected_status)
+            attach_text("实际订单状态", status)
+            attach_json("订单详情响应（状态匹配）", detail_resp)
+            return status
+        return None
+
+    def failure(self, timeout: float) -> AssertionError:
+        if self.last_detail_resp is not None:
+            attach_json("订单详情响应（状态校验，最后一次）", self.last_detail_resp)
+        return AssertionError(
+            f"在 {timeout}s 内订单状态未变为 {self.expected_status}，当前状态={self.last_status}"
+        )
 
 
 def assert_order_status_via_detail(
@@ -203,46 +696,47 @@ def assert_order_status_via_detail(
     expected_status: str,
     *,
     timeout: Optional[int] = None,
-    interval: int = 2,
+    interval: float = 2,
     user_id: Optional[str] = None,
     company_id: Optional[str] = None,
 ) -> str:
-    """通过详情接口轮询校验订单状态。
+    """通过详情接口轮询校验订单状态，按退避节奏轮询，interval 为最大轮询间隔。
 
     返回：实际订单状态（匹配后返回）
     """
 
-    effective_timeout = timeout if timeout is not None else max(
-        config.DEFAULT_TIMEOUT, 30)
-    start = time.time()
-    last_detail_resp: Optional[Dict[str, Any]] = None
-    last_status: Optional[str] = None
+    effective_timeout = _effective_timeout(timeout)
+    check = _OrderStatusCheck(internal_order_id, expected_status)
+    for _ in Poller(effective_timeout, max_interval=interval,
+                    label=f"订单状态 {internal_order_id}"):
+        status = check.check(pos_order_detail(
+            client, token_id, internal_order_id, user_id=user_id, company_id=company_id))
+        if status is not None:
+            return status
+    raise check.failure(effective_timeout)
 
-    while time.time() - start < effective_timeout:
-        detail_resp = pos_order_detail(
-            client,
-            token_id,
-            internal_order_id,
-            user_id=user_id,
-            company_id=company_id,
-        )
-        last_detail_resp = detail_resp
 
-        status = _extract_order_status(detail_resp)
-        last_status = status
-        logger.info(f"订单状态轮询：内部订单编号={internal_order_id}，当前状态={status}")
-
-        if status is not None and str(status) == str(expected_status):
-            attach_text("期望订单状态", expected_status)
-            attach_text("实际订单状态", status)
-            attach_json("订单详情响应（状态匹配）", detail_resp)
-            return str(status)
-
-        time.sleep(interval)
-
-    if last_detail_resp is not None:
-        attach_json("订单详情响应（状态校验，最后一次）", last_detail_resp)
+async def async_assert_order_status_via_detail(
+    client: httpx.AsyncClient,
+    token_id: str,
+    internal_order_id: str,
+    expected_status: str,
+    *,
+    timeout: Optional[int] = None,
+    interval: float = 2,
+    user_id: Optional[str] = None,
+    company_id: Optional[str] = None,
+) -> str:
+    """assert_order_status_via_detail 的异步版本
 
-    raise AssertionError(
-        f"在 {effective_timeout}s 内订单状态未变为 {expected_status}，当前状态={last_status}"
-    )
+    返回：实际订单状态（匹配后返回）
+    """
+    effective_timeout = _effective_timeout(timeout)
+    check = _OrderStatusCheck(internal_order_id, expected_status)
+    async for _ in Poller(effective_timeout, max_interval=interval,
+                          label=f"订单状态 {internal_order_id}"):
+        status = check.check(await async_pos_order_detail(
+            client, token_id, internal_order_id, user_id=user_id, company_id=company_id))
+        if status is not None:
+            return status
+    raise check.failure(effective_timeout)
@@ -1,5 +1,5 @@
 """订单测试的数据库断言"""
-import time
+from typing import Optional
 
 from config import config
 from utils.allure_helper import attach_text
@@ -8,23 +8,43 @@ from utils.db_helper import (
     query_order_exist,
     query_order_status,
 )
+from utils.db_watcher import DbRowWatcher, WatchTimeout, status_equals
 from utils.logger import logger
+from utils.poller import Poller
+
+
+def _status_mismatch(order_id: str, expected_status: str, e: WatchTimeout) -> AssertionError:
+    actual_status = e.last_row.get("OrderStatus") if e.last_row else None
+    return AssertionError(
+        f"订单 {order_id} 期望状态： {expected_status}, 实际结果： {actual_status}"
+    )
 
 
 def assert_order_created(
-        conn, order_id: str, timeout: int = None, interval: int = 1
+        conn, order_id: str, timeout: int = None, interval: int = 1,
+        watcher: Optional[DbRowWatcher] = None,
 ):
-    """断言订单在超时内写入数据库"""
+    """断言订单在超时内写入数据库
+
+    传入 watcher（order_persist_watcher）时由共享监视器批量轮询，不再逐单查询；
+    否则按退避节奏逐单查询，interval 为最大轮询间隔。
+    """
     timeout = timeout or config.DEFAULT_TIMEOUT
+    if watcher is not None:
+        try:
+            result = watcher.wait(order_id, timeout)
+        except WatchTimeout:
+            raise AssertionError(f"订单 {order_id} 在 {timeout}s 内未写入数据库") from None
+        attach_text("订单已创建", result)
+        return
+
     sql = "SELECT * FROM dorder_dock WHERE dock_order_no = %s"
-    start = time.time()
 
-    while time.time() - start < timeout:
+    for _ in Poller(timeout, max_interval=interval, label=f"订单落库 {order_id}"):
         result = query_order_exist(conn, sql, (order_id,))
         if result:
             attach_text("订单已创建", result)
             return
-        time.sleep(interval)
 
     raise AssertionError(f"订单 {order_id} 在 {timeout}s 内未写入数据库")
 
@@ -32,12 +52,12 @@ def assert_order_created(
 def assert_order_count(
         conn, order_id: str, expected_count: int = 1, timeout: int = None, interval: int = 1
 ):
-    """断言订单数量在超时内等于预期值"""
+    """断言订单数量在超时内等于预期值，interval 为最大轮询间隔"""
     timeout = timeout or config.DEFAULT_TIMEOUT
     sql = "SELECT COUNT(*) as count FROM dorder_dock WHERE dock_order_no = %s"
-    start = time.time()
+    actual_count = None
 
-    while time.time() - start < timeout:
+    for _ in Poller(timeout, max_interval=interval, label=f"订单数量 {order_id}"):
         result = query_order_count(conn, sql, (order_id,))
         if result:
             if isinstance(result, dict):
@@ -51,8 +71,6 @@ def assert_order_count(
             attach_text("订单数量校验通过", f"订单 {order_id} 数量校验通过: {actual_count}")
             return
 
-        time.sleep(interval)
-
     raise AssertionError(
         f"订单 {order_id} 数量不一致: 期望 {expected_count}, 实际 {actual_count}"
     )
@@ -60,13 +78,26 @@ def assert_order_count(
 
 def assert_order_status(
         conn, order_id: str, expected_status: str, timeout: int = None, interval: int = 1,
+        watcher: Optional[DbRowWatcher] = None,
 ):
-    """断言订单状态为已退货"""
+    """断言订单状态为已退货
+
+    传入 watcher（order_status_watcher）时由共享监视器批量轮询；
+    否则按退避节奏逐单查询，interval 为最大轮询间隔。
+    """
     timeout = timeout or config.DEFAULT_TIMEOUT
+    if watcher is not None:
+        try:
+            watcher.wait(order_id, timeout, status_equals(expected_status))
+        except WatchTimeout as e:
+            raise _status_mismatch(order_id, expected_status, e) from None
+        attach_text("订单状态验证成功", f"订单 {order_id} 状态为: {expected_status}")
+        return
+
     sql = "SELECT OrderStatus FROM dorder WHERE SourceNo = %s"
-    start = time.time()
+    actual_status = None
 
-    while time.time() - start < timeout:
+    for _ in Poller(timeout, max_interval=interval, label=f"订单状态 {order_id}"):
         result = query_order_status(conn, sql, (order_id,))
         logger.info(f"轮询中.....当前订单状态为: {result}")
         if result:
@@ -81,8 +112,29 @@ def assert_order_status(
             attach_text("订单状态验证成功", f"订单 {order_id} 状态为: {actual_status}")
             return
 
-        time.sleep(interval)
-
     raise AssertionError(
         f"订单 {order_id} 期望状态： {expected_status}, 实际结果： {actual_status}"
     )
+
+
+
+async def async_assert_order_created(watcher: DbRowWatcher, order_id: str, timeout: int = None):
+    """通过共享监视器异步等待订单写入数据库"""
+    timeout = timeout or config.DEFAULT_TIMEOUT
+    try:
+        result = await watcher.async_wait(order_id, timeout)
+    except WatchTimeout:
+        raise AssertionError(f"订单 {order_id} 在 {timeout}s 内未写入数据库") from None
+    attach_text("订单已创建", result)
+
+
+async def async_assert_order_status(
+        watcher: DbRowWatcher, order_id: str, expected_status: str, timeout: int = None,
+):
+    """通过共享监视器异步等待订单状态变为 expected_status"""
+    timeout = timeout or config.DEFAULT_TIMEOUT
+    try:
+        await watcher.async_wait(order_id, timeout, status_equals(expected_status))
+    except WatchTimeout as e:
+        raise _status_mismatch(order_id, expected_status, e) from None
+    attach_text("订单状态验证成功", f"订单 {order_id} 状态为: {expected_status}")
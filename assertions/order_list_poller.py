@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""共享订单列表轮询：所有等待落库的用例共用一次列表翻页
+
+非 FAT 环境没有数据库，落库只能通过订单列表+详情接口确认。每个用例各自翻页
+会让列表接口的压力随并发用例数线性增长。这里由一个后台轮询器每个周期翻页一次，
+对新出现的内部订单拉取详情，维护全局的 外卖单号 → 内部订单编号 索引，
+唤醒所有外卖单号已出现的等待者。翻页遇到早于最早待确认推单时间的订单即停止。
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Set
+
+import httpx
+
+from api.mt_order_payload_builder import push_ctime_ms
+from api.order_api import async_pos_order_list, async_stream_pos_order_list
+from assertions.order_api_assert import (
+    _async_scan_list_stream,
+    _extract_source_nos,
+    _scan_list_page,
+    list_array_key,
+    remember_source_no_key,
+    scan_cutoff_ms,
+)
+from config import config
+from utils import timing
+from utils.async_helper import async_batch_order_details, background_loop, get_async_client
+from utils.circuit_breaker import CircuitOpenError
+from utils.logger import logger
+
+
+class OrderListPoller:
+    """按外卖单号等待订单出现在列表中，返回内部订单编号
+
+    watch() 返回 concurrent.futures.Future，同步代码用 wait()，协程用 async_wait()。
+    首次 watch 时在共享后台事件循环（utils.async_helper.background_loop）上启动轮询任务，
+    复用该循环上的共享 AsyncClient（base_url 为 None 时即 Config.get_base_url()）。
+    """
+
+    def __init__(
+        self,
+        token_id: str,
+        *,
+        base_url: Optional[str] = None,
+        order_remark: Optional[str] = None,
+        interval: Optional[float] = None,
+        max_pages: Optional[int] = None,
+        page_size: Optional[int] = None,
+        detail_concurrency: Optional[int] = None,
+        stream: Optional[bool] = None,
+    ):
+        self.token_id = token_id
+        self.base_url = base_url
+        self.order_remark = order_remark
+        self.interval = interval if interval is not None else config.ORDER_POLL_INTERVAL
+        self.max_pages = max_pages or config.ORDER_POLL_MAX_PAGES
+        self.page_size = page_size or config.ORDER_POLL_PAGE_SIZE
+        self.detail_concurrency = detail_concurrency
+        self.stream = config.ORDER_LIST_STREAM if stream is None else stream
+        # 外卖单号 → 内部订单编号
+        self.index: Dict[str, str] = {}
+        self.ticks = 0
+        self.list_calls = 0
+        self.detail_calls = 0
+        self._checked: Set[str] = set()
+        self._pending: Dict[str, List[Future]] = {}
+        # 待确认外卖单号的推单时间（毫秒），未知为 None
+        self._pushed_at: Dict[str, Optional[int]] = {}
+        self._lock = threading.RLock()
+        self._stopped = False
+        self._task: Optional[Future] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stop_event: Optional[asyncio.Event] = None
+
+    # ============ 登记与等待 ============
+
+    def watch(self, source_no: str, pushed_after_ms: Optional[int] = None) -> Future:
+        """登记外卖单号，返回在订单出现后完成的 Future（结果为内部订单编号）
+
+        pushed_after_ms 为推单 ctime，默认取本进程推单时实际发送的 ctime，用于提前结束翻页。
+        """
+        source_no = str(source_no)
+        if pushed_after_ms is None:
+            pushed_after_ms = push_ctime_ms(source_no)
+        future: Future = Future()
+        with self._lock:
+            internal_order_id = self.index.get(source_no)
+            if internal_order_id is not None:
+                future.set_result(internal_order_id)
+                return future
+            self._pending.setdefault(source_no, []).append(future)
+            self._pushed_at[source_no] = pushed_after_ms
+            self._ensure_started()
+        self._notify()
+        return future
+
+    def wait(self, source_no: str, timeout: float, pushed_after_ms: Optional[int] = None) -> str:
+        """阻塞等待，超时抛出 AssertionError"""
+        future = self.watch(source_no, pushed_after_ms)
+        started = time.perf_counter()
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise self._timeout_error(source_no, timeout) from None
+        finally:
+            timing.record_wait(time.perf_counter() - started)
+
+    async def async_wait(self, source_no: str, timeout: float,
+                         pushed_after_ms: Optional[int] = None) -> str:
+        """wait 的协程版本"""
+        future = self.watch(source_no, pushed_after_ms)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise self._timeout_error(source_no, timeout) from None
+
+    @staticmethod
+    def _timeout_error(source_no: str, timeout: float) -> AssertionError:
+        return AssertionError(
+            f"在 {timeout}s 内未通过 list/detail 找到订单；expected_source_no={source_no}")
+
+    def _has_pending(self) -> bool:
+        with self._lock:
+            for source_no in [k for k, futures in self._pending.items()
+                              if all(f.cancelled() for f in futures)]:
+                del self._pending[source_no]
+                self._pushed_at.pop(source_no, None)
+            return bool(self._pending)
+
+    def _cutoff_ms(self) -> Optional[int]:
+        """最早待确认推单对应的截止时间，有未知推单时间的等待者时不截止"""
+        with self._lock:
+            pushed = list(self._pushed_at.values())
+        if not pushed or any(p is None for p in pushed):
+            return None
+        return scan_cutoff_ms(min(pushed))
+
+    def _index_order(self, source_no: str, internal_order_id: str) -> bool:
+        """登记到索引并唤醒等待者，返回是否有等待该外卖单号的用例"""
+        with self._lock:
+            self.index[source_no] = internal_order_id
+            self._pushed_at.pop(source_no, None)
+            futures = self._pending.pop(source_no, ())
+            for future in futures:
+                try:
+                    future.set_result(internal_order_id)
+                except InvalidStateError:
+                    pass
+            return bool(futures)
+
+    def _fail_all(self, error: BaseException) -> None:
+        with self._lock:
+            for futures in self._pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+            self._pending.clear()
+            self._pushed_at.clear()
+
+    # ============ 后台轮询 ============
+
+    def _ensure_started(self) -> None:
+        # 调用方需持有锁；轮询任务启动前登记的等待者由 _run 首次检查时发现
+        if self._task is not None and not self._task.done():
+            return
+        self._stopped = False
+        self._task = background_loop.submit(self._run())
+        self._task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: Future) -> None:
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.error(f"订单列表轮询任务异常退出: {task.exception()!r}")
+        self._fail_all(task.exception())
+
+    def _notify(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _poll_once(self, client: httpx.AsyncClient) -> None:
+        self.ticks += 1
+        cutoff_ms = self._cutoff_ms()
+        for page_index in range(1, self.max_pages + 1):
+            if not self._has_pending():
+                return
+            # 详情请求失败的订单不计入 _checked，下个周期重试
+            array_key = list_array_key() if self.stream else None
+            if array_key is not None:
+                async with async_stream_pos_order_list(
+                    client,
+                    self.token_id,
+                    order_remark=self.order_remark,
+                    page_index=page_index,
+                    page_size=self.page_size,
+                    array_key=array_key,
+                ) as listing:
+                    new_order_ids, listed, exhausted, _ = await _async_scan_list_stream(
+                        listing, page_index, self._checked, cutoff_ms)
+            else:
+                list_resp = await async_pos_order_list(
+                    client,
+                    self.token_id,
+                    order_remark=self.order_remark,
+                    page_index=page_index,
+                    page_size=self.page_size,
+                )
+                new_order_ids, listed, exhausted = _scan_list_page(
+                    list_resp, page_index, self._checked, cutoff_ms)
+            self.list_calls += 1
+            for source_no, internal_order_id in listed.items():
+                self._index_order(source_no, internal_order_id)
+
+            if new_order_ids:
+                detail_results = await async_batch_order_details(
+                    self.token_id, new_order_ids, max_concurrency=self.detail_concurrency,
+                    client=client)
+                self.detail_calls += len(new_order_ids)
+                for internal_order_id, detail_resp in zip(new_order_ids, detail_results):
+                    if "error" in detail_resp:
+                        continue
+                    self._checked.add(internal_order_id)
+                    with self._lock:
+                        wanted = set(self._pending)
+                    for key, source_no in _extract_source_nos(detail_resp, wanted):
+                        if self._index_order(source_no, internal_order_id):
+                            remember_source_no_key(key)
+
+            if exhausted:
+                return
+
+    async def _run(self) -> None:
+        # 先建事件再发布 _loop：_notify 看到 _loop 时 _wakeup 一定已就绪
+        self._wakeup = asyncio.Event()
+        self._stop_event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        logger.info(f"订单列表轮询器已启动，轮询间隔 {self.interval}s，每次最多 {self.max_pages} 页")
+
+        try:
+            client = get_async_client(self.base_url)
+            while not self._stopped:
+                self._wakeup.clear()
+                if not self._has_pending():
+                    # 没有等待者时休眠到有新的登记
+                    await self._wakeup.wait()
+                    continue
+                try:
+                    await self._poll_once(client)
+                except AssertionError as e:
+                    logger.error(f"订单列表轮询失败: {e}")
+                    self._fail_all(e)
+                except CircuitOpenError as e:
+                    # 服务已熔断，等待者没有必要等到超时
+                    logger.error(f"订单列表轮询失败: {e}")
+                    self._fail_all(e)
+                except (httpx.HTTPError, ValueError) as e:
+                    logger.warning(f"订单列表轮询出错，下个周期重试: {e}")
+                except Exception as e:
+                    # 未预期的错误不能让等待者一直等到超时
+                    logger.exception(f"订单列表轮询异常: {e!r}")
+                    self._fail_all(e)
+                try:
+                    # 新的登记不打断轮询间隔，只有 stop 会提前唤醒
+                    await asyncio.wait_for(self._stop_event.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._loop = None
+
+    def stop(self) -> None:
+        """停止后台轮询，未完成的等待者全部取消"""
+        self._stopped = True
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+        self._notify()
+        if self._task is not None:
+            if not background_loop.in_loop_thread():
+                try:
+                    self._task.result(timeout=5)
+                except Exception:
+                    pass
+            self._task = None
+        with self._lock:
+            for futures in self._pending.values():
+                for future in futures:
+                    future.cancel()
+            self._pending.clear()
+            self._pushed_at.clear()
+        logger.info(
+            f"订单列表轮询器已停止，轮询周期={self.ticks}，列表请求={self.list_calls}，"
+            f"详情请求={self.detail_calls}，已索引订单={len(self.index)}")
@@ -30,6 +30,7 @@ class MtOrderContext:
     cleanup_order: Optional[list] = None
     token_id: Optional[str] = None
     internal_order_id: Optional[str] = None
+    status_watcher: Any = None
 
 
 def _is_fat_env() -> bool:
@@ -64,8 +65,14 @@ def _wait_order_persisted(
     if _is_fat_env():
         context.db_conn = request.getfixturevalue("db_conn")
         context.cleanup_order = request.getfixturevalue("cleanup_order")
+        context.status_watcher = request.getfixturevalue("status_watcher")
         with step(fat_step_title):
-            assert_order_created(context.db_conn, str(context.mt_order_id), timeout=10)
+            assert_order_created(
+                context.db_conn,
+                str(context.mt_order_id),
+                timeout=10,
+                watcher=request.getfixturevalue("persist_watcher"),
+            )
             logger.info(f"数据库已创建订单: {context.mt_order_id}")
         return context
 
@@ -76,6 +83,7 @@ def _wait_order_persisted(
             context.token_id,
             str(context.mt_order_id),
             timeout=60,
+            poller=request.getfixturevalue("order_list_poller"),
         )
         logger.info(f"接口验证订单已可查询，内部订单编号: {context.internal_order_id}")
     return context
@@ -112,6 +120,7 @@ def _assert_order_status_r4(
                 context.db_conn,
                 str(context.mt_order_id),
                 expected_status="R4",
+                watcher=context.status_watcher,
             )
             return
 
@@ -138,6 +147,7 @@ def _attach_response(step_title: str, name: str, result) -> None:
 
 @allure.epic("美团外卖业务")
 @allure.feature("订单回调")
+@pytest.mark.service("/dock/mt", "/retail-order-front")
 class TestMtPushOrder:
     """订单回调场景"""
 
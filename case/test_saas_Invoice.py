@@ -171,6 +171,7 @@ def _execute_raw_invoice_request(
 
 @allure.epic("开票业务")
 @allure.feature("品牌端开票")
+@pytest.mark.service("/hr/retail/invoice", "/retail-order-front", "/retail-pay-front")
 class TestSaasInvoice:
     # @pytest.mark.critical
     @allure.story("申请开票")
@@ -33,6 +33,7 @@ def empty_shopping_cart(client, access_token):
 
 @allure.story("支付业务")
 @allure.severity(allure.severity_level.CRITICAL)
+@pytest.mark.service("/retail-pay-front", "/retail-order-front")
 class TestSaaSPay:
     @allure.story("现金购买支付")
     def test_cash_pay(self, client, access_token):
@@ -38,7 +38,108 @@ class Config:
     # 测试设置
     DEFAULT_TIMEOUT = int(os.getenv("DEFAULT_TIMEOUT", "10"))
     RETRY_TIMES = int(os.getenv("RETRY_TIMES", "3"))
-    RETRY_INTERVAL = int(os.getenv("RETRY_INTERVAL", "1"))
+    RETRY_INTERVAL = float(os.getenv("RETRY_INTERVAL", "1"))
+    # 单次重试退避上限（秒）；重试间隔为 [0, min(上限, RETRY_INTERVAL * 2^(n-1))] 内随机
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "10"))
+    # 会话重试预算：重试次数不超过 首次请求数 × 比例 + 最少次数
+    RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+    RETRY_BUDGET_MIN = int(os.getenv("RETRY_BUDGET_MIN", "10"))
+    # 按接口覆盖重试参数（JSON，键为接口路径后缀），如 {"/order/callback": {"max_attempts": 1}}
+    RETRY_OVERRIDES = os.getenv("RETRY_OVERRIDES", "")
+
+    # 按服务前缀熔断：连续失败（传输错误/5xx）达到阈值后，冷却期内的请求直接失败
+    CIRCUIT_ENABLED = os.getenv("CIRCUIT_ENABLED", "true").lower() in ("1", "true", "yes")
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN", "30"))
+    # 多段的服务前缀（逗号分隔），其余接口按路径第一段归属服务
+    CIRCUIT_SERVICE_PREFIXES = os.getenv("CIRCUIT_SERVICE_PREFIXES", "/dock/mt,/mt/v2,/hr/retail/invoice")
+
+    # 按服务前缀的令牌桶限速（"前缀=每秒请求数[:突发]"，逗号分隔），未列出的服务按 RATE_LIMIT_DEFAULT（0 不限速）
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() in ("1", "true", "yes")
+    RATE_LIMITS = os.getenv("RATE_LIMITS", "")
+    RATE_LIMIT_DEFAULT = float(os.getenv("RATE_LIMIT_DEFAULT", "0"))
+    # 非空时桶状态保存在该文件（加文件锁），多个测试/压测进程共享同一预算
+    RATE_LIMIT_STATE_FILE = os.getenv("RATE_LIMIT_STATE_FILE", "")
+
+    # 请求录制/回放：off / record（记录真实交互）/ replay（不访问网络，从 cassette 返回响应）
+    CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+    CASSETTE_FILE = os.getenv("CASSETTE_FILE", "cassettes/session.json.gz")
+    # 由客户端生成、每次运行都会变化的字段，按出现顺序替换为占位符后参与匹配
+    CASSETTE_VOLATILE_KEYS = os.getenv(
+        "CASSETTE_VOLATILE_KEYS", "newgetTime,orderId,orderIdView,order_id,ctime,utime,timestamp,traceId")
+    # 不参与匹配且落盘前脱敏的字段（名称以 token 结尾的字段始终脱敏，无需列出）
+    CASSETTE_MASKED_KEYS = os.getenv("CASSETTE_MASKED_KEYS", "tokenId,sign,loginWord,password")
+
+    # 本地替身服务：开启后会话开始时在后台线程启动替身服务，并把 BASE_URL/UAT_URL 指向它
+    STANDIN = os.getenv("STANDIN", "false").lower() in ("1", "true", "yes")
+    # 全局响应延迟，如 5ms / uniform:5ms-50ms / exp:10ms / lognormal:median=20ms,p99=200ms
+    STANDIN_LATENCY = os.getenv("STANDIN_LATENCY", "0")
+    # 订单落库、状态变更与开票完成前的延迟（秒）
+    STANDIN_PERSIST_DELAY = float(os.getenv("STANDIN_PERSIST_DELAY", "0.5"))
+    # 故障注入（分号分隔的 "[接口后缀=]比例[:状态码|reset|hang]"），如 /Order/List=0.05:503;0.01:reset
+    STANDIN_FAULTS = os.getenv("STANDIN_FAULTS", "")
+
+    # 故障与延迟注入配置（YAML，按接口模式注入尾延迟/连接重置/5xx 突发/慢响应体），为空时关闭
+    FAULT_PROFILE = os.getenv("FAULT_PROFILE", "")
+
+    # 会话开始的健康检查：后端不可达时 skip（跳过全部用例，默认）/ abort（立即结束会话）/ off（不检查）
+    HEALTH_CHECK_MODE = os.getenv("HEALTH_CHECK_MODE", "skip").lower()
+    HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "3"))
+    # 逐个探测的服务前缀（逗号分隔），不可用时跳过标记了 @pytest.mark.service(前缀) 的用例
+    HEALTH_CHECK_SERVICES = os.getenv(
+        "HEALTH_CHECK_SERVICES", "/retail-order-front,/dock/mt,/hr/retail/invoice,/retail-pay-front")
+
+    # 轮询等待（落库/状态/开票）：首次立即检查，之后间隔从 POLL_INITIAL_INTERVAL 起按倍数增长（带抖动），不超过上限
+    POLL_INITIAL_INTERVAL = float(os.getenv("POLL_INITIAL_INTERVAL", "0.1"))
+    POLL_BACKOFF_FACTOR = float(os.getenv("POLL_BACKOFF_FACTOR", "2"))
+    POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", "2"))
+    POLL_JITTER = float(os.getenv("POLL_JITTER", "0.2"))
+
+    # HTTP 客户端（见 utils.http_client）：分项超时（秒），同步客户端连接池，HTTP/2（需安装 h2）
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", os.getenv("DEFAULT_TIMEOUT", "10")))
+    HTTP_WRITE_TIMEOUT = float(os.getenv("HTTP_WRITE_TIMEOUT", os.getenv("DEFAULT_TIMEOUT", "10")))
+    HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", os.getenv("DEFAULT_TIMEOUT", "10")))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+    # 会话开始时为同步与共享异步客户端预先建立的连接数（0 关闭）
+    HTTP_WARMUP_CONNECTIONS = int(os.getenv("HTTP_WARMUP_CONNECTIONS", "4"))
+
+    # 异步客户端连接池设置
+    ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", "200"))
+    ASYNC_MAX_KEEPALIVE = int(os.getenv("ASYNC_MAX_KEEPALIVE", "100"))
+    KEEPALIVE_EXPIRY = float(os.getenv("KEEPALIVE_EXPIRY", "30"))
+
+    # 批量详情请求的自适应并发（AIMD）：耗时低于目标时逐步提高上限，超时/429/5xx 时按比例减小；关闭时固定为初始值
+    ADAPTIVE_CONCURRENCY = os.getenv("ADAPTIVE_CONCURRENCY", "true").lower() in ("1", "true", "yes")
+    ADAPTIVE_INITIAL_LIMIT = int(os.getenv("ADAPTIVE_INITIAL_LIMIT", "10"))
+    ADAPTIVE_MIN_LIMIT = int(os.getenv("ADAPTIVE_MIN_LIMIT", "1"))
+    ADAPTIVE_MAX_LIMIT = int(os.getenv("ADAPTIVE_MAX_LIMIT", "50"))
+    ADAPTIVE_LATENCY_TARGET = float(os.getenv("ADAPTIVE_LATENCY_TARGET", "0.5"))
+    ADAPTIVE_BACKOFF = float(os.getenv("ADAPTIVE_BACKOFF", "0.5"))
+
+    # 数据库落库监视器：所有待确认订单共用一次 IN 查询
+    DB_WATCH_INTERVAL = float(os.getenv("DB_WATCH_INTERVAL", "0.5"))
+    DB_WATCH_BATCH_SIZE = int(os.getenv("DB_WATCH_BATCH_SIZE", "500"))
+
+    # 订单列表共享轮询（非 FAT 环境确认落库）
+    ORDER_POLL_INTERVAL = float(os.getenv("ORDER_POLL_INTERVAL", "1"))
+    ORDER_POLL_MAX_PAGES = int(os.getenv("ORDER_POLL_MAX_PAGES", "3"))
+    ORDER_POLL_PAGE_SIZE = int(os.getenv("ORDER_POLL_PAGE_SIZE", "20"))
+
+    # 列表扫描遇到早于推单时间的订单即停止，预留的时钟偏差（秒，负数关闭）
+    ORDER_SCAN_CLOCK_SKEW = float(os.getenv("ORDER_SCAN_CLOCK_SKEW", "300"))
+    # 服务端返回的不带时区的时间（如列表 createDate）所在时区：UTC 偏移或 IANA 名称
+    SERVER_TIMEZONE = os.getenv("SERVER_TIMEZONE", "+08:00")
+    # 流式读取订单列表，匹配到目标或越过截止时间即停止读取响应体（适合调大 pageSize）
+    ORDER_LIST_STREAM = os.getenv("ORDER_LIST_STREAM", "false").lower() in ("1", "true", "yes")
+
+    # 美团订单号分配设置
+    MT_ORDER_ID_PREFIX = os.getenv("MT_ORDER_ID_PREFIX", "53")
+    MT_ORDER_ID_WORKER = os.getenv("MT_ORDER_ID_WORKER", "")
+    # 未显式指定 worker 时租用编号的目录（为空时使用系统临时目录下的 mt_order_id_workers）
+    MT_ORDER_ID_LEASE_DIR = os.getenv("MT_ORDER_ID_LEASE_DIR", "")
 
     # 日志设置
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -47,6 +148,22 @@ class Config:
     # 测试报告设置
     ALLURE_RESULTS_DIR = "reports/allure-results"
     ALLURE_REPORT_DIR = "reports/allure-report"
+    # 会话结束时 JSON 报告的输出目录，为空时不写报告文件（Allure 附件与日志照常输出）
+    REPORT_DIR = os.getenv("REPORT_DIR", "")
+    # 以下报告文件为空时取 REPORT_DIR 下的默认文件名
+    # 各用例休眠/网络/等待/CPU 耗时拆分汇总
+    TIME_ACCOUNTING_FILE = os.getenv("TIME_ACCOUNTING_FILE", "")
+    # 各接口延迟分布（p50/p90/p99/max）
+    ENDPOINT_METRICS_FILE = os.getenv("ENDPOINT_METRICS_FILE", "")
+    # 故障注入统计（按规则）
+    FAULT_REPORT_FILE = os.getenv("FAULT_REPORT_FILE", "")
+
+    @classmethod
+    def report_file(cls, path: str, name: str) -> str:
+        """报告文件路径：显式配置的 path 优先，否则为 REPORT_DIR 下的 name，都未配置时返回空串（不写文件）"""
+        if path:
+            return path
+        return os.path.join(cls.REPORT_DIR, name) if cls.REPORT_DIR else ""
 
     @classmethod
     def get_base_url(cls) -> str:
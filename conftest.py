@@ -1,48 +1,51 @@
 import os
+from typing import Optional
 
-import httpx
 import pymysql
 import pytest
 
 from config import config
-from utils.allure_helper import attach_text, step
+from utils import timing
+from utils.allure_helper import attach_json, attach_text, step
+from utils import cassette, fault_injection
+from utils.async_helper import shutdown_async_clients, warm_up_async_client
+from utils.adaptive_limiter import limiters
+from utils.circuit_breaker import breakers
 from utils.db_helper import cleanup_test_order
+from utils.db_watcher import order_persist_watcher, order_status_watcher
+from utils.health import probe_backend
+from utils.http_client import create_client, warm_up
 from utils.logger import logger
+from utils.rate_limiter import rate_limits
+from utils.metrics import format_summary, registry as endpoint_metrics
+from utils.standin_server import StandinServer, from_config as standin_from_config
 from utils.notification import (
     NotificationSender,
     create_test_report_message,
 )
 from api.handover_api import ensure_handover_open
+from api.login_api import login
+from assertions.order_list_poller import OrderListPoller
 
 print("读取到的 BASE_URL:", os.getenv("BASE_URL"))
 @pytest.fixture(scope="session")
 def client():
-    """创建用于测试的 HTTP 客户端"""
+    """创建用于测试的 HTTP 客户端（登录、开交班与用例共用同一个连接池）
+
+    用例开始前预热同步客户端与后台事件循环上的共享 AsyncClient 的连接。
+    """
     base_url = config.get_base_url()
-    with httpx.Client(base_url=base_url, timeout=config.DEFAULT_TIMEOUT) as c:
+    with create_client(base_url) as c:
         attach_text("接口基础地址", base_url)
+        warm_up(c)
+        warm_up_async_client()
         yield c
 
 
 @pytest.fixture(scope="session")
-def access_token():
+def access_token(client):
     """创建用于测试的访问令牌"""
-    with httpx.Client(timeout=config.DEFAULT_TIMEOUT) as c:
-        resp = c.post(
-            config.get_base_url() + "/reabam-manage-login/user/login",
-            json={
-                "mobile": "19977958582",
-                "loginType": "checkstand",
-                "appType": "pc",
-                "appVersion": "1.6.2.1",
-                "loginWord": "e10adc3949ba59abbe56e057f20f883e",
-                "clientVersion": "25091901",
-                "systemVersion": "2512.29.34",
-                "companyId": ""
-            },
-        )
-        assert resp.status_code == 200, "获取访问令牌失败"
-        return resp.json()["data"].get("tokenId")
+    return login(client)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -73,6 +76,18 @@ def ensure_handover(client, access_token):
 
         yield result
 
+@pytest.fixture(scope="session", autouse=True)
+def endpoint_metrics_report():
+    """会话结束时输出各接口延迟分布：Allure 附件 + JSON 文件"""
+    yield
+    path = config.report_file(config.ENDPOINT_METRICS_FILE, "endpoint_metrics.json")
+    summary = endpoint_metrics.write(path)
+    if summary:
+        attach_json("接口延迟分布", summary)
+        attach_text("接口延迟分布（文本）", format_summary(summary))
+        logger.info(f"接口延迟分布{f'已写入 {path}' if path else ''}\n{format_summary(summary)}")
+
+
 @pytest.fixture(scope="session")
 def db_conn():
     """创建用于测试的数据库连接"""
@@ -90,6 +105,30 @@ def db_conn():
     conn.close()
 
 
+@pytest.fixture(scope="session")
+def persist_watcher(db_conn):
+    """共享的落库监视器：所有等待落库的订单合并为每周期一次 IN 查询"""
+    watcher = order_persist_watcher()
+    yield watcher
+    watcher.stop()
+
+
+@pytest.fixture(scope="session")
+def status_watcher(db_conn):
+    """共享的订单状态监视器"""
+    watcher = order_status_watcher()
+    yield watcher
+    watcher.stop()
+
+
+@pytest.fixture(scope="session")
+def order_list_poller(access_token):
+    """共享的订单列表轮询器：非 FAT 环境所有等待落库的用例共用一次列表翻页"""
+    poller = OrderListPoller(access_token)
+    yield poller
+    poller.stop()
+
+
 @pytest.fixture(scope="function")
 def cleanup_order(db_conn):
     """收集已创建的订单用于清理"""
@@ -114,6 +153,25 @@ def pytest_runtest_logreport(report):
         logger.error(str(getattr(report, "longrepr", report)))
 
 
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """按用例记录休眠/网络/等待/CPU 耗时（含 setup 与 teardown），并切换 cassette 的用例归属"""
+    timing.begin(item.nodeid)
+    cassette.set_scope(item.nodeid)
+    yield
+    cassette.set_scope(None)
+    timing.end()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """用例主体结束后把截至此刻的耗时拆分附加到 Allure"""
+    yield
+    account = timing.current()
+    if account is not None:
+        attach_json("耗时拆分（休眠/网络/等待/CPU）", account.to_dict())
+
+
 # def pytest_terminal_summary(terminalreporter):
 #     """发送测试汇总通知"""
 #     passed = len(terminalreporter.stats.get("passed", []))
@@ -152,9 +210,58 @@ def pytest_runtest_logreport(report):
 #             logger.error(f"[失败] {ntype} 通知发送失败")
 
 
+# 需要访问后端的 fixture，健康检查只针对依赖它们的用例
+_BACKEND_FIXTURES = frozenset({"client", "access_token"})
+
+
+def pytest_collection_modifyitems(session, items):
+    """收集完成后探测一次后端：不可达时按 HEALTH_CHECK_MODE 结束会话或跳过全部用例，
+    单个服务不可用时熔断该服务并跳过依赖它的用例
+
+    只针对用到 client / access_token 的用例，tests/ 下的离线测试不受影响。
+    """
+    items = [item for item in items if _BACKEND_FIXTURES & set(getattr(item, "fixturenames", ()))]
+    if config.HEALTH_CHECK_MODE == "off" or session.config.option.collectonly or not items:
+        return
+    if config.CASSETTE_MODE == cassette.MODE_REPLAY:
+        return
+    services = [p.strip() for p in config.HEALTH_CHECK_SERVICES.split(",") if p.strip()]
+    report = probe_backend(config.get_base_url(), services, timeout=config.HEALTH_CHECK_TIMEOUT)
+
+    if not report.reachable:
+        reason = f"健康检查失败，后端 {report.base_url} 不可达: {report.error}"
+        if config.HEALTH_CHECK_MODE == "abort":
+            pytest.exit(reason, returncode=pytest.ExitCode.INTERRUPTED)
+        for item in items:
+            item.add_marker(pytest.mark.skip(reason=reason))
+        return
+
+    unavailable = report.unavailable_services
+    for prefix, reason in unavailable.items():
+        breakers.get(prefix).trip(f"健康检查: {reason}")
+    if not unavailable:
+        return
+    for item in items:
+        down = [prefix for marker in item.iter_markers("service") for prefix in marker.args
+                if prefix in unavailable]
+        if down:
+            item.add_marker(pytest.mark.skip(
+                reason=f"依赖的服务不可用: {', '.join(f'{p}（{unavailable[p]}）' for p in down)}"))
+
+
+_standin: Optional[StandinServer] = None
+
+
 @pytest.hookimpl(tryfirst=True)
 def pytest_configure():
-    """写入 Allure 环境属性"""
+    """STANDIN 开启时启动本地替身服务并指向它，写入 Allure 环境属性"""
+    global _standin
+    if config.STANDIN and _standin is None:
+        _standin = standin_from_config(config)
+        base_url = _standin.start_in_thread()
+        config.__class__.BASE_URL_FAT = config.__class__.BASE_URL_UAT = base_url
+        logger.info(f"用例指向本地替身服务: {base_url}")
+
     allure_dir = config.ALLURE_RESULTS_DIR
     if not os.path.exists(allure_dir):
         os.makedirs(allure_dir)
@@ -171,5 +278,38 @@ def pytest_configure():
         f.write(f"PYTHON_VERSION={os.sys.version}\n")
 
 
+def pytest_unconfigure():
+    """停止本地替身服务"""
+    global _standin
+    if _standin is not None:
+        _standin.stop_thread()
+        _standin = None
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """会话结束时关闭共享的异步客户端连接池，写入 cassette，输出故障注入统计、熔断、自适应并发与限速等待情况、耗时拆分汇总"""
+    shutdown_async_clients()
+    cassette.finish()
+    fault_injection.finish()
+
+    tripped = {prefix: state for prefix, state in breakers.summary().items() if state["trips"]}
+    if tripped:
+        logger.warning(f"本次会话发生熔断的服务: {tripped}")
+    for endpoint, state in limiters.summary().items():
+        logger.info(f"自适应并发 {endpoint}: {state}")
+    for prefix, state in rate_limits.summary().items():
+        logger.info(f"限速等待 {prefix}: 次数={state['waits']} 累计={state['wait_s']}s")
+
+    path = config.report_file(config.TIME_ACCOUNTING_FILE, "time_accounting.json")
+    summary = timing.write_summary(path)
+    totals = summary["totals"]
+    logger.info(
+        f"耗时拆分汇总{f'（{path}）' if path else ''}: 用例={totals['tests']}，墙钟={totals['wall_s']}s，"
+        f"休眠={totals['sleep_s']}s，网络={totals['network_s']}s，等待={totals['wait_s']}s，CPU={totals['cpu_s']}s"
+    )
+    for test in summary["tests"][:5]:
+        logger.info(f"休眠最多: {test['test']} 休眠={test['sleep_s']}s / 墙钟={test['wall_s']}s")
+
+
 if __name__ == '__main__':
     print(access_token())
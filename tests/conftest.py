@@ -0,0 +1,19 @@
+"""工具模块的离线测试：不访问 FAT/UAT，需要 HTTP 服务时使用本地替身服务"""
+import pytest
+
+from utils.standin_server import StandinServer
+
+
+@pytest.fixture(scope="session", autouse=True)
+def ensure_handover():
+    """覆盖根目录的开交班检查：离线测试不登录真实后端"""
+    yield True
+
+
+@pytest.fixture
+def standin():
+    """每个用例独立的替身服务（随机端口，后台线程运行）"""
+    server = StandinServer(persist_delay=0.05)
+    server.start_in_thread()
+    yield server
+    server.stop_thread()
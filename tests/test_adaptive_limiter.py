@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import allure
+import httpx
+import pytest
+
+from utils.adaptive_limiter import AdaptiveLimiter, is_congestion
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://standin/detail")
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request,
+                                 response=httpx.Response(status, request=request))
+
+
+def _limiter(**kwargs) -> AdaptiveLimiter:
+    params = dict(initial=4, min_limit=1, max_limit=20, latency_target=1.0, backoff=0.5)
+    params.update(kwargs)
+    return AdaptiveLimiter("/test/detail", **params)
+
+
+@allure.epic("测试工具")
+@allure.feature("自适应并发（AIMD）")
+class TestAdaptiveLimiter:
+
+    def test_congestion_classification(self):
+        assert is_congestion(httpx.ReadTimeout("timeout"))
+        assert is_congestion(_status_error(429))
+        assert is_congestion(_status_error(503))
+        assert not is_congestion(_status_error(404))
+        assert not is_congestion(ValueError("bad json"))
+
+    def test_additive_increase_on_fast_success(self):
+        limiter = _limiter()
+        for _ in range(40):
+            limiter.in_flight += 1
+            limiter.release(time.monotonic(), congested=False)
+        assert limiter.limit > 4
+        assert limiter.limit <= 20
+
+    def test_slow_success_does_not_increase(self):
+        limiter = _limiter(latency_target=0.01)
+        for _ in range(10):
+            limiter.in_flight += 1
+            limiter.release(time.monotonic() - 1, congested=False)
+        assert limiter.limit == 4
+
+    def test_multiplicative_decrease_once_per_window(self):
+        limiter = _limiter(initial=16)
+        acquired_at = time.monotonic()
+        for _ in range(5):
+            limiter.in_flight += 1
+            limiter.release(acquired_at, congested=True)
+        # 同一批请求（减小前发出）再失败不重复减小
+        assert limiter.limit == 8
+        assert limiter.decreases == 1
+
+        limiter.in_flight += 1
+        limiter.release(time.monotonic(), congested=True)
+        assert limiter.limit == 4
+
+    def test_limit_never_below_min(self):
+        limiter = _limiter(initial=2, min_limit=2)
+        limiter.in_flight += 1
+        limiter.release(time.monotonic(), congested=True)
+        assert limiter.limit == 2
+
+    def test_concurrency_capped_by_limit(self):
+        limiter = _limiter(initial=3, max_limit=3)
+        peak = 0
+        running = 0
+
+        async def _task():
+            nonlocal peak, running
+            async with limiter.attempt():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        async def _main():
+            await asyncio.gather(*(_task() for _ in range(12)))
+
+        asyncio.run(_main())
+        assert peak == 3
+        assert limiter.in_flight == 0
+        assert limiter.successes == 12
+
+    def test_congestion_error_shrinks_and_propagates(self):
+        limiter = _limiter(initial=8)
+
+        async def _main():
+            async with limiter.attempt():
+                raise _status_error(503)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(_main())
+        assert limiter.limit == 4
+        assert limiter.in_flight == 0
@@ -0,0 +1,58 @@
+import json
+
+import allure
+import httpx
+import pytest
+
+from api.base import ApiResponse
+
+
+def _response(content: bytes, status_code: int = 200) -> ApiResponse:
+    request = httpx.Request("POST", "http://standin/order/detail")
+    return ApiResponse(httpx.Response(status_code, content=content, request=request))
+
+
+@allure.epic("测试工具")
+@allure.feature("响应 JSON 缓存")
+class TestApiResponse:
+
+    def test_json_parsed_once_and_shared(self, monkeypatch):
+        response = _response(json.dumps({"code": 200, "success": True, "data": {"orderId": "a"}}).encode())
+        calls = []
+        original = httpx.Response.json
+
+        def _counting_json(self, **kwargs):
+            calls.append(self)
+            return original(self, **kwargs)
+
+        monkeypatch.setattr(httpx.Response, "json", _counting_json)
+        body = response.json()
+        assert response.json() is body
+        assert response.code == "200"
+        assert response.success is True
+        assert response.data_dict == {"orderId": "a"}
+        assert len(calls) == 1
+
+    def test_invalid_body_not_cached(self):
+        response = _response(b"<html>502</html>", status_code=502)
+        for _ in range(2):
+            with pytest.raises(json.JSONDecodeError):
+                response.json()
+        assert response._parsed is False
+
+    def test_passthrough_and_defaults(self):
+        response = _response(json.dumps({"msg": "ok", "DataLine": [{"a": 1}]}).encode())
+        assert response.status_code == 200
+        assert response.raw.request.url.path == "/order/detail"
+        assert response.text.startswith("{")
+        assert response.code is None
+        assert response.success is None
+        assert response.msg == "ok"
+        assert response.data_dict == {}
+        assert response.data_line == [{"a": 1}]
+
+    def test_non_dict_body(self):
+        response = _response(b"[1, 2]")
+        assert response.json() == [1, 2]
+        assert response.data is None
+        assert response.data_line == []
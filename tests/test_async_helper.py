@@ -0,0 +1,66 @@
+import asyncio
+
+import allure
+import httpx
+
+from utils.async_helper import as_completed_requests
+from utils.circuit_breaker import breakers
+from utils.metrics import registry as metrics
+from utils.retry_policy import RetryPolicy
+
+PATH = "/batch-test/item"
+
+
+def _run_batch(handler, n: int = 3):
+    async def _batch():
+        async with httpx.AsyncClient(base_url="http://standin", transport=httpx.MockTransport(handler)) as client:
+            items = [(PATH, {"i": i}) for i in range(n)]
+            results = [{} for _ in items]
+            policy = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0, overrides={})
+            async for index, result in as_completed_requests(
+                    items, retry_policy=policy, client=client):
+                results[index] = result
+            return results
+
+    return asyncio.run(_batch())
+
+
+@allure.epic("测试工具")
+@allure.feature("异步批量请求")
+class TestAsyncBatch:
+
+    def setup_method(self):
+        metrics.reset()
+        breakers.reset()
+
+    def teardown_method(self):
+        breakers.reset()
+
+    def test_attempts_are_recorded_like_async_safe_post(self):
+        calls = []
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            # 每个请求第一次返回 503，重试后成功
+            if len(calls) <= 3:
+                return httpx.Response(503)
+            return httpx.Response(200, json={"code": "200", "ok": True})
+
+        results = _run_batch(_handler)
+        assert results == [{"code": "200", "ok": True}] * 3
+        summary = metrics.summary()[PATH]
+        assert summary["count"] == len(calls) == 6
+        assert summary["status"] == {"503": 3, "200": 3}
+
+    def test_open_circuit_rejects_without_sending(self):
+        breakers.get(PATH).trip("测试")
+        calls = []
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            return httpx.Response(200, json={})
+
+        results = _run_batch(_handler)
+        assert calls == []
+        assert all("已熔断" in result["error"] for result in results)
+
@@ -0,0 +1,91 @@
+import gzip
+
+import allure
+import httpx
+import pytest
+
+from api.Invoice_api import build_none_order_invoice_payload, execute_apply_invoice, query_invoice_status
+from api.login_api import login
+from api.mt_order_callback import mt_push_order_callback
+from api.order_api import pos_order_list
+from utils.cassette import (
+    MODE_RECORD,
+    Cassette,
+    CassetteMissError,
+    CassetteTransport,
+)
+
+
+def _run_flow(client: httpx.Client):
+    """登录、推单（订单号每次重新生成）、查订单列表"""
+    token_id = login(client)
+    result, mt_order_id = mt_push_order_callback(client)
+    listing = pos_order_list(client, token_id, page_index=1, page_size=5)
+    return token_id, result, mt_order_id, listing
+
+
+def _run_invoice_flow(client: httpx.Client):
+    """登录、无订单开票、轮询开票详情（请求体中带 {"id": ..., "token": 登录令牌}）"""
+    token_id = login(client)
+    invoice_id, _ = execute_apply_invoice(client, build_none_order_invoice_payload(token_id),
+                                          token_id=token_id, return_response=True)
+    return token_id, query_invoice_status(client, invoice_id, token_id=token_id, timeout=5)
+
+
+def _interaction_count(cassette: Cassette) -> int:
+    return sum(len(entries) for by_fingerprint in cassette.interactions.values()
+               for entries in by_fingerprint.values())
+
+
+@allure.epic("测试工具")
+@allure.feature("请求录制/回放")
+class TestCassette:
+
+    def test_record_then_replay_offline(self, standin, tmp_path):
+        path = str(tmp_path / "session.json.gz")
+        recording = Cassette(path, MODE_RECORD)
+        with httpx.Client(base_url=standin.base_url,
+                          transport=CassetteTransport(recording, httpx.HTTPTransport())) as client:
+            _, recorded_result, _, recorded_listing = _run_flow(client)
+        recording.save()
+
+        replaying = Cassette.load(path)
+        # 回放不访问网络：base_url 指向不存在的地址
+        with httpx.Client(base_url="http://replay.invalid",
+                          transport=CassetteTransport(replaying)) as client:
+            _, result, _, listing = _run_flow(client)
+
+        assert replaying.misses == 0
+        assert replaying.hits == _interaction_count(recording)
+        assert result == recorded_result
+        assert listing["code"] == recorded_listing["code"]
+
+    def test_token_fields_masked_and_replayed(self, standin, tmp_path):
+        """名称以 token 结尾的字段脱敏落盘，回放时换了登录令牌也能命中"""
+        path = str(tmp_path / "invoice.json.gz")
+        recording = Cassette(path, MODE_RECORD)
+        with httpx.Client(base_url=standin.base_url,
+                          transport=CassetteTransport(recording, httpx.HTTPTransport())) as client:
+            token_id, status = _run_invoice_flow(client)
+        recording.save()
+        assert status == "INVOICED"
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert token_id not in f.read()
+
+        replaying = Cassette.load(path)
+        with httpx.Client(base_url="http://replay.invalid",
+                          transport=CassetteTransport(replaying)) as client:
+            _, replayed_status = _run_invoice_flow(client)
+        assert replayed_status == "INVOICED"
+        assert replaying.misses == 0
+
+    def test_unrecorded_request_misses(self, tmp_path):
+        path = str(tmp_path / "empty.json.gz")
+        Cassette(path, MODE_RECORD).save()
+        replaying = Cassette.load(path)
+        with httpx.Client(base_url="http://replay.invalid",
+                          transport=CassetteTransport(replaying)) as client:
+            with pytest.raises(CassetteMissError):
+                login(client)
+        assert replaying.misses == 1
@@ -0,0 +1,158 @@
+import asyncio
+
+import allure
+import httpx
+import pytest
+
+from api.base import async_safe_post, safe_post, safe_stream_post
+from config import config
+from utils.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    breakers,
+    is_failure,
+    service_prefix,
+)
+from utils.retry_policy import RetryPolicy
+
+ENDPOINT = "/breaker-test/item"
+
+
+def _response(status: int) -> httpx.Response:
+    return httpx.Response(status, request=httpx.Request("POST", "http://standin/x"))
+
+
+@allure.epic("测试工具")
+@allure.feature("熔断器")
+class TestCircuitBreaker:
+
+    def test_service_prefix(self):
+        assert service_prefix("/dock/mt/v2/order/callback") == "/dock/mt"
+        assert service_prefix("/retail-order-front/app/Business/Order/List?newgetTime=1") == "/retail-order-front"
+        assert service_prefix("http://host/hr/retail/invoice/apply") == "/hr/retail/invoice"
+
+    def test_failure_classification(self):
+        assert is_failure(response=_response(503))
+        assert not is_failure(response=_response(404))
+        assert is_failure(httpx.ConnectError("refused"))
+        assert not is_failure(RuntimeError("业务错误"))
+
+    def test_opens_after_threshold_and_rejects(self):
+        breaker = CircuitBreaker("/svc", failure_threshold=3, cooldown=60)
+        for _ in range(2):
+            breaker.record(response=_response(502))
+        assert breaker.state == STATE_CLOSED
+        breaker.record(httpx.ConnectError("refused"))
+        assert breaker.state == STATE_OPEN
+
+        with pytest.raises(CircuitOpenError) as excinfo:
+            breaker.before_call()
+        assert excinfo.value.prefix == "/svc"
+        assert breaker.rejected == 1
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker("/svc", failure_threshold=2, cooldown=60)
+        breaker.record(response=_response(503))
+        breaker.record(response=_response(400))
+        breaker.record(response=_response(503))
+        assert breaker.state == STATE_CLOSED
+
+    def test_half_open_allows_single_trial(self):
+        breaker = CircuitBreaker("/svc", failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+
+        assert breaker.before_call() is True
+        assert breaker.state == STATE_HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == STATE_CLOSED
+        assert breaker.before_call() is False
+
+    def test_released_trial_can_be_retried(self):
+        breaker = CircuitBreaker("/svc", failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+        assert breaker.before_call() is True
+        breaker.release_trial()
+        assert breaker.state == STATE_HALF_OPEN
+        assert breaker.before_call() is True
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker("/svc", failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+        assert breaker.trips == 2
+
+
+@pytest.fixture
+def half_open(monkeypatch):
+    """把 ENDPOINT 所属服务的熔断器置为冷却已结束的断开状态"""
+    monkeypatch.setattr(config.__class__, "CIRCUIT_ENABLED", True)
+    monkeypatch.setattr(config.__class__, "CIRCUIT_COOLDOWN", 0)
+    breakers.reset()
+    breakers.get(ENDPOINT).trip("测试")
+    yield breakers.get(ENDPOINT)
+    breakers.reset()
+
+
+def _client(handler) -> httpx.Client:
+    return httpx.Client(base_url="http://standin", transport=httpx.MockTransport(handler))
+
+
+def _replay_miss(request: httpx.Request) -> httpx.Response:
+    # 与回放缺失一样抛出非 httpx.HTTPError 的异常
+    raise LookupError("cassette 中没有该请求")
+
+
+def _ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"code": "200"})
+
+
+NO_RETRY = RetryPolicy(max_attempts=1, overrides={})
+
+
+@allure.epic("测试工具")
+@allure.feature("熔断器")
+class TestTrialRelease:
+
+    def test_sync_trial_released_on_unexpected_error(self, half_open):
+        with _client(_replay_miss) as client, pytest.raises(LookupError):
+            safe_post(client, ENDPOINT, retry_policy=NO_RETRY)
+        assert half_open.state == STATE_HALF_OPEN
+
+        with _client(_ok) as client:
+            assert safe_post(client, ENDPOINT, retry_policy=NO_RETRY).code == "200"
+        assert half_open.state == STATE_CLOSED
+
+    def test_async_trial_released_on_unexpected_error(self, half_open):
+        async def _post(handler):
+            async with httpx.AsyncClient(base_url="http://standin", transport=httpx.MockTransport(handler)) as client:
+                return await async_safe_post(client, ENDPOINT, retry_policy=NO_RETRY)
+
+        with pytest.raises(LookupError):
+            asyncio.run(_post(_replay_miss))
+        assert asyncio.run(_post(_ok)).code == "200"
+        assert half_open.state == STATE_CLOSED
+
+    def test_stream_trial_released_on_unexpected_error(self, half_open):
+        with _client(_replay_miss) as client, pytest.raises(LookupError):
+            with safe_stream_post(client, ENDPOINT):
+                pass
+        with _client(_ok) as client:
+            with safe_stream_post(client, ENDPOINT) as response:
+                assert response.status_code == 200
+        assert half_open.state == STATE_CLOSED
+
+    def test_rate_limit_error_releases_trial(self, half_open, monkeypatch):
+        monkeypatch.setattr(config.__class__, "RATE_LIMIT_ENABLED", True)
+        monkeypatch.setattr(config.__class__, "RATE_LIMITS", "/breaker-test=bad")
+        with _client(_ok) as client, pytest.raises(ValueError):
+            safe_post(client, ENDPOINT, retry_policy=NO_RETRY)
+        assert half_open.before_call() is True
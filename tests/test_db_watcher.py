@@ -0,0 +1,83 @@
+import threading
+
+import allure
+import pymysql
+import pytest
+
+from utils import db_watcher
+from utils.db_watcher import DbRowWatcher, WatchTimeout, status_equals
+
+
+class _FakeTable:
+    """按键返回行的假表，记录每次 IN 查询的键"""
+
+    def __init__(self):
+        self.rows = {}
+        self.queries = []
+        self.error = None
+        self.lock = threading.Lock()
+
+    def query(self, conn, table, key_column, columns, keys):
+        with self.lock:
+            self.queries.append(list(keys))
+            error, self.error = self.error, None
+            if error is not None:
+                raise error
+            return [dict(self.rows[key]) for key in keys if key in self.rows]
+
+
+@pytest.fixture
+def table(monkeypatch):
+    fake = _FakeTable()
+    monkeypatch.setattr(db_watcher, "query_rows_by_keys", fake.query)
+    monkeypatch.setattr(DbRowWatcher, "_connect", lambda self: object())
+    monkeypatch.setattr(DbRowWatcher, "_close_connection", lambda self: None)
+    return fake
+
+
+@pytest.fixture
+def watcher(table):
+    watcher = DbRowWatcher("dorder", "SourceNo", ("OrderStatus",), db_config={}, interval=0.01, batch_size=2)
+    yield watcher
+    watcher.stop()
+
+
+@allure.epic("测试工具")
+@allure.feature("数据库批量监视")
+class TestDbRowWatcher:
+
+    def test_pending_keys_share_batched_queries(self, table, watcher):
+        keys = [f"5300{i}" for i in range(5)]
+        futures = [watcher.watch(key) for key in keys]
+        for key in keys:
+            table.rows[key] = {"SourceNo": key, "OrderStatus": 2}
+        assert [f.result(timeout=5)["SourceNo"] for f in futures] == keys
+        # 每个周期按 batch_size 分批 IN 查询，而不是每个键一次查询
+        assert all(len(batch) <= 2 for batch in table.queries)
+        assert watcher.queries <= watcher.ticks * 3
+        assert watcher.resolved == 5
+        assert watcher.pending_count == 0
+
+    def test_predicate_keeps_waiting(self, table, watcher):
+        table.rows["53001"] = {"SourceNo": "53001", "OrderStatus": 2}
+        future = watcher.watch("53001", status_equals("4"))
+        with pytest.raises(WatchTimeout) as excinfo:
+            watcher.wait("53001", 0.1, status_equals("4"))
+        assert excinfo.value.last_row == {"SourceNo": "53001", "OrderStatus": 2}
+        table.rows["53001"] = {"SourceNo": "53001", "OrderStatus": 4}
+        assert future.result(timeout=5)["OrderStatus"] == 4
+
+    def test_db_error_retries_next_tick(self, table, watcher):
+        table.error = pymysql.OperationalError(2013, "Lost connection")
+        table.rows["53002"] = {"SourceNo": "53002", "OrderStatus": 2}
+        assert watcher.wait("53002", 5)["SourceNo"] == "53002"
+
+    def test_unexpected_error_fails_waiters_and_keeps_serving(self, table, watcher):
+        table.error = KeyError("SourceNo")
+        future = watcher.watch("53003")
+        with pytest.raises(KeyError):
+            future.result(timeout=5)
+
+        # 监视线程仍在，之后的登记照常完成
+        table.rows["53004"] = {"SourceNo": "53004", "OrderStatus": 2}
+        assert watcher.wait("53004", 5)["SourceNo"] == "53004"
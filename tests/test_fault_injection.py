@@ -0,0 +1,93 @@
+import random
+
+import allure
+import httpx
+import pytest
+
+from utils.fault_injection import FaultInjector, FaultRule, FaultTransport
+from utils.latency import LatencyDistribution
+
+LIST_PATH = "/retail-order-front/app/Business/Order/List"
+
+
+def _echo(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"code": "200", "data": "x" * 200})
+
+
+def _client(rules, seed=1, timeout=5.0) -> httpx.Client:
+    injector = FaultInjector([FaultRule(rule) for rule in rules], seed=seed)
+    return httpx.Client(base_url="http://standin", timeout=timeout,
+                        transport=FaultTransport(injector, httpx.MockTransport(_echo)))
+
+
+def _statuses(client: httpx.Client, n: int):
+    return [client.post(LIST_PATH).status_code for _ in range(n)]
+
+
+@allure.epic("测试工具")
+@allure.feature("故障与延迟注入")
+class TestFaultInjection:
+
+    def test_rule_matching(self):
+        assert FaultRule({"match": "/Order/List"}).matches(LIST_PATH)
+        assert not FaultRule({"match": "/Order/List"}).matches(LIST_PATH + "/x")
+        assert FaultRule({"match": "/retail-order-front/*"}).matches(LIST_PATH)
+        with pytest.raises(ValueError):
+            FaultRule({"latency": "5ms"})
+
+    def test_burst_of_errors(self):
+        with _client([{"match": "/Order/List", "error": 1.0, "status": 503, "burst": 3}]) as client:
+            assert _statuses(client, 3) == [503, 503, 503]
+        rule_stats = client._transport.injector.summary()["/Order/List"]
+        assert rule_stats["errors"] == 3
+
+    def test_same_seed_same_decisions(self):
+        rules = [{"match": "/Order/List", "error": 0.3, "status": 502, "burst": 2}]
+        with _client(rules, seed=42) as first, _client(rules, seed=42) as second:
+            assert _statuses(first, 50) == _statuses(second, 50)
+
+    def test_same_seed_same_latencies(self):
+        """注入的延迟与慢响应体分块间隔同样由种子决定"""
+        rules = [{"match": "/Order/List", "latency": "lognormal:median=20ms,p99=200ms",
+                  "slow_body": {"rate": 1.0, "chunk_delay": "uniform:1ms-50ms"}}]
+        request = httpx.Request("POST", "http://standin" + LIST_PATH)
+
+        def _delays(seed):
+            injector = FaultInjector([FaultRule(rule) for rule in rules], seed=seed)
+            plans = [injector.plan(request) for _ in range(20)]
+            return [plan.delay for plan in plans], [injector.chunk_delay(plans[0].rule) for _ in range(20)]
+
+        random.seed(0)
+        first = _delays(7)
+        random.seed(1)
+        assert _delays(7) == first
+        assert _delays(8) != first
+
+    def test_latency_distribution_parse_and_sample(self):
+        assert LatencyDistribution.parse("5ms").sample() == 0.005
+        uniform = LatencyDistribution.parse("uniform:5ms-50ms")
+        assert all(0.005 <= uniform.sample(random.Random(i)) <= 0.05 for i in range(50))
+        lognormal = LatencyDistribution.parse("lognormal:median=20ms,p99=200ms")
+        assert lognormal.sample(random.Random(3)) == lognormal.sample(random.Random(3))
+        with pytest.raises(ValueError):
+            LatencyDistribution.parse("lognormal:median=20ms,p99=10ms")
+
+    def test_unmatched_requests_pass_through(self):
+        with _client([{"match": "/invoice/*", "error": 1.0}]) as client:
+            assert _statuses(client, 5) == [200] * 5
+
+    def test_reset_raises_read_error(self):
+        with _client([{"match": "/Order/List", "reset": 1.0}]) as client:
+            with pytest.raises(httpx.ReadError):
+                client.post(LIST_PATH)
+
+    def test_latency_beyond_read_timeout_times_out(self):
+        with _client([{"match": "/Order/List", "latency": "200ms"}], timeout=0.05) as client:
+            with pytest.raises(httpx.ReadTimeout):
+                client.post(LIST_PATH)
+
+    def test_slow_body_delivers_full_content(self):
+        rules = [{"match": "/Order/List", "slow_body": {"rate": 1.0, "chunk_size": 32, "chunk_delay": "1ms"}}]
+        with _client(rules) as client:
+            response = client.post(LIST_PATH)
+        assert response.json()["data"] == "x" * 200
@@ -0,0 +1,72 @@
+import os
+
+import allure
+import pytest
+
+from utils.file_loader import YamlTemplateStore, load_yaml_data, load_yaml_section
+
+
+def _write(path, text: str, mtime_ns: int) -> None:
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "template.yaml"
+    _write(path, "order:\n  status: 2\n  items: [a, b]\n", 1_000_000_000_000_000_000)
+    return path
+
+
+@allure.epic("测试工具")
+@allure.feature("YAML 模板缓存")
+class TestYamlTemplateStore:
+
+    def test_parsed_once_and_copies_are_independent(self, template):
+        store = YamlTemplateStore()
+        first = store.load(template)
+        first["order"]["items"].append("c")
+        assert store.load(template) == {"order": {"status": 2, "items": ["a", "b"]}}
+        assert store._get_entry(template) is store._get_entry(template)
+
+        section = store.section(template, "order")
+        section["status"] = 9
+        assert store.section(template, "order")["status"] == 2
+        assert store.section(template, "missing") is None
+
+    def test_mtime_change_invalidates(self, template):
+        store = YamlTemplateStore()
+        entry = store._get_entry(template)
+        assert store.section(template, "order")["status"] == 2
+
+        # 内容长度不变，只有 mtime 变化也要重新解析
+        _write(template, "order:\n  status: 3\n  items: [a, b]\n", 1_000_000_001_000_000_000)
+        assert store.section(template, "order")["status"] == 3
+        assert store._get_entry(template) is not entry
+
+    def test_size_change_invalidates(self, template):
+        store = YamlTemplateStore()
+        assert store.load(template)["order"]["status"] == 2
+        _write(template, "order:\n  status: 30\n", 1_000_000_000_000_000_000)
+        assert store.load(template) == {"order": {"status": 30}}
+
+    def test_compiled_follows_file_version(self, template):
+        store = YamlTemplateStore()
+        calls = []
+
+        def _factory(data):
+            calls.append(data)
+            return tuple(data["order"]["items"])
+
+        assert store.compiled(template, _factory) == ("a", "b")
+        assert store.compiled(template, _factory) == ("a", "b")
+        assert len(calls) == 1
+        _write(template, "order:\n  items: [c]\n", 1_000_000_002_000_000_000)
+        assert store.compiled(template, _factory) == ("c",)
+        assert len(calls) == 2
+
+    def test_missing_or_invalid_file_returns_none(self, tmp_path):
+        assert load_yaml_data(tmp_path / "missing.yaml") is None
+        broken = tmp_path / "broken.yaml"
+        broken.write_text("order: [unclosed\n", encoding="utf-8")
+        assert load_yaml_section(broken, "order") is None
@@ -0,0 +1,56 @@
+import random
+
+import allure
+import pytest
+
+from utils.histogram import LatencyHistogram
+
+
+def _exact_percentile(values, percent):
+    ordered = sorted(values)
+    index = max(1, int(len(ordered) * percent / 100.0 + 0.5)) - 1
+    return ordered[index]
+
+
+@allure.epic("测试工具")
+@allure.feature("延迟直方图")
+class TestLatencyHistogram:
+
+    @pytest.mark.parametrize("percent", [50, 90, 99, 99.9])
+    def test_percentile_within_relative_error(self, percent):
+        """百分位与精确排序结果的相对误差不超过分桶精度（sub_bits=8 时 < 0.8%）"""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(-4, 1) for _ in range(20000)]
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+
+        exact = _exact_percentile(values, percent)
+        assert histogram.percentile(percent) == pytest.approx(exact, rel=1 / 128, abs=1e-6)
+
+    def test_min_max_exact_and_empty(self):
+        histogram = LatencyHistogram()
+        assert histogram.percentile(50) is None
+        assert histogram.summary()["count"] == 0
+
+        for value in (0.0123, 0.5, 0.0001):
+            histogram.record(value)
+        assert histogram.min == 0.0001
+        assert histogram.max == 0.5
+        assert histogram.percentile(100) == 0.5
+
+    def test_merge_equals_single_histogram(self):
+        rng = random.Random(3)
+        values = [rng.expovariate(50) for _ in range(5000)]
+        whole, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for index, value in enumerate(values):
+            whole.record(value)
+            (left if index % 2 else right).record(value)
+
+        left.merge(right)
+        assert left.count == whole.count
+        assert left.summary() == whole.summary()
+
+    def test_merge_rejects_different_layout(self):
+        with pytest.raises(ValueError):
+            LatencyHistogram(sub_bits=8).merge(LatencyHistogram(sub_bits=6))
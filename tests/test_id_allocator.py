@@ -0,0 +1,103 @@
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import allure
+import pytest
+
+from config import config
+from utils.id_allocator import SnowflakeIdAllocator, lease_worker_id, resolve_worker_id
+
+
+@allure.epic("测试工具")
+@allure.feature("订单号分配")
+class TestSnowflakeIdAllocator:
+
+    def test_ids_increase_and_fit_int64(self):
+        allocator = SnowflakeIdAllocator(prefix="53", worker_id=5)
+        ids = allocator.allocate(5000)
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+        assert all(str(order_id).startswith("53") for order_id in ids)
+        assert max(ids) <= 2 ** 63 - 1
+
+    def test_timestamp_roundtrip(self):
+        allocator = SnowflakeIdAllocator(prefix="53", worker_id=1)
+        before = int(time.time() * 1000)
+        order_id = allocator.next_id()
+        after = int(time.time() * 1000)
+        # 序列号用尽时会借用下一毫秒
+        assert before <= allocator.timestamp_ms_of(order_id) <= after + 1
+        assert allocator.timestamp_ms_of("99" + str(order_id)[2:]) is None
+
+    def test_clock_rollback_stays_monotonic(self, monkeypatch):
+        allocator = SnowflakeIdAllocator(prefix="53", worker_id=1)
+        first = allocator.next_id()
+        monkeypatch.setattr(allocator, "_current_timestamp", lambda: allocator._last_timestamp - 1000)
+        assert allocator.next_id() > first
+
+    def test_rejects_invalid_prefix(self):
+        with pytest.raises(ValueError):
+            SnowflakeIdAllocator(prefix="5a")
+        with pytest.raises(ValueError):
+            SnowflakeIdAllocator(prefix="999")
+
+    def test_unique_across_threads(self):
+        allocator = SnowflakeIdAllocator(prefix="53", worker_id=7)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            batches = list(executor.map(lambda _: [allocator.next_id() for _ in range(2000)], range(8)))
+        ids = [order_id for batch in batches for order_id in batch]
+        assert len(set(ids)) == len(ids) == 16000
+        assert all(batch == sorted(batch) for batch in batches)
+
+    def test_unique_across_workers_in_same_millisecond(self, monkeypatch):
+        """两个 worker 在同一时钟下（含序列号用尽借用下一毫秒）生成的订单号互不相同"""
+        first = SnowflakeIdAllocator(prefix="53", worker_id=1)
+        second = SnowflakeIdAllocator(prefix="53", worker_id=2)
+        frozen = first._current_timestamp()
+        for allocator in (first, second):
+            monkeypatch.setattr(allocator, "_current_timestamp", lambda: frozen)
+        ids_first = set(first.allocate(3000))
+        ids_second = set(second.allocate(3000))
+        assert len(ids_first) == len(ids_second) == 3000
+        assert not ids_first & ids_second
+
+    def test_leases_are_distinct_and_exhaust_with_error(self, tmp_path):
+        leased = [lease_worker_id(3, str(tmp_path)) for _ in range(8)]
+        assert sorted(leased) == list(range(8))
+        with pytest.raises(ValueError, match="均已被占用"):
+            lease_worker_id(3, str(tmp_path))
+
+    def test_leases_distinct_across_processes(self, tmp_path):
+        """多个进程同时租用时编号互不相同；进程退出后编号自动释放"""
+        script = (
+            "import sys, time; from utils.id_allocator import lease_worker_id; "
+            f"print(lease_worker_id(8, {str(tmp_path)!r}), flush=True); time.sleep(1)"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        children = [subprocess.Popen([sys.executable, "-c", script], cwd=root, stdout=subprocess.PIPE, text=True)
+                    for _ in range(4)]
+        leased = [int(child.stdout.readline()) for child in children]
+        for child in children:
+            child.communicate(timeout=30)
+        assert sorted(leased) == [0, 1, 2, 3]
+        assert lease_worker_id(8, str(tmp_path)) == 0
+
+    def test_default_allocator_leases_without_explicit_worker(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(config.__class__, "MT_ORDER_ID_WORKER", "")
+        monkeypatch.setattr(config.__class__, "MT_ORDER_ID_LEASE_DIR", str(tmp_path))
+        first = SnowflakeIdAllocator(prefix="53")
+        second = SnowflakeIdAllocator(prefix="53")
+        assert {first.worker_id, second.worker_id} == {0, 1}
+        assert (tmp_path / "worker-0.lock").exists()
+
+    def test_worker_out_of_range_fails_fast(self, monkeypatch):
+        with pytest.raises(ValueError):
+            SnowflakeIdAllocator(prefix="53", worker_id=256)
+        monkeypatch.setattr(config.__class__, "MT_ORDER_ID_WORKER", "300")
+        with pytest.raises(ValueError):
+            resolve_worker_id(8)
+        monkeypatch.setattr(config.__class__, "MT_ORDER_ID_WORKER", "12")
+        assert SnowflakeIdAllocator(prefix="53").worker_id == 12
@@ -0,0 +1,89 @@
+import json
+
+import allure
+import pytest
+
+from utils.json_stream import JsonArrayStream, JsonKeyStream
+
+DOCUMENT = {
+    "code": "200",
+    "data": {
+        "pageIndex": 1,
+        "content": [
+            {"orderId": 1001, "remark": "含 \"引号\" 与 ] 的备注", "amount": 12.5},
+            {"orderId": 1002, "remark": "中文", "tags": [1, 2, {"k": None}]},
+            {"orderId": 1003, "remark": "", "amount": -3e2},
+        ],
+        "total": 3,
+    },
+    "dockOrderNo": "53000000000000001",
+}
+
+
+def _chunks(text: str, size: int):
+    data = text.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@allure.epic("测试工具")
+@allure.feature("增量 JSON 解析")
+class TestJsonStream:
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 100000])
+    def test_array_stream_matches_json_loads(self, chunk_size):
+        """任意切块方式（含多字节字符被切开）产出的元素与整体解析一致"""
+        text = json.dumps(DOCUMENT, ensure_ascii=False)
+        items = list(JsonArrayStream("content", _chunks(text, chunk_size)))
+        assert items == DOCUMENT["data"]["content"]
+
+    def test_array_stream_without_array_keeps_document(self):
+        stream = JsonArrayStream("content")
+        body = {"code": "500", "msg": "失败"}
+        assert stream.feed(json.dumps(body).encode()) == []
+        assert stream.close() == []
+        assert stream.document == body
+
+    def test_array_stream_truncated_raises(self):
+        text = json.dumps(DOCUMENT, ensure_ascii=False)
+        stream = JsonArrayStream("content")
+        stream.feed(text[:text.index("1003")].encode("utf-8"))
+        with pytest.raises(ValueError):
+            stream.close()
+
+    def test_array_stream_can_stop_early(self):
+        text = json.dumps(DOCUMENT, ensure_ascii=False)
+        stream = JsonArrayStream("content")
+        first = []
+        for chunk in _chunks(text, 16):
+            first.extend(stream.feed(chunk))
+            if first:
+                break
+        assert first[0]["orderId"] == 1001
+        assert stream.bytes_read < len(text.encode("utf-8"))
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 1000])
+    def test_key_stream_finds_scalars(self, chunk_size):
+        text = json.dumps(DOCUMENT, ensure_ascii=False)
+        found = list(JsonKeyStream(["dockOrderNo", "total", "k"], _chunks(text, chunk_size)))
+        assert found == [("total", 3), ("dockOrderNo", "53000000000000001")]
+
+    def test_large_item_decoded_once(self):
+        """大元素切成很多小块时，到齐前不尝试解码"""
+        item = {"orderId": 1, "goods": [{"name": "商品\\\"%d" % i, "sku": {"id": i}} for i in range(200)]}
+        text = json.dumps({"data": {"content": [item, item]}}, ensure_ascii=False)
+        stream = JsonArrayStream("content")
+        calls = []
+        raw_decode = stream._json.raw_decode
+        stream._json.raw_decode = lambda *args: calls.append(args[1]) or raw_decode(*args)
+        items = []
+        for chunk in _chunks(text, 3):
+            items.extend(stream.feed(chunk))
+        items.extend(stream.close())
+        assert items == [item, item]
+        assert len(calls) == 2
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 9])
+    def test_array_start_split_across_chunks(self, chunk_size):
+        """数组起点被切开，或同名键先以非数组出现时仍能定位"""
+        text = '{"content": {"x": 1}, "data": {"content"  :  [{"a": "]"}, 2]}}'
+        assert list(JsonArrayStream("content", _chunks(text, chunk_size))) == [{"a": "]"}, 2]
@@ -0,0 +1,77 @@
+import allure
+import pytest
+
+from api.order_api import ORDER_DETAIL_ENDPOINT
+from assertions import order_api_assert
+from assertions.order_api_assert import _detail_matches_source_no, _extract_source_nos
+from utils.key_path import EACH, KeyPathExtractor
+
+CONTEXT = "/detail"
+
+
+@pytest.fixture
+def source_no_paths(monkeypatch):
+    """隔离详情接口已学到的外卖单号路径"""
+    extractor = KeyPathExtractor(order_api_assert._SOURCE_NO_KEYS)
+    monkeypatch.setattr(order_api_assert, "_SOURCE_NO_PATHS", extractor)
+    monkeypatch.setattr(order_api_assert, "_source_no_key", None)
+    return extractor
+
+
+@allure.epic("测试工具")
+@allure.feature("字段路径学习")
+class TestKeyPathExtractor:
+
+    def test_learns_paths_and_resolves_lists(self):
+        extractor = KeyPathExtractor(("orderId",))
+        doc = {"data": {"list": [{"orderId": "a"}, {"orderId": "b", "sub": {"orderId": "c"}}]}}
+        assert [value for _, value, _ in extractor.extract(doc, CONTEXT)] == ["a", "b", "c"]
+        assert extractor.misses == 1
+        assert set(extractor.learned_paths(CONTEXT)) == {
+            ("data", "list", EACH, "orderId"),
+            ("data", "list", EACH, "sub", "orderId"),
+        }
+
+        doc = {"data": {"list": [{"orderId": "d"}]}}
+        assert [value for _, value, _ in extractor.extract(doc, CONTEXT)] == ["d"]
+        assert extractor.hits == 1
+
+    def test_missing_learned_path_falls_back_to_walk(self):
+        extractor = KeyPathExtractor(("orderId",))
+        extractor.extract({"data": {"orderId": "a"}}, CONTEXT)
+        assert extractor.extract({"result": {"orderId": "b"}}, CONTEXT)[0][1] == "b"
+        assert extractor.misses == 2
+        assert ("result", "orderId") in extractor.learned_paths(CONTEXT)
+
+    def test_unaccepted_values_fall_back_to_walk(self):
+        extractor = KeyPathExtractor(("sourceNo", "platformOrderId"))
+        extractor.extract({"data": {"sourceNo": ""}}, CONTEXT)
+        doc = {"data": {"sourceNo": "POS1", "dock": {"platformOrderId": "5301"}}}
+
+        # 已学路径有值，不传 accept 时直接返回
+        assert [value for _, value, _ in extractor.extract(doc, CONTEXT)] == ["POS1"]
+        matches = extractor.extract(doc, CONTEXT, lambda match: match[1] == "5301")
+        assert [value for _, value, _ in matches] == ["POS1", "5301"]
+        assert ("data", "dock", "platformOrderId") in extractor.learned_paths(CONTEXT)
+
+        # 新路径已学到，之后按路径直接命中
+        hits = extractor.hits
+        extractor.extract(doc, CONTEXT, lambda match: match[1] == "5301")
+        assert extractor.hits == hits + 1
+
+
+@allure.epic("测试工具")
+@allure.feature("字段路径学习")
+class TestDetailSourceNo:
+
+    def test_detail_shape_change_still_matches(self, source_no_paths):
+        assert _detail_matches_source_no({"data": {"sourceNo": "", "orderId": "x"}}, "5301") == (False, None)
+        detail = {"data": {"sourceNo": "POS1", "dock": {"platformOrderId": "5301"}}}
+        assert _detail_matches_source_no(detail, "5301") == (True, "platformOrderId")
+        assert order_api_assert._source_no_key == "platformOrderId"
+        assert ("data", "dock", "platformOrderId") in source_no_paths.learned_paths(ORDER_DETAIL_ENDPOINT)
+
+    def test_poller_extraction_finds_wanted_on_new_path(self, source_no_paths):
+        _extract_source_nos({"data": {"sourceNo": "POS0"}}, {"5301"})
+        detail = {"data": {"sourceNo": "POS1", "dock": {"platformOrderId": 5301}}}
+        assert ("platformOrderId", "5301") in _extract_source_nos(detail, {"5301"})
@@ -0,0 +1,48 @@
+import argparse
+import json
+
+import allure
+import pytest
+
+from api import loadgen
+
+
+@allure.epic("测试工具")
+@allure.feature("开环压测")
+class TestLoadgen:
+
+    def test_parse_rate_and_duration(self):
+        assert loadgen.parse_rate("200/s") == 200
+        assert loadgen.parse_rate("6000/m") == 100
+        assert loadgen.parse_duration("500ms") == 0.5
+        assert loadgen.parse_duration("2m") == 120
+        with pytest.raises(argparse.ArgumentTypeError):
+            loadgen.parse_rate("0/s")
+        with pytest.raises(argparse.ArgumentTypeError):
+            loadgen.parse_duration("soon")
+
+    def test_push_smoke_against_standin(self, tmp_path):
+        """对本地替身服务推单 1 秒：请求全部完成且成功，报告包含延迟分布"""
+        output = tmp_path / "push.json"
+        loadgen.main(["push", "--rate", "40/s", "--duration", "1s", "--standin",
+                      "--output", str(output)])
+        report = json.loads(output.read_text(encoding="utf-8"))
+
+        assert report["scheduled"] == 40
+        assert report["completed"] == 40
+        assert report["outcomes"] == {"ok": 40}
+        assert report["latency"]["count"] == 40
+        assert report["latency"]["p99_ms"] >= report["latency"]["p50_ms"] > 0
+
+    def test_lifecycle_smoke_against_standin(self, tmp_path):
+        """闭环生命周期：推单 → 落库 → 取消/退款 → 状态变更，全部订单完成"""
+        output = tmp_path / "lifecycle.json"
+        loadgen.main(["lifecycle", "--orders", "4", "--concurrency", "2", "--standin",
+                      "--standin-persist-delay", "50ms", "--poll-interval", "50ms",
+                      "--wait-timeout", "20", "--output", str(output)])
+        report = json.loads(output.read_text(encoding="utf-8"))
+
+        assert report["orders"] == report["completed"] == 4
+        assert report["outcomes"] == {"completed": 4}
+        assert sum(report["actions"].values()) == 4
+        assert report["stages"]["total"]["count"] == 4
@@ -0,0 +1,75 @@
+import copy
+import json
+
+import allure
+import pytest
+
+from api import mt_order_payload_builder
+from api.mt_order_payload_builder import build_mt_push_payload, push_ctime_ms
+
+RAW_DATA = {
+    "reconciliation_extras": {"remark": "含 \"引号\"、反斜杠 \\ 与换行\n", "nested": {"a": [1, None, True]}},
+    "poi_receive_detail": {"foodAmount": 12.5, "wmPoiReceiveCent": 1250, "logistics": None},
+    "order_core_params": {
+        "ctime": 0,
+        "orderId": 0,
+        "wmPoiName": "测试门店</script>",
+        "recipientAddress": "北京市   朝阳区",
+        "caution": None,
+        "status": 2,
+        "extra": {"emoji": "🍜", "tabs": "a\tb", "deep": {"x": {"y": "z"}}},
+    },
+    "detail_list": [{"food_name": "牛肉面", "price": 10, "spec": "大/辣", "box_num": 1.0}],
+    "extras_list": [{"act_detail_id": None, "remark": "满减 \\u4e2d"}],
+    "orderCancel_list": {"reason": "不参与推单模板"},
+}
+
+
+def _expected_order(raw_data, mt_order_id, ctime_ms) -> str:
+    """不用模板、直接按字段逐一 json.dumps 构建的 order 字段"""
+    def dumps(value):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    poi_receive_detail = copy.deepcopy(raw_data["poi_receive_detail"])
+    poi_receive_detail["reconciliationExtras"] = dumps(raw_data["reconciliation_extras"])
+    order = copy.deepcopy(raw_data["order_core_params"])
+    order.update(ctime=ctime_ms, utime=ctime_ms, orderId=mt_order_id, orderIdView=mt_order_id)
+    order["detail"] = dumps(raw_data["detail_list"])
+    order["extras"] = dumps(raw_data["extras_list"])
+    order["poiReceiveDetail"] = dumps(poi_receive_detail)
+    return dumps(order)
+
+
+@allure.epic("测试工具")
+@allure.feature("推单请求体构建")
+class TestMtPushPayload:
+
+    @pytest.mark.parametrize("mt_order_id", [53000000000000001, "53000000000000002"])
+    def test_matches_plain_json_dumps(self, mt_order_id):
+        payload, returned_id = build_mt_push_payload(RAW_DATA, mt_order_id)
+        assert returned_id == mt_order_id
+        assert payload["order"] == _expected_order(RAW_DATA, mt_order_id, push_ctime_ms(mt_order_id))
+        assert json.loads(payload["order"])["wmPoiName"] == "测试门店</script>"
+
+    def test_compiled_template_is_cached_by_identity(self):
+        first = mt_order_payload_builder._compiled_push_template(RAW_DATA)
+        assert mt_order_payload_builder._compiled_push_template(RAW_DATA) is first
+        assert mt_order_payload_builder._compiled_push_template(copy.deepcopy(RAW_DATA)) is not first
+
+        # 替换配置段后重新编译
+        changed = dict(RAW_DATA)
+        changed["order_core_params"] = dict(RAW_DATA["order_core_params"], status="2")
+        assert mt_order_payload_builder._compiled_push_template(changed) is not first
+        payload, mt_order_id = build_mt_push_payload(changed, "53000000000000003")
+        assert payload["order"] == _expected_order(changed, mt_order_id, push_ctime_ms(mt_order_id))
+
+        changed["order_core_params"] = dict(changed["order_core_params"], status="3")
+        payload, mt_order_id = build_mt_push_payload(changed, "53000000000000004")
+        assert json.loads(payload["order"])["status"] == "3"
+
+    def test_missing_section_raises(self):
+        broken = {key: value for key, value in RAW_DATA.items() if key != "detail_list"}
+        with pytest.raises(KeyError):
+            build_mt_push_payload(broken, "53000000000000006")
+        with pytest.raises(ValueError):
+            build_mt_push_payload({}, "53000000000000005")
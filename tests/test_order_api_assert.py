@@ -0,0 +1,73 @@
+import asyncio
+
+import allure
+import httpx
+import pytest
+
+from api.login_api import login
+from api.mt_order_callback import mt_push_order_callback
+from assertions.order_api_assert import (
+    assert_order_persisted_via_list_detail,
+    assert_order_status_via_detail,
+    async_assert_order_persisted_via_list_detail,
+    async_assert_order_status_via_detail,
+)
+from config import config
+from utils.async_helper import close_async_client, run_async
+from utils.standin_server import STATUS_CREATED
+
+
+@pytest.fixture
+def pushed(standin, monkeypatch):
+    """在替身服务上推一单，返回 (base_url, token_id, 美团订单号)
+
+    同步断言在后台事件循环上并发拉详情，使用按 Config.get_base_url() 创建的共享客户端，
+    这里让它指向替身服务，前后都关闭后台循环上的共享客户端。
+    """
+    monkeypatch.setattr(config.__class__, "BASE_URL_FAT", standin.base_url)
+    monkeypatch.setattr(config.__class__, "BASE_URL_UAT", standin.base_url)
+    run_async(close_async_client())
+    with httpx.Client(base_url=standin.base_url) as client:
+        token_id = login(client)
+        result, mt_order_id = mt_push_order_callback(client)
+    assert result == "OK"
+    yield standin.base_url, token_id, str(mt_order_id)
+    run_async(close_async_client())
+
+
+@allure.epic("测试工具")
+@allure.feature("list/detail 落库断言")
+class TestListDetailAssertions:
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_sync_and_async_find_the_same_order(self, pushed, stream):
+        base_url, token_id, mt_order_id = pushed
+        with httpx.Client(base_url=base_url) as client:
+            # 流式读取需先按普通方式学到列表数组键名
+            internal_order_id = assert_order_persisted_via_list_detail(
+                client, token_id, mt_order_id, timeout=10, interval=0.05)
+            assert assert_order_persisted_via_list_detail(
+                client, token_id, mt_order_id, timeout=10, interval=0.05, stream=stream) == internal_order_id
+            assert assert_order_status_via_detail(
+                client, token_id, internal_order_id, STATUS_CREATED, timeout=10, interval=0.05) == STATUS_CREATED
+
+        async def _async_checks():
+            async with httpx.AsyncClient(base_url=base_url) as client:
+                found = await async_assert_order_persisted_via_list_detail(
+                    client, token_id, mt_order_id, timeout=10, interval=0.05, stream=stream)
+                status = await async_assert_order_status_via_detail(
+                    client, token_id, found, STATUS_CREATED, timeout=10, interval=0.05)
+                return found, status
+
+        assert asyncio.run(_async_checks()) == (internal_order_id, STATUS_CREATED)
+
+    def test_timeouts_report_expected_values(self, pushed):
+        base_url, token_id, mt_order_id = pushed
+        with httpx.Client(base_url=base_url) as client:
+            with pytest.raises(AssertionError, match="expected_source_no=53000000000000999"):
+                assert_order_persisted_via_list_detail(
+                    client, token_id, "53000000000000999", timeout=0.3, interval=0.05, max_pages=1)
+            internal_order_id = assert_order_persisted_via_list_detail(
+                client, token_id, mt_order_id, timeout=10, interval=0.05)
+            with pytest.raises(AssertionError, match=f"未变为 R9，当前状态={STATUS_CREATED}"):
+                assert_order_status_via_detail(client, token_id, internal_order_id, "R9", timeout=0.3, interval=0.05)
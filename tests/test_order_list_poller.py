@@ -0,0 +1,40 @@
+import allure
+import httpx
+import pytest
+
+from api.login_api import login
+from api.mt_order_callback import mt_push_order_callback
+from assertions.order_list_poller import OrderListPoller
+
+
+@allure.epic("测试工具")
+@allure.feature("共享订单列表轮询")
+class TestOrderListPoller:
+
+    def test_finds_pushed_order_on_background_loop(self, standin):
+        with httpx.Client(base_url=standin.base_url) as client:
+            token_id = login(client)
+            result, mt_order_id = mt_push_order_callback(client)
+        assert result == "OK"
+
+        poller = OrderListPoller(token_id, base_url=standin.base_url, interval=0.05)
+        try:
+            internal_order_id = poller.wait(str(mt_order_id), timeout=10)
+        finally:
+            poller.stop()
+        assert internal_order_id
+        assert poller.index[str(mt_order_id)] == internal_order_id
+
+    def test_unexpected_error_fails_waiters(self, monkeypatch):
+        """轮询中的未预期异常直接传给等待者，不必等到超时"""
+        poller = OrderListPoller("token", base_url="http://poller.invalid", interval=0.05)
+
+        async def _broken_poll(client):
+            raise RuntimeError("列表解析失败")
+
+        monkeypatch.setattr(poller, "_poll_once", _broken_poll)
+        try:
+            with pytest.raises(RuntimeError, match="列表解析失败"):
+                poller.wait("53000000000000001", timeout=5)
+        finally:
+            poller.stop()
@@ -0,0 +1,73 @@
+import json
+import time
+
+import allure
+import pytest
+
+from api.mt_order_callback import load_push_template
+from api.mt_order_payload_builder import push_ctime_ms
+from assertions import order_api_assert
+from assertions.order_api_assert import _ListPageScan, _parse_time_ms, remember_source_no_key
+from config import config
+
+
+@pytest.fixture
+def known_key(monkeypatch):
+    """隔离已学到的美团订单号字段"""
+    monkeypatch.setattr(order_api_assert, "_source_no_key", None)
+    return remember_source_no_key
+
+
+@allure.epic("测试工具")
+@allure.feature("订单列表扫描")
+class TestListPageScan:
+
+    def test_unknown_field_falls_back_to_detail(self, known_key):
+        """未确认承载美团订单号的字段前，列表项上的单号字段不作为匹配或排除依据"""
+        seen = set()
+        scan = _ListPageScan(1, seen, stop_source_no="530001")
+        assert not scan.add("a", {"orderIdView": "530001"})
+        assert not scan.add("b", {"outOrderNo": "999"})
+        assert scan.finish() == (["a", "b"], {}, False)
+        assert seen == set()
+
+    def test_other_field_falls_back_to_detail(self, known_key):
+        known_key("SourceNo")
+        seen = set()
+        scan = _ListPageScan(1, seen, stop_source_no="530001")
+        assert not scan.add("a", {"orderIdView": "530001"})
+        assert scan.detail_ids == ["a"]
+        assert seen == set()
+
+    def test_known_field_matches_and_rules_out(self, known_key):
+        known_key("SourceNo")
+        seen = set()
+        scan = _ListPageScan(1, seen, stop_source_no="530001")
+        assert not scan.add("a", {"SourceNo": 530002})
+        assert scan.add("b", {"SourceNo": "530001"})
+        assert scan.finish() == ([], {"530002": "a", "530001": "b"}, False)
+        assert seen == {"a", "b"}
+
+
+@allure.epic("测试工具")
+@allure.feature("订单列表扫描")
+class TestScanCutoff:
+
+    def test_push_ctime_is_the_sent_ctime(self):
+        payload, mt_order_id = load_push_template().render()
+        assert push_ctime_ms(mt_order_id) == json.loads(payload["order"])["ctime"]
+        assert push_ctime_ms("manual-order-id") is None
+
+    @pytest.mark.parametrize("zone", ["+08:00", "UTC+8", "Asia/Shanghai"])
+    def test_datetime_parsed_in_server_timezone(self, monkeypatch, zone):
+        monkeypatch.setattr(config.__class__, "SERVER_TIMEZONE", zone)
+        # 2026-01-01 08:00:00 +08:00 == 2026-01-01 00:00:00 UTC，与本机时区无关
+        assert _parse_time_ms("2026-01-01 08:00:00") == 1767225600000
+        assert _parse_time_ms("2026-01-01T00:00:00+00:00") == 1767225600000
+
+    def test_epoch_values(self):
+        now_ms = int(time.time() * 1000)
+        assert _parse_time_ms(now_ms) == now_ms
+        assert _parse_time_ms(str(now_ms // 1000)) == now_ms // 1000 * 1000
+        assert _parse_time_ms(True) is None
+        assert _parse_time_ms("昨天") is None
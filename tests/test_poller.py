@@ -0,0 +1,70 @@
+import asyncio
+from itertools import islice
+
+import allure
+import pytest
+
+from utils import poller as poller_module
+from utils.poller import Poller
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """用假时钟替代 monotonic 与休眠，返回记录的休眠时长"""
+    now = [100.0]
+    sleeps = []
+
+    def _sleep(seconds, site):
+        sleeps.append(round(seconds, 6))
+        now[0] += seconds
+
+    async def _async_sleep(seconds, site):
+        _sleep(seconds, site)
+
+    monkeypatch.setattr(poller_module.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(poller_module.timing, "sleep", _sleep)
+    monkeypatch.setattr(poller_module.timing, "async_sleep", _async_sleep)
+    return sleeps
+
+
+@allure.epic("测试工具")
+@allure.feature("退避轮询")
+class TestPoller:
+
+    def test_delays_grow_to_cap(self):
+        poller = Poller(10, initial=0.1, factor=2, max_interval=0.5, jitter=0)
+        assert [round(d, 6) for d in islice(poller.delays(), 5)] == [0.1, 0.2, 0.4, 0.5, 0.5]
+
+    def test_jitter_stays_within_bounds(self):
+        poller = Poller(10, initial=0.2, factor=1, max_interval=0.25, jitter=0.5)
+        for delay in islice(poller.delays(), 200):
+            assert 0.1 <= delay <= 0.25
+
+    def test_schedule_ends_exactly_at_deadline(self, fake_clock):
+        poller = Poller(1.0, initial=0.1, factor=2, max_interval=0.4, jitter=0)
+        assert list(poller) == [1, 2, 3, 4, 5]
+        # 第一次立即检查，最后一次休眠裁剪到截止时刻
+        assert fake_clock == [0.1, 0.2, 0.4, 0.3]
+        assert poller.stats.succeeded is False
+        assert poller.stats.slept == pytest.approx(1.0)
+
+    def test_break_counts_as_success(self, fake_clock):
+        poller = Poller(5, initial=0.1, factor=2, jitter=0)
+        for attempt in poller:
+            if attempt == 3:
+                break
+        assert fake_clock == [0.1, 0.2]
+        assert poller.stats.polls == 3
+        assert poller.stats.succeeded is True
+
+    def test_max_attempts(self, fake_clock):
+        poller = Poller(60, initial=0.1, factor=1, jitter=0, max_attempts=3)
+        assert list(poller) == [1, 2, 3]
+        assert fake_clock == [0.1, 0.1]
+
+    def test_async_schedule_matches_sync(self, fake_clock):
+        async def _collect():
+            return [attempt async for attempt in Poller(1.0, initial=0.1, factor=2, max_interval=0.4, jitter=0)]
+
+        assert asyncio.run(_collect()) == [1, 2, 3, 4, 5]
+        assert fake_clock == [0.1, 0.2, 0.4, 0.3]
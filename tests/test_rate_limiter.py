@@ -0,0 +1,62 @@
+import allure
+import pytest
+
+from config import config
+from utils.rate_limiter import RateLimiter, _FileStore, _LocalStore, _take, fcntl, parse_rate_limits
+
+
+@allure.epic("测试工具")
+@allure.feature("令牌桶限速")
+class TestRateLimiter:
+
+    def test_parse_rate_limits(self):
+        assert parse_rate_limits("/retail-order-front=50, /dock/mt/=100:200") == {
+            "/retail-order-front": (50.0, 50.0),
+            "/dock/mt": (100.0, 200.0),
+        }
+        assert parse_rate_limits("") == {}
+        with pytest.raises(ValueError):
+            parse_rate_limits("/dock/mt")
+
+    def test_bucket_refill_and_reservation(self):
+        # 突发 2：前两个令牌立即可用，第三个预约到 1/rate 秒之后
+        state, wait = _take(None, rate=10, burst=2, now=100.0)
+        assert wait == 0
+        state, wait = _take(state, rate=10, burst=2, now=100.0)
+        assert wait == 0
+        state, wait = _take(state, rate=10, burst=2, now=100.0)
+        assert wait == pytest.approx(0.1)
+        state, wait = _take(state, rate=10, burst=2, now=100.0)
+        assert wait == pytest.approx(0.2)
+        # 空闲足够久后令牌补满但不超过突发容量
+        state, wait = _take(state, rate=10, burst=2, now=200.0)
+        assert wait == 0
+        assert state[0] == pytest.approx(1.0)
+
+    def test_local_store_is_per_prefix(self):
+        store = _LocalStore()
+        assert store.take("/a", 1, 1) == 0
+        assert store.take("/b", 1, 1) == 0
+        assert store.take("/a", 1, 1) > 0
+
+    @pytest.mark.skipif(fcntl is None, reason="当前平台不支持 fcntl")
+    def test_file_store_shares_budget(self, tmp_path):
+        path = str(tmp_path / "rate_limit.json")
+        first, second = _FileStore(path), _FileStore(path)
+        assert first.take("/dock/mt", 1, 1) == 0
+        assert second.take("/dock/mt", 1, 1) > 0.5
+
+    def test_limiter_respects_config(self, monkeypatch):
+        monkeypatch.setattr(config.__class__, "RATE_LIMIT_ENABLED", True)
+        monkeypatch.setattr(config.__class__, "RATE_LIMITS", "/dock/mt=1:1")
+        monkeypatch.setattr(config.__class__, "RATE_LIMIT_DEFAULT", 0.0)
+        monkeypatch.setattr(config.__class__, "RATE_LIMIT_STATE_FILE", "")
+        limiter = RateLimiter()
+
+        assert limiter.reserve("/dock/mt/v2/order/callback") == 0
+        assert limiter.reserve("/dock/mt/v2/order/callback") > 0
+        assert limiter.reserve("/retail-order-front/app/Business/Order/List") == 0
+        assert limiter.summary()["/dock/mt"]["waits"] == 1
+
+        monkeypatch.setattr(config.__class__, "RATE_LIMIT_ENABLED", False)
+        assert limiter.reserve("/dock/mt/v2/order/callback") == 0
@@ -0,0 +1,31 @@
+import json
+
+import allure
+
+from config import config
+from utils import timing
+from utils.metrics import MetricsRegistry
+
+
+@allure.epic("测试工具")
+@allure.feature("会话报告")
+class TestReportFiles:
+
+    def test_report_file_requires_configuration(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(config.__class__, "REPORT_DIR", "")
+        assert config.report_file("", "endpoint_metrics.json") == ""
+        assert config.report_file("out/metrics.json", "endpoint_metrics.json") == "out/metrics.json"
+        monkeypatch.setattr(config.__class__, "REPORT_DIR", str(tmp_path))
+        assert config.report_file("", "endpoint_metrics.json") == str(tmp_path / "endpoint_metrics.json")
+
+    def test_writers_skip_empty_path(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        registry = MetricsRegistry()
+        registry.record("/dock/mt/order", 0.01, status=200)
+        assert registry.write("")["/dock/mt/order"]["count"] == 1
+        assert "totals" in timing.write_summary("")
+        assert list(tmp_path.iterdir()) == []
+
+        path = tmp_path / "reports" / "endpoint_metrics.json"
+        registry.write(str(path))
+        assert json.loads(path.read_text(encoding="utf-8"))["/dock/mt/order"]["count"] == 1
@@ -0,0 +1,88 @@
+import asyncio
+
+import allure
+import httpx
+import pytest
+
+from utils.retry_policy import RetryBudget, RetryPolicy, is_retryable
+
+ENDPOINT = "/retail-order-front/app/Business/Order/List"
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://standin" + ENDPOINT)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request,
+                                 response=httpx.Response(status, request=request))
+
+
+class _Flaky:
+    """前 failures 次调用抛出 error，之后返回 ok"""
+
+    def __init__(self, error: Exception, failures: int):
+        self.error = error
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+    async def acall(self):
+        return self()
+
+
+def _policy(max_attempts=3, **kwargs) -> RetryPolicy:
+    return RetryPolicy(max_attempts=max_attempts, base_delay=0, max_delay=0, overrides={}, **kwargs)
+
+
+@allure.epic("测试工具")
+@allure.feature("重试策略")
+class TestRetryPolicy:
+
+    def test_retryable_errors(self):
+        assert is_retryable(_status_error(503))
+        assert is_retryable(httpx.ReadTimeout("timeout"))
+        assert not is_retryable(_status_error(500))
+        assert not is_retryable(_status_error(404))
+        assert not is_retryable(httpx.ConnectError("refused"))
+
+    def test_retries_until_success(self):
+        flaky = _Flaky(_status_error(503), failures=2)
+        assert _policy().call(ENDPOINT, flaky) == "ok"
+        assert flaky.calls == 3
+
+    def test_gives_up_after_max_attempts(self):
+        flaky = _Flaky(_status_error(502), failures=10)
+        with pytest.raises(httpx.HTTPStatusError):
+            _policy(max_attempts=2).call(ENDPOINT, flaky)
+        assert flaky.calls == 2
+
+    def test_non_retryable_raises_immediately(self):
+        flaky = _Flaky(_status_error(400), failures=1)
+        with pytest.raises(httpx.HTTPStatusError):
+            _policy().call(ENDPOINT, flaky)
+        assert flaky.calls == 1
+
+    def test_budget_limits_retries(self):
+        policy = _policy(max_attempts=5, budget=RetryBudget(ratio=0, min_retries=1))
+        flaky = _Flaky(_status_error(503), failures=10)
+        with pytest.raises(httpx.HTTPStatusError):
+            policy.call(ENDPOINT, flaky)
+        assert flaky.calls == 2
+        assert policy.budget.denied == 1
+
+    def test_override_by_endpoint_suffix(self):
+        policy = RetryPolicy(max_attempts=3, overrides={"/Order/List": {"max_attempts": 1}})
+        assert policy.settings_for(ENDPOINT + "?newgetTime=1")[0] == 1
+        assert policy.settings_for("/dock/mt/v2/order/callback")[0] == 3
+
+    def test_backoff_is_bounded(self):
+        for retry_number in range(1, 10):
+            assert 0 <= RetryPolicy.backoff(retry_number, 0.5, 2.0) <= 2.0
+
+    def test_async_retries(self):
+        flaky = _Flaky(httpx.ReadTimeout("timeout"), failures=1)
+        assert asyncio.run(_policy().acall(ENDPOINT, flaky.acall)) == "ok"
+        assert flaky.calls == 2
@@ -0,0 +1,181 @@
+"""自适应并发（AIMD）：延迟低于目标时加性增加并发上限，超时/429/5xx 时乘性减小
+
+固定并发数对 UAT 时而过高、时而远低于服务能承受的吞吐。这里按接口维护一个并发上限：
+- 请求成功且耗时不超过 ADAPTIVE_LATENCY_TARGET：上限 += 1 / 上限（每轮并发约加 1）
+- 超时、429 或 5xx：上限 ×= ADAPTIVE_BACKOFF（减小前发出的请求再失败不重复减小）
+- 其他结果（业务错误、取消等）不调整
+上限在 [ADAPTIVE_MIN_LIMIT, ADAPTIVE_MAX_LIMIT] 内，当前值写入接口指标的 concurrency_limit。
+
+限流器跨事件循环共享（后台事件循环与订单列表轮询器线程使用同一上限），
+等待者用各自事件循环的 Future 唤醒。
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+import httpx
+
+from config import config
+from utils.logger import logger
+from utils.metrics import registry as metrics
+
+CONGESTION_STATUS = 429
+GAUGE_NAME = "concurrency_limit"
+
+
+def is_congestion(error: BaseException) -> bool:
+    """超时、429 与 5xx 视为服务过载"""
+    if isinstance(error, httpx.TimeoutException):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == CONGESTION_STATUS or status >= 500
+    return False
+
+
+def _wake(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdaptiveLimiter:
+    """单个接口的 AIMD 并发限制（线程安全，可跨事件循环使用）"""
+
+    def __init__(
+        self,
+        name: str,
+        initial: Optional[int] = None,
+        min_limit: Optional[int] = None,
+        max_limit: Optional[int] = None,
+        latency_target: Optional[float] = None,
+        backoff: Optional[float] = None,
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit if min_limit is not None else config.ADAPTIVE_MIN_LIMIT)
+        self.max_limit = max(self.min_limit, max_limit if max_limit is not None else config.ADAPTIVE_MAX_LIMIT)
+        self.latency_target = latency_target if latency_target is not None else config.ADAPTIVE_LATENCY_TARGET
+        self.backoff = backoff if backoff is not None else config.ADAPTIVE_BACKOFF
+        start = initial if initial is not None else config.ADAPTIVE_INITIAL_LIMIT
+        self._limit = float(min(max(start, self.min_limit), self.max_limit))
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = deque()
+        self._last_decrease = 0.0
+        self.in_flight = 0
+        self.successes = 0
+        self.congestions = 0
+        self.decreases = 0
+        self.min_seen = self.limit
+        self.max_seen = self.limit
+        metrics.set_gauge(name, GAUGE_NAME, self.limit)
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    async def acquire(self) -> float:
+        """等待空闲名额，返回获取时刻（传给 release）"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return time.monotonic()
+                future: "asyncio.Future[None]" = loop.create_future()
+                self._waiters.append((loop, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._lock:
+                    try:
+                        self._waiters.remove((loop, future))
+                    except ValueError:
+                        # 已被唤醒但随即取消，把名额让给下一个等待者
+                        self._wake_locked()
+                raise
+
+    def release(self, acquired_at: float, congested: Optional[bool]) -> None:
+        """归还名额并按结果调整上限；congested 为 None 表示结果不参与调整"""
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            before = self.limit
+            if congested:
+                self.congestions += 1
+                if acquired_at >= self._last_decrease:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                    self._last_decrease = now
+                    self.decreases += 1
+            elif congested is not None:
+                self.successes += 1
+                if now - acquired_at <= self.latency_target:
+                    self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            after = self.limit
+            self.min_seen = min(self.min_seen, after)
+            self.max_seen = max(self.max_seen, after)
+            self._wake_locked()
+        if after != before:
+            metrics.set_gauge(self.name, GAUGE_NAME, after)
+            if after < before:
+                logger.warning(f"{self.name} 出现超时/429/5xx，并发上限 {before} → {after}")
+
+    def _wake_locked(self) -> None:
+        free = self.limit - self.in_flight
+        while free > 0 and self._waiters:
+            loop, future = self._waiters.popleft()
+            if loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(_wake, future)
+            free -= 1
+
+    @asynccontextmanager
+    async def attempt(self) -> AsyncIterator[None]:
+        """占用一个名额执行一次请求，按异常类型判断是否过载"""
+        acquired_at = await self.acquire()
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.release(acquired_at, None)
+            raise
+        except Exception as e:
+            self.release(acquired_at, True if is_congestion(e) else None)
+            raise
+        self.release(acquired_at, False)
+
+    def summary(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "limit": self.limit, "min_seen": self.min_seen, "max_seen": self.max_seen,
+                "successes": self.successes, "congestions": self.congestions, "decreases": self.decreases,
+            }
+
+
+class LimiterRegistry:
+    """按接口共享的自适应限流器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+
+    def get(self, endpoint: str) -> AdaptiveLimiter:
+        limiter = self._limiters.get(endpoint)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(endpoint)
+                if limiter is None:
+                    limiter = self._limiters[endpoint] = AdaptiveLimiter(endpoint)
+        return limiter
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.name: limiter.summary() for limiter in limiters}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._limiters.clear()
+
+
+limiters = LimiterRegistry()
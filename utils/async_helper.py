@@ -1,12 +1,156 @@
 # -*- coding: utf-8 -*-
-"""异步请求工具模块 - 用于高并发场景"""
+"""异步请求工具模块 - 用于高并发场景
+
+同步代码（assertions/、api/）通过 submit / run_async 把协程交给进程内共享的后台事件循环线程执行：
+线程在首次使用时启动，其上的 AsyncClient 长期保持 keep-alive 连接，
+不再为每次调用创建事件循环与连接池。
+"""
 import asyncio
-from typing import Any, Callable, Dict, List, Optional, Tuple
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, List, Optional, Sequence, Tuple
 
 import httpx
 
+from api.base import _async_request_once
 from config import config
+from utils import timing
+from utils.adaptive_limiter import AdaptiveLimiter, limiters
+from utils.http_client import async_warm_up, create_async_client
 from utils.logger import logger
+from utils.rate_limiter import rate_limits
+from utils.retry_policy import RetryPolicy, default_policy
+
+# 每个事件循环按 base_url 各一个长连接 AsyncClient（连接池与事件循环绑定，不能跨循环复用）
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Optional[str], httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_client(base_url: Optional[str] = None) -> httpx.AsyncClient:
+    """返回当前事件循环共享的 AsyncClient，首次调用时创建，后续复用 keep-alive 连接
+
+    base_url 为 None 时使用 Config.get_base_url()；指定其他地址（如替身服务）时另建一个共享客户端。
+    """
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(base_url)
+    if client is None or client.is_closed:
+        client = create_async_client(base_url)
+        clients[base_url] = client
+        logger.info(
+            f"创建共享异步客户端，最大连接数: {config.ASYNC_MAX_CONNECTIONS}")
+    return client
+
+
+async def close_async_client() -> None:
+    """关闭当前事件循环的共享 AsyncClient"""
+    loop = asyncio.get_running_loop()
+    for client in _async_clients.pop(loop, {}).values():
+        if not client.is_closed:
+            await client.aclose()
+
+
+def shutdown_async_clients() -> None:
+    """停止后台事件循环并关闭所有空闲事件循环上的共享 AsyncClient（会话结束时调用）"""
+    background_loop.stop()
+    for loop, clients in list(_async_clients.items()):
+        if loop.is_closed() or loop.is_running():
+            continue
+        for client in clients.values():
+            if not client.is_closed:
+                loop.run_until_complete(client.aclose())
+    _async_clients.clear()
+
+
+ORDER_DETAIL_PATH = "/retail-order-front/app/Business/Order/Dock/Detail"
+
+
+async def _request_json(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    payload: Dict[str, Any],
+    headers: Optional[Dict[str, str]],
+    timeout: Optional[float],
+) -> Dict[str, Any]:
+    """单次尝试，与 async_safe_post 共用熔断检查与耗时/指标记录（限速令牌由调用方先取）"""
+    method = method.upper()
+    kwargs: Dict[str, Any] = {"headers": headers}
+    if method == "POST":
+        kwargs["json"] = payload
+    else:
+        kwargs["params"] = payload
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    response = await _async_request_once(
+        client, method, url, None, False, kwargs, acquire_rate_limit=False)
+    return response.json()
+
+
+async def as_completed_requests(
+    urls_and_payloads: Sequence[Tuple[str, Dict[str, Any]]],
+    method: str = "POST",
+    headers: Optional[Dict[str, str]] = None,
+    max_concurrency: int = 10,
+    timeout: Optional[float] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    并发请求，按完成顺序逐个产出 (下标, 响应)
+
+    传入 limiter 时并发由自适应限流器控制（每次尝试占用一个名额，重试等待期间不占用），
+    否则固定为 max_concurrency。开启 RATE_LIMIT_ENABLED 时每次尝试先按服务前缀取限速令牌。
+    每个请求按 safe_post 同一重试策略（utils.retry_policy）重试，每次尝试与 async_safe_post 一样
+    经过熔断检查并计入网络耗时与接口指标，timeout 为单次请求超时；
+    最终失败的请求产出 {"error": 错误信息}。调用方提前结束时用 contextlib.aclosing 包装，
+    退出时立即取消未完成（含排队中）的请求：
+
+        async with aclosing(as_completed_requests(items)) as results:
+            async for index, resp in results:
+                if matched(resp):
+                    break
+    """
+    policy = retry_policy or default_policy
+    semaphore = asyncio.Semaphore(max_concurrency) if limiter is None else None
+    client = client or get_async_client()
+
+    async def _attempt(url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # 先取限速令牌再占并发名额，限速等待不计入自适应限流的请求耗时
+        await rate_limits.async_acquire(url)
+        if limiter is None:
+            return await _request_json(client, method, url, payload, headers, timeout)
+        async with limiter.attempt():
+            return await _request_json(client, method, url, payload, headers, timeout)
+
+    async def _fetch(index: int, url: str, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        try:
+            if semaphore is None:
+                return index, await policy.acall(url, _attempt, url, payload)
+            async with semaphore:
+                return index, await policy.acall(url, _attempt, url, payload)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"异步请求失败: {url}, 错误: {e!r}")
+            return index, {"error": str(e) or type(e).__name__}
+
+    tasks = [asyncio.ensure_future(_fetch(index, url, payload))
+             for index, (url, payload) in enumerate(urls_and_payloads)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.info(f"提前结束，已取消 {len(pending)} 个未完成的请求")
 
 
 async def async_batch_request(
@@ -14,6 +158,7 @@ async def async_batch_request(
     method: str = "POST",
     headers: Optional[Dict[str, str]] = None,
     max_concurrency: int = 10,
+    timeout: Optional[float] = None,
 ) -> List[Dict[str, Any]]:
     """
     批量并发请求
@@ -23,40 +168,74 @@ async def async_batch_request(
         method: 请求方法
         headers: 请求头
         max_concurrency: 最大并发数
+        timeout: 单次请求超时（秒），默认使用客户端超时
 
     Returns:
         响应列表（与输入顺序一致）
     """
-    semaphore = asyncio.Semaphore(max_concurrency)
-
-    async def _fetch(client: httpx.AsyncClient, url: str, payload: Dict) -> Dict:
-        async with semaphore:
-            try:
-                if method.upper() == "POST":
-                    resp = await client.post(url, json=payload)
-                else:
-                    resp = await client.get(url, params=payload)
-                return resp.json()
-            except Exception as e:
-                logger.error(f"异步请求失败: {url}, 错误: {e}")
-                return {"error": str(e)}
-
-    async with httpx.AsyncClient(
-        base_url=config.get_base_url(),
-        timeout=config.DEFAULT_TIMEOUT,
-        headers=headers or {},
-    ) as client:
-        tasks = [_fetch(client, url, payload)
-                 for url, payload in urls_and_payloads]
-        return await asyncio.gather(*tasks)
+    results: List[Dict[str, Any]] = [{} for _ in urls_and_payloads]
+    async for index, result in as_completed_requests(
+            urls_and_payloads, method, headers, max_concurrency, timeout):
+        results[index] = result
+    return results
+
+
+def _order_detail_requests(
+    token_id: str,
+    order_ids: List[str],
+    user_id: str,
+    company_id: str,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    return [(ORDER_DETAIL_PATH, {
+        "tokenId": token_id,
+        "orderId": order_id,
+        "userId": user_id,
+        "companyId": company_id,
+    }) for order_id in order_ids]
+
+
+def _detail_concurrency(max_concurrency: Optional[int]) -> Tuple[int, Optional[AdaptiveLimiter]]:
+    """未指定并发数时使用详情接口共享的自适应限流器（ADAPTIVE_CONCURRENCY 关闭时取初始值）"""
+    if max_concurrency is not None:
+        return max_concurrency, None
+    if not config.ADAPTIVE_CONCURRENCY:
+        return config.ADAPTIVE_INITIAL_LIMIT, None
+    limiter = limiters.get(ORDER_DETAIL_PATH)
+    return limiter.limit, limiter
+
+
+async def as_completed_order_details(
+    token_id: str,
+    order_ids: List[str],
+    max_concurrency: Optional[int] = None,
+    user_id: str = "f57342198c3147178e5b3ffa63f97a65",
+    company_id: str = "5ad586a8721e49518998aedef9fd3b5c",
+    client: Optional[httpx.AsyncClient] = None,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """并发获取订单详情，按完成顺序产出 (order_ids 下标, 详情)，失败的详情带 orderId 与 error
+
+    max_concurrency 为 None 时并发数自适应（见 utils.adaptive_limiter）。
+    """
+    requests = _order_detail_requests(token_id, order_ids, user_id, company_id)
+    max_concurrency, limiter = _detail_concurrency(max_concurrency)
+    async with aclosing(as_completed_requests(
+            requests, max_concurrency=max_concurrency, timeout=timeout, client=client,
+            limiter=limiter)) as results:
+        async for index, result in results:
+            if "error" in result:
+                result = {"error": result["error"], "orderId": order_ids[index]}
+            yield index, result
 
 
 async def async_batch_order_details(
     token_id: str,
     order_ids: List[str],
-    max_concurrency: int = 10,
+    max_concurrency: Optional[int] = None,
     user_id: str = "f57342198c3147178e5b3ffa63f97a65",
     company_id: str = "5ad586a8721e49518998aedef9fd3b5c",
+    client: Optional[httpx.AsyncClient] = None,
+    timeout: Optional[float] = None,
 ) -> List[Dict[str, Any]]:
     """
     并发获取多个订单详情
@@ -64,60 +243,117 @@ async def async_batch_order_details(
     Args:
         token_id: 访问令牌
         order_ids: 订单ID列表
-        max_concurrency: 最大并发数
+        max_concurrency: 最大并发数，None 时自适应
         user_id: 用户ID
         company_id: 公司ID
+        client: 指定的 AsyncClient，默认使用当前事件循环的共享客户端
+        timeout: 单次请求超时（秒），默认使用客户端超时
 
     Returns:
-        订单详情列表
+        订单详情列表（与 order_ids 顺序一致）
     """
-    semaphore = asyncio.Semaphore(max_concurrency)
-
-    async def _fetch_detail(client: httpx.AsyncClient, order_id: str) -> Dict:
-        async with semaphore:
-            try:
-                payload = {
-                    "tokenId": token_id,
-                    "orderId": order_id,
-                    "userId": user_id,
-                    "companyId": company_id,
-                }
-                resp = await client.post(
-                    "/retail-order-front/app/Business/Order/Dock/Detail",
-                    json=payload,
-                )
-                return resp.json()
-            except Exception as e:
-                logger.error(f"获取订单详情失败: {order_id}, 错误: {e}")
-                return {"error": str(e), "orderId": order_id}
-
-    logger.info(f"开始并发获取 {len(order_ids)} 个订单详情，并发数: {max_concurrency}")
-
-    async with httpx.AsyncClient(
-        base_url=config.get_base_url(),
-        timeout=config.DEFAULT_TIMEOUT,
-    ) as client:
-        tasks = [_fetch_detail(client, oid) for oid in order_ids]
-        results = await asyncio.gather(*tasks)
+    concurrency, limiter = _detail_concurrency(max_concurrency)
+    logger.info(f"开始并发获取 {len(order_ids)} 个订单详情，"
+                f"并发数: {concurrency}{'（自适应）' if limiter is not None else ''}")
+
+    results: List[Dict[str, Any]] = [{} for _ in order_ids]
+    async with aclosing(as_completed_order_details(
+            token_id, order_ids, max_concurrency, user_id, company_id, client, timeout)) as details:
+        async for index, result in details:
+            results[index] = result
 
     logger.info(
         f"并发获取订单详情完成，成功: {len([r for r in results if 'error' not in r])}")
     return results
 
 
-def run_async(coro):
-    """在同步代码中运行异步函数的辅助方法"""
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # 如果已有事件循环在运行，创建新任务
-            import nest_asyncio
-            nest_asyncio.apply()
-            return loop.run_until_complete(coro)
-        return loop.run_until_complete(coro)
-    except RuntimeError:
-        # 没有事件循环时创建新的
-        return asyncio.run(coro)
+class BackgroundLoop:
+    """进程内共享的后台事件循环线程，首次 submit 时启动，线程退出后再次使用会重新启动"""
+
+    def __init__(self, name: str = "async-helper-loop"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._thread is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._run, args=(loop,), name=self.name, daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+                logger.info("后台事件循环线程已启动")
+            return self._loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """把协程交给后台事件循环执行，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_started())
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """阻塞等待协程在后台事件循环上完成，等待时间计入当前用例的等待耗时"""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("不能在后台事件循环线程中同步等待协程，请直接 await")
+        future = self.submit(coro)
+        started = time.perf_counter()
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+        finally:
+            timing.record_wait(time.perf_counter() - started)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """关闭后台事件循环上的共享 AsyncClient 并停止线程"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or thread is None or not thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(close_async_client(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"关闭后台事件循环上的异步客户端失败: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+
+
+background_loop = BackgroundLoop()
+
+
+def submit(coro: Coroutine[Any, Any, Any]) -> Future:
+    """在共享的后台事件循环上执行协程，返回 concurrent.futures.Future"""
+    return background_loop.submit(coro)
+
+
+def run_async(coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+    """在同步代码中运行异步函数：交给后台事件循环执行并等待结果
+
+    调用方自己的事件循环（若有）不受影响，也不需要 nest_asyncio。
+    """
+    return background_loop.run(coro, timeout)
+
+
+def warm_up_async_client(connections: Optional[int] = None) -> int:
+    """预热后台事件循环上的共享 AsyncClient，返回成功的探测请求数（见 utils.http_client.warm_up）"""
+    async def _warm_up() -> int:
+        return await async_warm_up(get_async_client(), connections)
+
+    return run_async(_warm_up())
 
 
 # ============ 便捷的同步包装函数 ============
@@ -125,7 +361,7 @@ def run_async(coro):
 def batch_order_details(
     token_id: str,
     order_ids: List[str],
-    max_concurrency: int = 10,
+    max_concurrency: Optional[int] = None,
     user_id: str = "f57342198c3147178e5b3ffa63f97a65",
     company_id: str = "5ad586a8721e49518998aedef9fd3b5c",
 ) -> List[Dict[str, Any]]:
@@ -0,0 +1,385 @@
+"""请求录制/回放（cassette）：离线、毫秒级地重放整套用例的 HTTP 交互
+
+CASSETTE_MODE=record 时真实请求照常发出，请求/响应对按用例归档，会话结束写入
+CASSETTE_FILE（gzip 压缩的 JSON，相同响应体只存一份）；CASSETTE_MODE=replay 时
+不访问网络，按请求的归一化指纹从 cassette 中取响应。
+
+归一化规则：
+- 请求指纹 = 方法 + 路径 + 查询参数 + 请求体（JSON 或表单，表单值中的 JSON 串展开），
+  忽略请求头
+- CASSETTE_MASKED_KEYS（tokenId、sign 等）以及名称以 token 结尾（不区分大小写，
+  如开票接口的 token、accessToken）的字段值不参与匹配，落盘前脱敏
+- CASSETTE_VOLATILE_KEYS（newgetTime、orderId、ctime 等）中由客户端生成的值
+  替换为按出现顺序编号的占位符；录制时响应中的同一值也替换为占位符，
+  回放时再替换回本次请求中的实际值（如新生成的美团订单号）。
+  已在之前的响应中出现过的值（如服务端生成的内部订单 ID）按原样匹配
+- 回放时响应中的毫秒时间戳与 "YYYY-MM-DD HH:MM:SS" 时间整体平移到回放时刻，
+  避免列表扫描按推单时间截止时把录制的订单当作旧订单
+
+同一指纹的多次请求（如轮询）按录制顺序依次返回，用完后重复最后一个。
+占位符编号与游标按用例（conftest 设置的 scope）隔离，因此可以只回放部分用例；
+当前用例找不到时再到其他用例中查找（如会话级的登录请求）。
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import httpx
+
+from config import config
+from utils.logger import logger
+
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+SESSION_SCOPE = "session"
+MASK = "***"
+FORMAT_VERSION = 1
+
+# 占位符以外的取值太短时不做替换，避免误伤响应中的其他数字
+_MIN_VOLATILE_LENGTH = 6
+_EPOCH_MS = re.compile(r"(?<!\d)1[5-9]\d{11}(?!\d)")
+_DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}")
+_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# 只平移录制时刻前后 30 天内的时间，同样长度的 ID、生日等不受影响
+_SHIFT_WINDOW_MS = 30 * 24 * 3600 * 1000
+# 响应头只保留内容类型，其余（长度、编码、Set-Cookie 等）回放时无意义
+_KEPT_HEADERS = ("content-type",)
+# 名称以 token 结尾的字段无论是否配置都脱敏
+_TOKEN_KEY_SUFFIX = "token"
+_TOKEN_FIELD = re.compile(r'("[^"]*%s"\s*:\s*)"[^"]*"' % _TOKEN_KEY_SUFFIX, re.IGNORECASE)
+
+
+class CassetteMissError(httpx.RequestError):
+    """回放模式下 cassette 中没有匹配的请求"""
+
+
+def _split_keys(raw: str) -> frozenset:
+    return frozenset(key.strip() for key in raw.split(",") if key.strip())
+
+
+class _Bindings:
+    """单个 scope 内客户端生成值与占位符的对应关系"""
+
+    def __init__(self):
+        self.placeholders: Dict[str, str] = {}
+        self.values: Dict[str, str] = {}
+        self.responses: List[str] = []
+
+    def placeholder(self, value: str) -> str:
+        if value in self.placeholders:
+            return self.placeholders[value]
+        if len(value) < _MIN_VOLATILE_LENGTH or any(value in body for body in self.responses):
+            return value
+        placeholder = f"<<{len(self.placeholders) + 1}>>"
+        self.placeholders[value] = placeholder
+        self.values[placeholder] = value
+        return placeholder
+
+    def mask_values(self, text: str) -> str:
+        """响应体中的客户端生成值替换为占位符（录制时）"""
+        for value in sorted(self.placeholders, key=len, reverse=True):
+            text = re.sub(r"(?<![0-9A-Za-z])%s(?![0-9A-Za-z])" % re.escape(value),
+                          self.placeholders[value], text)
+        return text
+
+    def fill_values(self, text: str) -> str:
+        """占位符替换为本次请求中的实际值（回放时）"""
+        for placeholder, value in self.values.items():
+            text = text.replace(placeholder, value)
+        return text
+
+
+class Cassette:
+    """一个 cassette 文件的内存表示，线程安全"""
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self.volatile_keys = _split_keys(config.CASSETTE_VOLATILE_KEYS)
+        self.masked_keys = _split_keys(config.CASSETTE_MASKED_KEYS)
+        self.recorded_at_ms = int(time.time() * 1000)
+        self.shift_ms = 0
+        self.bodies: List[str] = []
+        self._body_index: Dict[str, int] = {}
+        # scope -> 指纹 -> [[状态码, 响应头, 响应体序号], ...]
+        self.interactions: Dict[str, Dict[str, List[List[Any]]]] = {}
+        self.requests: Dict[str, str] = {}
+        self._bindings: Dict[str, _Bindings] = {}
+        self._cursors: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ============ 文件 ============
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        cassette = cls(path, MODE_REPLAY)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的 cassette 版本: {data.get('version')}")
+        cassette.bodies = data["bodies"]
+        cassette.interactions = data["interactions"]
+        cassette.requests = data.get("requests", {})
+        cassette.recorded_at_ms = data["recorded_at_ms"]
+        cassette.shift_ms = int(time.time() * 1000) - cassette.recorded_at_ms
+        logger.info(f"已加载 cassette {path}：{sum(len(v) for v in cassette.interactions.values())} 个指纹，"
+                    f"{len(cassette.bodies)} 个响应体，时间平移 {cassette.shift_ms / 1000:.0f}s")
+        return cassette
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {
+                "version": FORMAT_VERSION,
+                "recorded_at_ms": self.recorded_at_ms,
+                "interactions": self.interactions,
+                "requests": self.requests,
+                "bodies": self.bodies,
+            }
+            with gzip.open(self.path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        logger.info(f"cassette 已写入 {self.path}：{len(self.requests)} 个指纹，{len(self.bodies)} 个响应体")
+
+    # ============ 归一化 ============
+
+    def _normalize(self, value: Any, bindings: _Bindings, key: Optional[str] = None) -> Any:
+        if isinstance(value, dict):
+            return {k: self._normalize(v, bindings, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._normalize(v, bindings, key) for v in value]
+        if isinstance(value, str) and value[:1] in ("{", "["):
+            try:
+                return self._normalize(json.loads(value), bindings, key)
+            except ValueError:
+                pass
+        if self._is_masked(key):
+            return MASK
+        if key in self.volatile_keys and value is not None and not isinstance(value, bool):
+            return bindings.placeholder(str(value))
+        return value
+
+    def _fingerprint(self, request: httpx.Request, bindings: _Bindings) -> Tuple[str, str]:
+        """返回 (指纹, 归一化后的请求文本)"""
+        body: Any = None
+        content = request.content
+        if content:
+            content_type = request.headers.get("content-type", "")
+            text = content.decode("utf-8", errors="replace")
+            if "application/x-www-form-urlencoded" in content_type:
+                body = self._normalize(dict(parse_qsl(text, keep_blank_values=True)), bindings)
+            else:
+                try:
+                    body = self._normalize(json.loads(text), bindings)
+                except ValueError:
+                    body = text
+        query = self._normalize(dict(parse_qsl(request.url.query.decode("ascii"))), bindings)
+        canonical = json.dumps([request.method, request.url.path, query, body],
+                               ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:20], canonical
+
+    def _is_masked(self, key: Optional[str]) -> bool:
+        return key is not None and (key in self.masked_keys or key.lower().endswith(_TOKEN_KEY_SUFFIX))
+
+    def _mask_response(self, text: str) -> str:
+        for key in self.masked_keys:
+            text = re.sub(r'("%s"\s*:\s*)"[^"]*"' % re.escape(key), r'\1"%s"' % MASK, text)
+        return _TOKEN_FIELD.sub(r'\1"%s"' % MASK, text)
+
+    def _shift_times(self, text: str) -> str:
+        if not self.shift_ms:
+            return text
+        shift = timedelta(milliseconds=self.shift_ms)
+        recorded_at = datetime.fromtimestamp(self.recorded_at_ms / 1000)
+
+        def _shift_epoch(match: "re.Match") -> str:
+            value = int(match.group(0))
+            if abs(value - self.recorded_at_ms) > _SHIFT_WINDOW_MS:
+                return match.group(0)
+            return str(value + self.shift_ms)
+
+        def _shift_datetime(match: "re.Match") -> str:
+            raw = match.group(0)
+            try:
+                parsed = datetime.strptime(raw.replace("T", " "), _DATETIME_FORMAT)
+            except ValueError:
+                return raw
+            if abs((parsed - recorded_at).total_seconds()) * 1000 > _SHIFT_WINDOW_MS:
+                return raw
+            return (parsed + shift).strftime(_DATETIME_FORMAT).replace(" ", raw[10])
+
+        text = _EPOCH_MS.sub(_shift_epoch, text)
+        return _DATETIME.sub(_shift_datetime, text)
+
+    def _scope_bindings(self, scope: str) -> _Bindings:
+        bindings = self._bindings.get(scope)
+        if bindings is None:
+            bindings = self._bindings[scope] = _Bindings()
+        return bindings
+
+    # ============ 录制 / 回放 ============
+
+    def record(self, request: httpx.Request, response: httpx.Response) -> None:
+        text = response.content.decode(response.encoding or "utf-8", errors="replace")
+        headers = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        scope = current_scope()
+        with self._lock:
+            bindings = self._scope_bindings(scope)
+            fingerprint, canonical = self._fingerprint(request, bindings)
+            stored = self._mask_response(bindings.mask_values(text))
+            bindings.responses.append(text)
+            index = self._body_index.get(stored)
+            if index is None:
+                index = self._body_index[stored] = len(self.bodies)
+                self.bodies.append(stored)
+            self.interactions.setdefault(scope, {}).setdefault(fingerprint, []).append(
+                [response.status_code, headers, index])
+            self.requests.setdefault(fingerprint, canonical)
+
+    def _lookup(self, scope: str, fingerprint: str) -> Optional[Tuple[str, List[List[Any]]]]:
+        entries = self.interactions.get(scope, {}).get(fingerprint)
+        if entries:
+            return scope, entries
+        for other_scope, by_fingerprint in self.interactions.items():
+            entries = by_fingerprint.get(fingerprint)
+            if entries:
+                return other_scope, entries
+        return None
+
+    def replay(self, request: httpx.Request) -> httpx.Response:
+        scope = current_scope()
+        with self._lock:
+            bindings = self._scope_bindings(scope)
+            fingerprint, canonical = self._fingerprint(request, bindings)
+            found = self._lookup(scope, fingerprint)
+            if found is None:
+                self.misses += 1
+                raise CassetteMissError(
+                    f"cassette 中没有匹配的请求（{scope}）: {request.method} {request.url.path} {canonical[:300]}",
+                    request=request,
+                )
+            self.hits += 1
+            found_scope, entries = found
+            cursor = self._cursors.get((found_scope, fingerprint), 0)
+            self._cursors[(found_scope, fingerprint)] = cursor + 1
+            status, headers, index = entries[min(cursor, len(entries) - 1)]
+            text = bindings.fill_values(self._shift_times(self.bodies[index]))
+            bindings.responses.append(text)
+        return httpx.Response(status, headers=headers, content=text.encode("utf-8"), request=request)
+
+
+class CassetteTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """录制时包装真实传输层并记录交互，回放时直接从 cassette 返回响应"""
+
+    def __init__(self, cassette: Cassette, transport: Any = None):
+        self.cassette = cassette
+        self.transport = transport
+
+    @staticmethod
+    def _detached(request: httpx.Request, response: httpx.Response) -> httpx.Response:
+        # 响应体已读出并解压，去掉编码/长度头后交给客户端
+        headers = [(k, v) for k, v in response.headers.multi_items()
+                   if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(response.status_code, headers=headers, content=response.content,
+                              request=request, extensions=response.extensions)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.cassette.mode == MODE_REPLAY:
+            return self.cassette.replay(request)
+        response = self.transport.handle_request(request)
+        try:
+            response.read()
+        finally:
+            response.close()
+        self.cassette.record(request, response)
+        return self._detached(request, response)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.cassette.mode == MODE_REPLAY:
+            return self.cassette.replay(request)
+        response = await self.transport.handle_async_request(request)
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        self.cassette.record(request, response)
+        return self._detached(request, response)
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+    async def aclose(self) -> None:
+        if self.transport is not None:
+            await self.transport.aclose()
+
+
+_scope = SESSION_SCOPE
+_active: Optional[Cassette] = None
+_active_lock = threading.Lock()
+
+
+def set_scope(scope: Optional[str]) -> None:
+    """设置当前用例（conftest 在每个用例开始/结束时调用）"""
+    global _scope
+    _scope = scope or SESSION_SCOPE
+
+
+def current_scope() -> str:
+    return _scope
+
+
+def active_cassette() -> Optional[Cassette]:
+    """按 CASSETTE_MODE 返回本进程共用的 cassette，关闭时返回 None"""
+    global _active
+    mode = config.CASSETTE_MODE
+    if mode == MODE_OFF:
+        return None
+    if mode not in (MODE_RECORD, MODE_REPLAY):
+        raise ValueError(f"CASSETTE_MODE 只能是 off/record/replay: {mode}")
+    with _active_lock:
+        if _active is None:
+            _active = (Cassette.load(config.CASSETTE_FILE) if mode == MODE_REPLAY
+                       else Cassette(config.CASSETTE_FILE, MODE_RECORD))
+        return _active
+
+
+def cassette_transport(**transport_kwargs: Any) -> Optional[CassetteTransport]:
+    """同步客户端的传输层，未开启录制/回放时返回 None（使用 httpx 默认传输层）"""
+    cassette = active_cassette()
+    if cassette is None:
+        return None
+    inner = None if cassette.mode == MODE_REPLAY else httpx.HTTPTransport(**transport_kwargs)
+    return CassetteTransport(cassette, inner)
+
+
+def async_cassette_transport(**transport_kwargs: Any) -> Optional[CassetteTransport]:
+    """异步客户端的传输层，参数（如 limits）传给被包装的 AsyncHTTPTransport"""
+    cassette = active_cassette()
+    if cassette is None:
+        return None
+    inner = None if cassette.mode == MODE_REPLAY else httpx.AsyncHTTPTransport(**transport_kwargs)
+    return CassetteTransport(cassette, inner)
+
+
+def finish() -> None:
+    """会话结束：录制模式写盘，回放模式输出命中统计"""
+    cassette = _active
+    if cassette is None:
+        return
+    if cassette.mode == MODE_RECORD:
+        cassette.save()
+    else:
+        logger.info(f"cassette 回放：命中 {cassette.hits} 次，未命中 {cassette.misses} 次")
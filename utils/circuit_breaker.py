@@ -0,0 +1,198 @@
+"""按服务前缀熔断：连续失败达到阈值后断开，冷却期内直接拒绝请求
+
+后端某个服务挂掉时，不再让每个用例都走完重试与轮询超时才失败：
+- 关闭：正常放行，连续失败 CIRCUIT_FAILURE_THRESHOLD 次后断开
+- 断开：CIRCUIT_COOLDOWN 秒内的请求直接抛 CircuitOpenError（不发请求、不重试）
+- 半开：冷却结束后放行一个试探请求，成功则关闭，失败则重新断开
+
+只有传输错误（连接失败、超时等）和 5xx 计为失败；4xx 与业务错误说明服务可达，计为成功。
+服务前缀优先匹配 CIRCUIT_SERVICE_PREFIXES（如 /dock/mt），否则取路径第一段
+（如 /retail-order-front）。
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+from config import config
+from utils.logger import logger
+from utils.metrics import endpoint_template
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(httpx.RequestError):
+    """熔断器断开，请求未发出"""
+
+    def __init__(self, prefix: str, retry_after: float):
+        super().__init__(f"服务 {prefix} 已熔断，{retry_after:.1f}s 后允许试探请求")
+        self.prefix = prefix
+        self.retry_after = retry_after
+
+
+def _configured_prefixes() -> List[str]:
+    prefixes = [p.strip().rstrip("/") for p in config.CIRCUIT_SERVICE_PREFIXES.split(",") if p.strip()]
+    return sorted(prefixes, key=len, reverse=True)
+
+
+def service_prefix(endpoint: str) -> str:
+    """接口所属的服务前缀"""
+    path = endpoint_template(endpoint)
+    for prefix in _configured_prefixes():
+        if path == prefix or path.startswith(prefix + "/"):
+            return prefix
+    segments = [segment for segment in path.split("/") if segment]
+    return "/" + segments[0] if segments else "/"
+
+
+def is_failure(error: Optional[BaseException] = None,
+               response: Optional[httpx.Response] = None) -> bool:
+    """传输错误与 5xx 计为失败"""
+    if response is not None:
+        return response.status_code >= 500
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """单个服务前缀的熔断器（线程安全）"""
+
+    def __init__(self, prefix: str, failure_threshold: Optional[int] = None,
+                 cooldown: Optional[float] = None):
+        self.prefix = prefix
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._lock = threading.Lock()
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.trips = 0
+        self._trial_in_flight = False
+
+    @property
+    def failure_threshold(self) -> int:
+        return self._failure_threshold if self._failure_threshold is not None else config.CIRCUIT_FAILURE_THRESHOLD
+
+    @property
+    def cooldown(self) -> float:
+        return self._cooldown if self._cooldown is not None else config.CIRCUIT_COOLDOWN
+
+    def before_call(self) -> bool:
+        """请求前调用；断开期间抛出 CircuitOpenError，返回本次是否为半开状态的试探请求"""
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return False
+            retry_after = self.opened_at + self.cooldown - time.monotonic()
+            if self.state == STATE_OPEN and retry_after <= 0:
+                self.state = STATE_HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == STATE_HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                logger.info(f"服务 {self.prefix} 熔断冷却结束，放行试探请求")
+                return True
+            self.rejected += 1
+        raise CircuitOpenError(self.prefix, max(retry_after, 0.0))
+
+    def release_trial(self) -> None:
+        """试探请求没有记录结果就结束（如限速或回放出错）时释放名额，下一个请求重新试探"""
+        with self._lock:
+            if self.state == STATE_HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                logger.info(f"服务 {self.prefix} 试探请求成功，熔断关闭")
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == STATE_HALF_OPEN or (
+                    self.state == STATE_CLOSED and self.failures >= self.failure_threshold):
+                self._open(f"连续失败 {self.failures} 次")
+
+    def trip(self, reason: str) -> None:
+        """直接断开（如会话开始的健康检查发现服务不可用）"""
+        with self._lock:
+            self._open(reason)
+
+    def _open(self, reason: str) -> None:
+        self.state = STATE_OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._trial_in_flight = False
+        logger.error(f"服务 {self.prefix} 熔断（{reason}），{self.cooldown:g}s 内的请求直接失败")
+
+    def record(self, error: Optional[BaseException] = None,
+               response: Optional[httpx.Response] = None) -> None:
+        """按请求结果记录成功或失败"""
+        if is_failure(error, response):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def summary(self) -> Dict[str, object]:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures,
+                    "trips": self.trips, "rejected": self.rejected}
+
+
+class CircuitBreakerRegistry:
+    """按服务前缀管理熔断器；CIRCUIT_ENABLED 关闭时 before_call/record 为空操作"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        prefix = service_prefix(endpoint)
+        breaker = self._breakers.get(prefix)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(prefix, CircuitBreaker(prefix))
+        return breaker
+
+    def before_call(self, endpoint: str) -> bool:
+        return config.CIRCUIT_ENABLED and self.get(endpoint).before_call()
+
+    @contextmanager
+    def guard(self, endpoint: str) -> Iterator[None]:
+        """包住一次请求：进入时 before_call，试探请求没有记录结果就退出时释放试探名额
+
+        否则限速、回放缺失等非网络异常会让半开状态一直占着试探名额，之后的请求全被拒绝。
+        """
+        trial = self.before_call(endpoint)
+        try:
+            yield
+        finally:
+            if trial:
+                self.get(endpoint).release_trial()
+
+    def record(self, endpoint: str, error: Optional[BaseException] = None,
+               response: Optional[httpx.Response] = None) -> None:
+        if config.CIRCUIT_ENABLED and not isinstance(error, CircuitOpenError):
+            self.get(endpoint).record(error, response)
+
+    def is_open(self, endpoint: str) -> bool:
+        return config.CIRCUIT_ENABLED and self.get(endpoint).state != STATE_CLOSED
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.prefix: breaker.summary() for breaker in breakers}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+
+
+breakers = CircuitBreakerRegistry()
@@ -1,5 +1,5 @@
 from contextlib import contextmanager
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import pymysql
 
@@ -69,6 +69,30 @@ def cleanup_test_data(conn, test_prefix: str) -> bool:
         return False
 
 
+def query_rows_by_keys(
+    conn, table: str, key_column: str, columns: Sequence[str], keys: Sequence[str]
+) -> List[Dict[str, Any]]:
+    """按键批量查询：SELECT columns FROM table WHERE key_column IN (...)
+
+    表名与列名来自代码常量，键值走参数化。
+    """
+    if not keys:
+        return []
+    sql = (
+        f"SELECT {', '.join(f'`{c}`' for c in columns)} FROM `{table}` "
+        f"WHERE `{key_column}` IN ({', '.join(['%s'] * len(keys))})"
+    )
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, tuple(keys))
+            result = cursor.fetchall()
+            logger.debug(f"批量查询: table={table}, 键数={len(keys)}, 命中={len(result)}")
+            return list(result)
+    except pymysql.Error as e:
+        logger.error(f"批量查询失败: {e}")
+        raise
+
+
 def query_order_detail(conn, order_id: str) -> Optional[Dict[str, Any]]:
     """按订单 ID 查询订单详情"""
     sql = (
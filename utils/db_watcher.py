@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""数据库行监视器：所有待确认订单共用一个后台轮询
+
+各用例/场景只登记要等待的键（如 dock_order_no），后台线程每个周期对所有
+待确认的键执行一次 IN (...) 查询，只取需要的列，查到后完成对应的 Future。
+数据库查询量由 O(订单数) 降为每周期 O(1)。
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pymysql
+
+from config import config
+from utils import timing
+from utils.db_helper import query_rows_by_keys
+from utils.logger import logger
+
+RowPredicate = Callable[[Dict[str, Any]], bool]
+
+
+class WatchTimeout(AssertionError):
+    """等待超时；last_row 为超时前最后一次查到的行（未查到为 None）"""
+
+    def __init__(self, message: str, last_row: Optional[Dict[str, Any]]):
+        super().__init__(message)
+        self.last_row = last_row
+
+
+class _Waiter:
+    __slots__ = ("future", "predicate", "last_row")
+
+    def __init__(self, predicate: Optional[RowPredicate]):
+        self.future: Future = Future()
+        self.predicate = predicate
+        self.last_row: Optional[Dict[str, Any]] = None
+
+
+class DbRowWatcher:
+    """按键批量轮询某张表，行出现（且满足条件）时唤醒等待者
+
+    watch() 返回 concurrent.futures.Future，同步代码用 wait()，
+    协程用 async_wait()。后台线程在首次 watch 时启动，使用独立的
+    autocommit 连接，避免与用例共用连接及可重复读快照问题。
+    """
+
+    def __init__(
+        self,
+        table: str,
+        key_column: str,
+        columns: Sequence[str],
+        *,
+        db_config: Optional[Dict[str, Any]] = None,
+        interval: Optional[float] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.table = table
+        self.key_column = key_column
+        self.columns = tuple(dict.fromkeys((key_column, *columns)))
+        self.db_config = db_config or config.DB_CONFIG
+        self.interval = interval if interval is not None else config.DB_WATCH_INTERVAL
+        self.batch_size = batch_size or config.DB_WATCH_BATCH_SIZE
+        self.ticks = 0
+        self.queries = 0
+        self.resolved = 0
+        self._pending: Dict[str, List[_Waiter]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn = None
+
+    # ============ 登记与等待 ============
+
+    def _register(self, key: str, predicate: Optional[RowPredicate]) -> _Waiter:
+        waiter = _Waiter(predicate)
+        with self._lock:
+            self._pending.setdefault(str(key), []).append(waiter)
+            self._ensure_started()
+        self._wakeup.set()
+        return waiter
+
+    def _timeout(self, key: str, timeout: float, waiter: _Waiter) -> WatchTimeout:
+        waiter.future.cancel()
+        return WatchTimeout(
+            f"{self.table}.{self.key_column}={key} 在 {timeout}s 内未满足条件，"
+            f"最后一次查询结果: {waiter.last_row}",
+            waiter.last_row,
+        )
+
+    def watch(self, key: str, predicate: Optional[RowPredicate] = None) -> Future:
+        """登记一个键，返回在行出现且 predicate(row) 为真时完成的 Future（结果为该行）"""
+        return self._register(key, predicate).future
+
+    def wait(self, key: str, timeout: float, predicate: Optional[RowPredicate] = None) -> Dict[str, Any]:
+        """阻塞等待，超时抛出 WatchTimeout（AssertionError 子类）"""
+        waiter = self._register(key, predicate)
+        started = time.perf_counter()
+        try:
+            return waiter.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise self._timeout(key, timeout, waiter) from None
+        finally:
+            timing.record_wait(time.perf_counter() - started)
+
+    async def async_wait(self, key: str, timeout: float,
+                         predicate: Optional[RowPredicate] = None) -> Dict[str, Any]:
+        """wait 的协程版本"""
+        waiter = self._register(key, predicate)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            raise self._timeout(key, timeout, waiter) from None
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    # ============ 后台轮询 ============
+
+    def _ensure_started(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=f"db-watcher-{self.table}", daemon=True)
+            self._thread.start()
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = pymysql.connect(
+                **self.db_config, cursorclass=pymysql.cursors.DictCursor, autocommit=True)
+        return self._conn
+
+    def _snapshot_keys(self) -> List[str]:
+        with self._lock:
+            # 清理已超时/取消的等待者
+            for key in [k for k, waiters in self._pending.items()
+                        if all(w.future.cancelled() for w in waiters)]:
+                del self._pending[key]
+            return list(self._pending)
+
+    def _resolve(self, rows: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for row in rows:
+                key = str(row.get(self.key_column))
+                waiters = self._pending.get(key)
+                if not waiters:
+                    continue
+                remaining = []
+                for waiter in waiters:
+                    if waiter.future.cancelled():
+                        continue
+                    waiter.last_row = row
+                    if waiter.predicate is None or waiter.predicate(row):
+                        try:
+                            waiter.future.set_result(row)
+                            self.resolved += 1
+                        except InvalidStateError:
+                            # 等待者恰好在此刻超时取消
+                            pass
+                    else:
+                        remaining.append(waiter)
+                if remaining:
+                    self._pending[key] = remaining
+                else:
+                    del self._pending[key]
+
+    def _poll_once(self) -> None:
+        keys = self._snapshot_keys()
+        if not keys:
+            return
+        self.ticks += 1
+        conn = self._connect()
+        for start in range(0, len(keys), self.batch_size):
+            rows = query_rows_by_keys(
+                conn, self.table, self.key_column, self.columns,
+                keys[start:start + self.batch_size])
+            self.queries += 1
+            self._resolve(rows)
+
+    def _run(self) -> None:
+        logger.info(f"数据库监视器已启动: {self.table}.{self.key_column}，轮询间隔 {self.interval}s")
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            try:
+                self._poll_once()
+            except pymysql.Error as e:
+                logger.error(f"数据库监视器查询失败，下个周期重连: {e}")
+                self._close_connection()
+            except Exception as e:
+                # 结果解析/判断条件等未预期的错误：当前等待者直接失败，线程继续服务之后的登记
+                logger.exception(f"数据库监视器异常: {e!r}")
+                self._fail_all(e)
+                self._close_connection()
+            if self.pending_count:
+                self._stopped.wait(self.interval)
+            else:
+                # 没有等待者时休眠到有新的登记
+                self._wakeup.wait()
+
+    def _fail_all(self, error: BaseException) -> None:
+        with self._lock:
+            for waiters in self._pending.values():
+                for waiter in waiters:
+                    try:
+                        waiter.future.set_exception(error)
+                    except InvalidStateError:
+                        pass
+            self._pending.clear()
+
+    def _close_connection(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except pymysql.Error:
+                pass
+            self._conn = None
+
+    def stop(self) -> None:
+        """停止后台线程，未完成的等待者全部取消"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            for waiters in self._pending.values():
+                for waiter in waiters:
+                    waiter.future.cancel()
+            self._pending.clear()
+        self._close_connection()
+        logger.info(
+            f"数据库监视器已停止: {self.table}，轮询周期={self.ticks}，查询={self.queries}，完成等待={self.resolved}")
+
+
+def order_persist_watcher(**kwargs) -> DbRowWatcher:
+    """监视 dorder_dock：推单落库"""
+    return DbRowWatcher("dorder_dock", "dock_order_no", ("dock_order_no",), **kwargs)
+
+
+def order_status_watcher(**kwargs) -> DbRowWatcher:
+    """监视 dorder：订单状态（按 SourceNo）"""
+    return DbRowWatcher("dorder", "SourceNo", ("OrderStatus",), **kwargs)
+
+
+def status_equals(expected_status: str) -> RowPredicate:
+    """订单状态等于 expected_status 的条件"""
+    expected = str(expected_status)
+    return lambda row: str(row.get("OrderStatus")) == expected
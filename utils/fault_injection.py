@@ -0,0 +1,333 @@
+"""故障与延迟注入：包装 httpx 传输层，按接口模式注入尾延迟、连接重置、5xx 突发与慢响应体
+
+用于量化重试与超时对整套用例耗时的影响：FAULT_PROFILE 指向 YAML 配置后，
+conftest 的 client / access_token、共享 AsyncClient 与订单列表轮询都经过注入层。
+
+配置示例（规则按顺序匹配，第一条命中的生效）:
+
+    seed: 42                      # 可选，固定随机序列便于对比
+    rules:
+      - match: /Order/List        # 接口模板后缀；含 * ? [ 时按通配符匹配整个模板
+        latency: lognormal:median=50ms,p99=800ms
+        reset: 0.01               # 连接重置比例
+        error: 0.02               # 开始一次 5xx 突发的比例
+        status: 503
+        burst: 3                  # 突发持续的请求数
+      - match: /hr/retail/invoice/*
+        slow_body:
+          rate: 0.1
+          chunk_size: 256
+          chunk_delay: 200ms
+
+注入的延迟与慢响应体遵守请求的读超时：超过时等待读超时后抛 httpx.ReadTimeout，
+与真实服务超时时客户端的表现一致。会话结束时按规则输出注入统计。
+"""
+import asyncio
+import fnmatch
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+import yaml
+
+from config import config
+from utils.latency import LatencyDistribution
+from utils.logger import logger
+from utils.metrics import endpoint_template
+
+_DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class FaultRule:
+    """单条注入规则与其统计"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        if not spec.get("match"):
+            raise ValueError(f"故障注入规则缺少 match: {spec}")
+        self.match = str(spec["match"])
+        self._glob = any(ch in self.match for ch in "*?[")
+        self.latency = LatencyDistribution.parse(spec["latency"]) if spec.get("latency") else None
+        self.reset_rate = float(spec.get("reset", 0))
+        self.error_rate = float(spec.get("error", 0))
+        self.status = int(spec.get("status", 503))
+        self.burst = max(int(spec.get("burst", 1)), 1)
+        slow_body = spec.get("slow_body") or {}
+        self.slow_body_rate = float(slow_body.get("rate", 0))
+        self.chunk_size = max(int(slow_body.get("chunk_size", 1024)), 1)
+        self.chunk_delay = LatencyDistribution.parse(slow_body.get("chunk_delay", "100ms"))
+        self.burst_left = 0
+        self.stats: Dict[str, float] = {
+            "requests": 0, "delay_s": 0.0, "resets": 0, "errors": 0,
+            "slow_bodies": 0, "timeouts": 0,
+        }
+
+    def matches(self, template: str) -> bool:
+        if self._glob:
+            return fnmatch.fnmatchcase(template, self.match)
+        return template.endswith(self.match)
+
+    def summary(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["delay_s"] = round(stats["delay_s"], 3)
+        return stats
+
+
+class _Plan:
+    """一次请求的注入决定"""
+
+    __slots__ = ("rule", "delay", "reset", "status", "slow_body")
+
+    def __init__(self, rule: FaultRule):
+        self.rule = rule
+        self.delay = 0.0
+        self.reset = False
+        self.status: Optional[int] = None
+        self.slow_body = False
+
+
+class FaultInjector:
+    """按配置决定每个请求注入什么（线程安全，随机序列可由 seed 固定）"""
+
+    def __init__(self, rules: List[FaultRule], seed: Optional[int] = None, source: str = ""):
+        self.rules = rules
+        self.source = source
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> "FaultInjector":
+        with open(path, "r", encoding="utf-8") as f:
+            profile = yaml.safe_load(f) or {}
+        if not isinstance(profile, dict) or not isinstance(profile.get("rules", []), list):
+            raise ValueError(f"故障注入配置格式错误（需要 rules 列表）: {path}")
+        rules = [FaultRule(spec) for spec in profile.get("rules", [])]
+        logger.info(f"已加载故障注入配置 {path}：{len(rules)} 条规则")
+        return cls(rules, profile.get("seed"), path)
+
+    def _rule_for(self, request: httpx.Request) -> Optional[FaultRule]:
+        template = endpoint_template(request.url.path)
+        for rule in self.rules:
+            if rule.matches(template):
+                return rule
+        return None
+
+    def plan(self, request: httpx.Request) -> Optional[_Plan]:
+        rule = self._rule_for(request)
+        if rule is None:
+            return None
+        plan = _Plan(rule)
+        with self._lock:
+            rule.stats["requests"] += 1
+            if rule.latency is not None:
+                plan.delay = rule.latency.sample(self._random)
+            if rule.reset_rate and self._random.random() < rule.reset_rate:
+                plan.reset = True
+            elif rule.burst_left:
+                rule.burst_left -= 1
+                plan.status = rule.status
+            elif rule.error_rate and self._random.random() < rule.error_rate:
+                rule.burst_left = rule.burst - 1
+                plan.status = rule.status
+            elif rule.slow_body_rate and self._random.random() < rule.slow_body_rate:
+                plan.slow_body = True
+        return plan
+
+    def chunk_delay(self, rule: FaultRule) -> float:
+        with self._lock:
+            return rule.chunk_delay.sample(self._random)
+
+    def count(self, rule: FaultRule, key: str, amount: float = 1) -> None:
+        with self._lock:
+            rule.stats[key] += amount
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {rule.match: rule.summary() for rule in self.rules if rule.stats["requests"]}
+
+    def write(self, path: str) -> Dict[str, Dict[str, Any]]:
+        """把注入统计写入 JSON 文件并返回，path 为空时只返回不写文件"""
+        summary = self.summary()
+        if not path:
+            return summary
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"profile": self.source, "rules": summary}, f, ensure_ascii=False, indent=2)
+        return summary
+
+
+def _read_timeout(request: httpx.Request) -> Optional[float]:
+    return (request.extensions.get("timeout") or {}).get("read")
+
+
+def _error_response(request: httpx.Request, status: int) -> httpx.Response:
+    body = {"code": str(status), "success": False, "msg": f"注入的故障 HTTP {status}"}
+    return httpx.Response(status, json=body, request=request)
+
+
+class _SlowBody(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """按块延迟返回的响应体，单块等待超过读超时时抛 ReadTimeout"""
+
+    def __init__(self, injector: FaultInjector, plan: _Plan, request: httpx.Request, content: bytes):
+        self.injector = injector
+        self.plan = plan
+        self.request = request
+        self.content = content
+
+    def _chunks(self) -> Iterator[bytes]:
+        size = self.plan.rule.chunk_size
+        for start in range(0, len(self.content), size):
+            yield self.content[start:start + size]
+
+    def _next_delay(self) -> float:
+        delay = self.injector.chunk_delay(self.plan.rule)
+        timeout = _read_timeout(self.request)
+        return delay if timeout is None else min(delay, timeout)
+
+    def _check_timeout(self, delay: float) -> None:
+        timeout = _read_timeout(self.request)
+        self.injector.count(self.plan.rule, "delay_s", delay)
+        if timeout is not None and delay >= timeout:
+            self.injector.count(self.plan.rule, "timeouts")
+            raise httpx.ReadTimeout("注入的慢响应体读取超时", request=self.request)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._chunks():
+            delay = self._next_delay()
+            time.sleep(delay)
+            self._check_timeout(delay)
+            yield chunk
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self._chunks():
+            delay = self._next_delay()
+            await asyncio.sleep(delay)
+            self._check_timeout(delay)
+            yield chunk
+
+
+class FaultTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """包装真实传输层（或 cassette 传输层），按 FaultInjector 的决定注入故障"""
+
+    def __init__(self, injector: FaultInjector, transport: Any):
+        self.injector = injector
+        self.transport = transport
+
+    def _before(self, plan: _Plan, request: httpx.Request) -> float:
+        """返回应等待的秒数；超过读超时时只等到读超时"""
+        timeout = _read_timeout(request)
+        delay = plan.delay if timeout is None else min(plan.delay, timeout)
+        self.injector.count(plan.rule, "delay_s", delay)
+        return delay
+
+    def _after_delay(self, plan: _Plan, request: httpx.Request) -> Optional[httpx.Response]:
+        timeout = _read_timeout(request)
+        if timeout is not None and plan.delay >= timeout:
+            self.injector.count(plan.rule, "timeouts")
+            raise httpx.ReadTimeout("注入的延迟超过读超时", request=request)
+        if plan.reset:
+            self.injector.count(plan.rule, "resets")
+            raise httpx.ReadError("注入的连接重置: Connection reset by peer", request=request)
+        if plan.status is not None:
+            self.injector.count(plan.rule, "errors")
+            return _error_response(request, plan.status)
+        return None
+
+    def _slow(self, plan: _Plan, request: httpx.Request, response: httpx.Response) -> httpx.Response:
+        self.injector.count(plan.rule, "slow_bodies")
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _DROPPED_HEADERS]
+        return httpx.Response(response.status_code, headers=headers,
+                              stream=_SlowBody(self.injector, plan, request, response.content),
+                              request=request, extensions=response.extensions)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        plan = self.injector.plan(request)
+        if plan is None:
+            return self.transport.handle_request(request)
+        time.sleep(self._before(plan, request))
+        injected = self._after_delay(plan, request)
+        if injected is not None:
+            return injected
+        response = self.transport.handle_request(request)
+        if not plan.slow_body:
+            return response
+        try:
+            response.read()
+        finally:
+            response.close()
+        return self._slow(plan, request, response)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        plan = self.injector.plan(request)
+        if plan is None:
+            return await self.transport.handle_async_request(request)
+        await asyncio.sleep(self._before(plan, request))
+        injected = self._after_delay(plan, request)
+        if injected is not None:
+            return injected
+        response = await self.transport.handle_async_request(request)
+        if not plan.slow_body:
+            return response
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        return self._slow(plan, request, response)
+
+    def close(self) -> None:
+        self.transport.close()
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+_active: Optional[FaultInjector] = None
+_active_path = ""
+_active_lock = threading.Lock()
+
+
+def active_injector() -> Optional[FaultInjector]:
+    """按 FAULT_PROFILE 返回本进程共用的注入器，未配置时返回 None"""
+    global _active, _active_path
+    path = config.FAULT_PROFILE
+    if not path:
+        return None
+    with _active_lock:
+        if _active is None or _active_path != path:
+            _active, _active_path = FaultInjector.load(path), path
+        return _active
+
+
+def fault_transport(inner: Optional[httpx.BaseTransport] = None,
+                    **transport_kwargs: Any) -> Optional[httpx.BaseTransport]:
+    """同步客户端的传输层：未配置 FAULT_PROFILE 时原样返回 inner（可为 None）"""
+    injector = active_injector()
+    if injector is None:
+        return inner
+    return FaultTransport(injector, inner or httpx.HTTPTransport(**transport_kwargs))
+
+
+def async_fault_transport(inner: Optional[httpx.AsyncBaseTransport] = None,
+                          **transport_kwargs: Any) -> Optional[httpx.AsyncBaseTransport]:
+    """异步客户端的传输层，inner 为 None 时用 transport_kwargs（如 limits）创建 AsyncHTTPTransport"""
+    injector = active_injector()
+    if injector is None:
+        return inner
+    return FaultTransport(injector, inner or httpx.AsyncHTTPTransport(**transport_kwargs))
+
+
+def finish() -> None:
+    """会话结束：输出并写入各规则的注入统计"""
+    if _active is None:
+        return
+    summary = _active.write(config.report_file(config.FAULT_REPORT_FILE, "fault_injection.json"))
+    for match, stats in summary.items():
+        logger.info(
+            f"故障注入 {match}: 请求={stats['requests']} 注入延迟={stats['delay_s']}s "
+            f"重置={stats['resets']} 5xx={stats['errors']} 慢响应体={stats['slow_bodies']} "
+            f"超时={stats['timeouts']}")
@@ -1,16 +1,117 @@
 import os
+import pickle
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import yaml
 from dotenv import load_dotenv
 
 from utils.logger import logger
 
+# 优先使用 libyaml 提供的 C 解析器
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class _TemplateEntry:
+    """单个 YAML 文件的缓存项"""
+
+    __slots__ = ("version", "frozen", "sections", "compiled")
+
+    def __init__(self, version: Tuple[int, int], frozen: bytes):
+        self.version = version
+        self.frozen = frozen
+        self.sections: Dict[Any, bytes] = {}
+        self.compiled: Dict[Callable, Any] = {}
+
+
+class YamlTemplateStore:
+    """进程级 YAML 模板缓存
+
+    - 以解析后的真实路径为键，文件只解析一次
+    - 文件 mtime/大小变化时自动失效重新解析
+    - 缓存内容以 pickle 字节保存，每次取用都反序列化出独立副本，
+      调用方随意修改也不会污染缓存
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _TemplateEntry] = {}
+        self._lock = threading.Lock()
+
+    def _get_entry(self, file_path) -> _TemplateEntry:
+        path = os.path.realpath(file_path)
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.version == version:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry.version != version:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = yaml.load(f, Loader=_YamlLoader)
+                entry = _TemplateEntry(
+                    version, pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+                self._entries[path] = entry
+                logger.debug(f"YAML 模板已加载: {path}")
+            return entry
+
+    def load(self, file_path) -> Any:
+        """返回整个文件内容的独立副本"""
+        return pickle.loads(self._get_entry(file_path).frozen)
+
+    def section(self, file_path, section: str) -> Any:
+        """返回顶层某个配置段的独立副本，配置段不存在时返回 None"""
+        entry = self._get_entry(file_path)
+        frozen = entry.sections.get(section)
+        if frozen is None:
+            raw_data = pickle.loads(entry.frozen)
+            value = raw_data.get(section) if isinstance(raw_data, dict) else None
+            frozen = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            entry.sections[section] = frozen
+        return pickle.loads(frozen)
+
+    def compiled(self, file_path, factory: Callable[[Any], Any]) -> Any:
+        """返回 factory(文件内容) 的缓存结果，文件变化后重新编译
+
+        编译结果在调用方之间共享，factory 应返回不可变对象。
+        """
+        entry = self._get_entry(file_path)
+        result = entry.compiled.get(factory)
+        if result is None:
+            result = factory(pickle.loads(entry.frozen))
+            entry.compiled[factory] = result
+        return result
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+
+template_store = YamlTemplateStore()
+
 
 def load_yaml_data(file_path):
-    """从文件路径加载 YAML 数据"""
+    """从文件路径加载 YAML 数据（经模板缓存，返回独立副本）"""
+    try:
+        return template_store.load(file_path)
+    except FileNotFoundError:
+        logger.error(f"YAML 文件不存在: {file_path}")
+        return None
+    except yaml.YAMLError as e:
+        logger.error(f"YAML 解析错误: {file_path}: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"加载 YAML 失败: {file_path}: {e}")
+        return None
+
+
+def load_yaml_section(file_path, section: str) -> Optional[Any]:
+    """加载 YAML 顶层配置段的独立副本，文件或配置段不存在时返回 None"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return template_store.section(file_path, section)
     except FileNotFoundError:
         logger.error(f"YAML 文件不存在: {file_path}")
         return None
@@ -0,0 +1,74 @@
+"""会话开始的后端健康检查
+
+后端整体不可达时没有必要让每个用例都等满重试与轮询超时：
+conftest 在收集完用例后探测一次，按 HEALTH_CHECK_MODE 立即结束会话或跳过全部用例；
+单个服务不可用时断开该服务的熔断器，并跳过标记了 @pytest.mark.service(前缀) 的用例。
+
+探测用 GET 请求：收到任意 HTTP 响应即视为可达（网关对未知路径返回 404 也算），
+只有传输错误与 502/503/504（网关找不到后端实例）视为不可用。
+"""
+import time
+from typing import Dict, Iterable, Optional
+
+import httpx
+
+from utils.logger import logger
+
+UNAVAILABLE_STATUS = frozenset({502, 503, 504})
+
+
+class HealthReport:
+    """健康检查结果：reachable 为后端整体是否可达，services 为各服务前缀的不可用原因（可用为 None）"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.reachable = False
+        self.error: Optional[str] = None
+        self.services: Dict[str, Optional[str]] = {}
+        self.elapsed = 0.0
+
+    @property
+    def unavailable_services(self) -> Dict[str, str]:
+        return {prefix: reason for prefix, reason in self.services.items() if reason is not None}
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "base_url": self.base_url,
+            "reachable": self.reachable,
+            "error": self.error,
+            "services": self.services,
+            "elapsed_s": round(self.elapsed, 3),
+        }
+
+
+def _probe(client: httpx.Client, path: str) -> Optional[str]:
+    """返回不可用原因，可用返回 None"""
+    try:
+        response = client.get(path)
+    except httpx.HTTPError as e:
+        return f"{type(e).__name__}: {e}"
+    if response.status_code in UNAVAILABLE_STATUS:
+        return f"HTTP {response.status_code}"
+    return None
+
+
+def probe_backend(base_url: str, services: Iterable[str] = (), timeout: float = 3.0) -> HealthReport:
+    """探测后端根路径与各服务前缀"""
+    report = HealthReport(base_url)
+    started = time.monotonic()
+    with httpx.Client(base_url=base_url, timeout=timeout) as client:
+        report.error = _probe(client, "/")
+        report.reachable = report.error is None
+        if report.reachable:
+            for prefix in services:
+                report.services[prefix] = _probe(client, prefix.rstrip("/") + "/")
+    report.elapsed = time.monotonic() - started
+
+    if not report.reachable:
+        logger.error(f"健康检查：后端 {base_url} 不可达（{report.error}），耗时 {report.elapsed:.2f}s")
+    else:
+        for prefix, reason in report.unavailable_services.items():
+            logger.error(f"健康检查：服务 {prefix} 不可用（{reason}）")
+        logger.info(f"健康检查完成：后端可达，不可用服务 {len(report.unavailable_services)} 个，"
+                    f"耗时 {report.elapsed:.2f}s")
+    return report
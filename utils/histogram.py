@@ -0,0 +1,102 @@
+"""HDR 风格的延迟直方图：对数-线性固定分桶，内存占用小且可合并"""
+from typing import Dict, Iterable, Optional
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """记录延迟分布的直方图
+
+    以微秒为单位分桶：小于 2^sub_bits 的值逐一计数，更大的值按 2 的幂分段，
+    每段再线性切分为 2^(sub_bits-1) 个子桶，相对误差不超过 1/2^(sub_bits-1)
+    （默认 sub_bits=8，误差 < 0.8%，约 2 位有效数字）。
+    最小/最大值精确记录。非线程安全，多线程写入时由调用方加锁。
+    """
+
+    __slots__ = ("_sub_bits", "_sub_count", "_half", "_counts",
+                 "count", "total", "min", "max")
+
+    def __init__(self, sub_bits: int = 8):
+        self._sub_bits = sub_bits
+        self._sub_count = 1 << sub_bits
+        self._half = 1 << (sub_bits - 1)
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _index(self, micros: int) -> int:
+        if micros < self._sub_count:
+            return micros
+        shift = micros.bit_length() - self._sub_bits
+        return self._sub_count + (shift - 1) * self._half + ((micros >> shift) - self._half)
+
+    def _upper_bound(self, index: int) -> int:
+        """返回桶内最大的微秒值"""
+        if index < self._sub_count:
+            return index
+        offset = index - self._sub_count
+        shift = offset // self._half + 1
+        mantissa = offset % self._half + self._half
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        """记录一次耗时（秒）"""
+        if seconds < 0:
+            seconds = 0.0
+        index = self._index(int(seconds * 1_000_000))
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """合并另一个直方图（分桶参数需一致）"""
+        if other._sub_bits != self._sub_bits:
+            raise ValueError("直方图分桶参数不一致，无法合并")
+        for index, value in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + value
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """返回百分位值（秒），无数据时返回 None"""
+        if not self.count:
+            return None
+        if percent >= 100:
+            return self.max
+        target = max(1, int(self.count * percent / 100.0 + 0.5))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= target:
+                value = self._upper_bound(index) / 1_000_000
+                return min(value, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def summary(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, Optional[float]]:
+        """返回毫秒为单位的统计摘要"""
+        def _ms(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * 1000, 3)
+
+        result: Dict[str, Optional[float]] = {
+            "count": self.count,
+            "min_ms": _ms(self.min),
+            "mean_ms": _ms(self.mean),
+        }
+        for percent in percentiles:
+            result[f"p{percent:g}_ms"] = _ms(self.percentile(percent))
+        result["max_ms"] = _ms(self.max)
+        return result
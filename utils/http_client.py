@@ -0,0 +1,149 @@
+"""HTTP 客户端工厂：按 Config 统一连接池、keep-alive、HTTP/2、分项超时与连接预热
+
+登录、开交班与用例共用 conftest 的同一个 Client（同一个连接池），共享 AsyncClient、
+订单列表轮询与压测工具也由这里创建，传输层统一经过 cassette 与故障注入包装。
+
+- 连接池：同步 HTTP_MAX_CONNECTIONS / HTTP_MAX_KEEPALIVE，异步 ASYNC_MAX_CONNECTIONS /
+  ASYNC_MAX_KEEPALIVE，空闲连接 KEEPALIVE_EXPIRY 秒后关闭
+- 超时：HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT / HTTP_WRITE_TIMEOUT / HTTP_POOL_TIMEOUT
+- HTTP/2：HTTP2_ENABLED，需要安装 h2（pip install 'httpx[http2]'），未安装时退回 HTTP/1.1
+- 预热：warm_up / async_warm_up 并发发出 HTTP_WARMUP_CONNECTIONS 个探测请求，
+  在计时用例开始前建好连接，避免首个请求的建连/TLS 耗时与连接反复创建干扰耗时统计
+"""
+import asyncio
+import importlib.util
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Union
+
+import httpx
+
+from config import config
+from utils.cassette import active_cassette, async_cassette_transport, cassette_transport
+from utils.fault_injection import async_fault_transport, fault_transport
+from utils.logger import logger
+
+WARMUP_PATH = "/"
+
+TimeoutTypes = Union[None, float, httpx.Timeout]
+
+
+def client_timeout(timeout: TimeoutTypes = None) -> httpx.Timeout:
+    """timeout 为数字时四项超时相同，为 None 时按 Config 的分项超时"""
+    if isinstance(timeout, httpx.Timeout):
+        return timeout
+    if timeout is not None:
+        return httpx.Timeout(timeout)
+    return httpx.Timeout(
+        connect=config.HTTP_CONNECT_TIMEOUT,
+        read=config.HTTP_READ_TIMEOUT,
+        write=config.HTTP_WRITE_TIMEOUT,
+        pool=config.HTTP_POOL_TIMEOUT,
+    )
+
+
+def client_limits(max_connections: Optional[int] = None,
+                  max_keepalive: Optional[int] = None,
+                  asynchronous: bool = False) -> httpx.Limits:
+    """连接池上限，未指定时按 Config（同步/异步分别配置）"""
+    if max_connections is None:
+        max_connections = config.ASYNC_MAX_CONNECTIONS if asynchronous else config.HTTP_MAX_CONNECTIONS
+    if max_keepalive is None:
+        max_keepalive = config.ASYNC_MAX_KEEPALIVE if asynchronous else config.HTTP_MAX_KEEPALIVE
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(max_keepalive, max_connections),
+        keepalive_expiry=config.KEEPALIVE_EXPIRY,
+    )
+
+
+def http2_enabled() -> bool:
+    """HTTP2_ENABLED 且已安装 h2"""
+    if not config.HTTP2_ENABLED:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2_ENABLED 已开启但未安装 h2（pip install 'httpx[http2]'），使用 HTTP/1.1")
+        return False
+    return True
+
+
+def _transport_kwargs(limits: httpx.Limits) -> Dict[str, Any]:
+    return {"limits": limits, "http2": http2_enabled()}
+
+
+def create_client(base_url: Optional[str] = None, *, timeout: TimeoutTypes = None,
+                  limits: Optional[httpx.Limits] = None) -> httpx.Client:
+    """创建同步 Client，传输层经过 cassette 与故障注入"""
+    limits = limits or client_limits()
+    kwargs = _transport_kwargs(limits)
+    return httpx.Client(
+        base_url=base_url if base_url is not None else config.get_base_url(),
+        timeout=client_timeout(timeout),
+        transport=fault_transport(cassette_transport(**kwargs), **kwargs),
+        **kwargs,
+    )
+
+
+def create_async_client(base_url: Optional[str] = None, *, timeout: TimeoutTypes = None,
+                        limits: Optional[httpx.Limits] = None) -> httpx.AsyncClient:
+    """创建 AsyncClient（连接池与创建它的事件循环绑定），传输层经过 cassette 与故障注入"""
+    limits = limits or client_limits(asynchronous=True)
+    kwargs = _transport_kwargs(limits)
+    return httpx.AsyncClient(
+        base_url=base_url if base_url is not None else config.get_base_url(),
+        timeout=client_timeout(timeout),
+        transport=async_fault_transport(async_cassette_transport(**kwargs), **kwargs),
+        **kwargs,
+    )
+
+
+def _warmup_count(connections: Optional[int]) -> int:
+    """需要预热的连接数；录制/回放时不预热（回放没有真实连接，录制不记录探测请求）"""
+    if active_cassette() is not None:
+        return 0
+    return max(connections if connections is not None else config.HTTP_WARMUP_CONNECTIONS, 0)
+
+
+def _warmup_probe(client: httpx.Client) -> bool:
+    try:
+        client.get(WARMUP_PATH)
+        return True
+    except httpx.HTTPError as e:
+        logger.warning(f"连接预热请求失败: {type(e).__name__}: {e}")
+        return False
+
+
+def warm_up(client: httpx.Client, connections: Optional[int] = None) -> int:
+    """并发发出探测请求，让连接池预先建好连接，返回成功的请求数
+
+    任意 HTTP 响应（含 404）都说明连接已建立；探测请求不计入接口指标、熔断与限速。
+    """
+    count = _warmup_count(connections)
+    if count == 0:
+        return 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=count, thread_name_prefix="http-warmup") as executor:
+        opened = sum(executor.map(lambda _: _warmup_probe(client), range(count)))
+    logger.info(f"同步客户端连接预热完成：{opened}/{count}，耗时 {time.perf_counter() - started:.2f}s")
+    return opened
+
+
+async def _async_warmup_probe(client: httpx.AsyncClient) -> bool:
+    try:
+        await client.get(WARMUP_PATH)
+        return True
+    except httpx.HTTPError as e:
+        logger.warning(f"连接预热请求失败: {type(e).__name__}: {e}")
+        return False
+
+
+async def async_warm_up(client: httpx.AsyncClient, connections: Optional[int] = None) -> int:
+    """warm_up 的协程版本"""
+    count = _warmup_count(connections)
+    if count == 0:
+        return 0
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_async_warmup_probe(client) for _ in range(count)))
+    opened = sum(results)
+    logger.info(f"异步客户端连接预热完成：{opened}/{count}，耗时 {time.perf_counter() - started:.2f}s")
+    return opened
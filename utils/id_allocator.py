@@ -0,0 +1,226 @@
+"""订单号分配器：snowflake 风格
+
+同一分配器内（含多线程）生成的订单号保证不重复；不同进程/机器之间依赖
+worker 编号互不相同，见 resolve_worker_id。
+"""
+import os
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+from config import config
+from utils.logger import logger
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 自定义纪元 2025-01-01 00:00:00 UTC（毫秒）
+DEFAULT_EPOCH_MS = 1735689600000
+# 服务端按 Java long 存储订单号
+_INT64_MAX = 2 ** 63 - 1
+# 默认位布局：40 位时间戳可用到 2059 年，序列号 8 位即每 worker 每毫秒 256 个
+DEFAULT_WORKER_BITS = 8
+DEFAULT_SEQUENCE_BITS = 8
+
+
+class OrderIdAllocator:
+    """订单号分配器基类，自定义实现只需覆盖 next_id"""
+
+    def next_id(self) -> int:
+        raise NotImplementedError
+
+    def allocate(self, n: int) -> List[int]:
+        """批量分配 n 个订单号"""
+        return [self.next_id() for _ in range(n)]
+
+
+class SnowflakeIdAllocator(OrderIdAllocator):
+    """snowflake 风格订单号分配器
+
+    订单号 = 十进制测试前缀 + 定长补零的整数，整数按位布局：
+        | 毫秒时间戳(相对纪元) | worker 位 | 序列号 |
+    默认 40 + 8 + 8 位，前缀 "53" 时订单号为 19 位且不超过 int64。
+
+    - worker 位区分机器/进程，见 resolve_worker_id；worker 编号不同的分配器
+      生成的订单号一定不同，超出 worker 位范围时直接报错
+    - 同一毫秒内序列号递增，用尽时借用下一毫秒，任意速率都不阻塞
+    - 时钟回拨时沿用上次时间戳继续递增，保证单调
+    """
+
+    def __init__(
+        self,
+        prefix: str = "53",
+        worker_id: Optional[int] = None,
+        *,
+        epoch_ms: int = DEFAULT_EPOCH_MS,
+        timestamp_bits: int = 40,
+        worker_bits: int = DEFAULT_WORKER_BITS,
+        sequence_bits: int = DEFAULT_SEQUENCE_BITS,
+    ):
+        if prefix and not prefix.isdigit():
+            raise ValueError(f"订单号前缀必须为数字: {prefix!r}")
+
+        self.prefix = prefix
+        self.epoch_ms = epoch_ms
+        self.worker_bits = worker_bits
+        self.sequence_bits = sequence_bits
+        self.timestamp_bits = timestamp_bits
+
+        total_bits = timestamp_bits + worker_bits + sequence_bits
+        self._width = len(str(2 ** total_bits - 1))
+        if int(f"{prefix}{'9' * self._width}") > _INT64_MAX:
+            raise ValueError(f"前缀 {prefix!r} 与 {total_bits} 位布局会超出 int64 范围")
+
+        self._worker_mask = (1 << worker_bits) - 1
+        self._sequence_mask = (1 << sequence_bits) - 1
+        self._max_timestamp = (1 << timestamp_bits) - 1
+        if worker_id is None:
+            worker_id = resolve_worker_id(worker_bits)
+        if not 0 <= worker_id <= self._worker_mask:
+            raise ValueError(f"worker 编号 {worker_id} 超出 {worker_bits} 位范围 [0, {self._worker_mask}]")
+        self.worker_id = worker_id
+
+        self._last_timestamp = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def _current_timestamp(self) -> int:
+        return int(time.time() * 1000) - self.epoch_ms
+
+    def _next_raw(self) -> int:
+        # 调用方需持有锁
+        timestamp = max(self._current_timestamp(), self._last_timestamp)
+        if timestamp == self._last_timestamp:
+            self._sequence = (self._sequence + 1) & self._sequence_mask
+            if self._sequence == 0:
+                # 本毫秒序列号用尽，借用下一毫秒
+                timestamp += 1
+        else:
+            self._sequence = 0
+        if timestamp > self._max_timestamp:
+            raise OverflowError("订单号时间戳位已用尽，请调整 epoch_ms")
+        self._last_timestamp = timestamp
+
+        return (
+            (timestamp << (self.worker_bits + self.sequence_bits))
+            | (self.worker_id << self.sequence_bits)
+            | self._sequence
+        )
+
+    def _format(self, raw: int) -> int:
+        return int(f"{self.prefix}{raw:0{self._width}d}")
+
+    def next_id(self) -> int:
+        with self._lock:
+            raw = self._next_raw()
+        return self._format(raw)
+
+    def allocate(self, n: int) -> List[int]:
+        with self._lock:
+            raws = [self._next_raw() for _ in range(n)]
+        return [self._format(raw) for raw in raws]
+
+    def timestamp_ms_of(self, order_id) -> Optional[int]:
+        """从本分配器生成的订单号中解析出毫秒时间戳，无法解析时返回 None"""
+        text = str(order_id)
+        if not text.startswith(self.prefix) or len(text) != len(self.prefix) + self._width:
+            return None
+        body = text[len(self.prefix):]
+        if not body.isdigit():
+            return None
+        return (int(body) >> (self.worker_bits + self.sequence_bits)) + self.epoch_ms
+
+
+def resolve_worker_id(worker_bits: int) -> int:
+    """确定当前进程的 worker 编号
+
+    - 环境变量 MT_ORDER_ID_WORKER：显式分配，由使用方保证各进程互不相同；超出 worker 位范围时报错
+    - 否则调用 lease_worker_id 租用一个编号（同机 xdist worker、压测子进程等自动互不相同）
+    """
+    explicit = config.MT_ORDER_ID_WORKER
+    if explicit:
+        limit = 1 << worker_bits
+        worker_id = int(explicit)
+        if not 0 <= worker_id < limit:
+            raise ValueError(f"MT_ORDER_ID_WORKER={worker_id} 超出 {worker_bits} 位范围 [0, {limit - 1}]")
+        return worker_id
+    return lease_worker_id(worker_bits)
+
+
+# 已租用编号的锁文件描述符，进程存活期间保持打开
+_leased_fds: List[int] = []
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def lease_worker_id(worker_bits: int, lease_dir: Optional[str] = None) -> int:
+    """在租约目录中租用一个空闲的 worker 编号
+
+    对 worker-<编号>.lock 加非阻塞的独占文件锁，成功即租到该编号；锁在进程存活期间一直持有，
+    进程退出（含异常退出）后由操作系统释放，不会留下过期租约。共用同一目录的进程之间编号一定不同；
+    多台机器同时推单时需把 MT_ORDER_ID_LEASE_DIR 指向共享存储，或为每个进程显式设置
+    MT_ORDER_ID_WORKER。编号全部被占用时报错，不会退回到可能冲突的编号。
+    """
+    limit = 1 << worker_bits
+    lease_dir = lease_dir or config.MT_ORDER_ID_LEASE_DIR or os.path.join(
+        tempfile.gettempdir(), "mt_order_id_workers")
+    os.makedirs(lease_dir, exist_ok=True)
+    for worker_id in range(limit):
+        path = os.path.join(lease_dir, f"worker-{worker_id}.lock")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if _try_lock(fd):
+            _leased_fds.append(fd)
+            logger.info(f"租用订单号 worker 编号 {worker_id}: {path}")
+            return worker_id
+        os.close(fd)
+    raise ValueError(
+        f"{lease_dir} 中的 {limit} 个订单号 worker 编号均已被占用，"
+        f"请减少并发进程数或显式设置 MT_ORDER_ID_WORKER")
+
+
+_default_allocator: Optional[OrderIdAllocator] = None
+_default_lock = threading.Lock()
+
+
+def get_mt_order_id_allocator() -> OrderIdAllocator:
+    """返回美团订单号分配器，首次调用时按 Config 创建"""
+    global _default_allocator
+    if _default_allocator is None:
+        with _default_lock:
+            if _default_allocator is None:
+                allocator = SnowflakeIdAllocator(prefix=config.MT_ORDER_ID_PREFIX)
+                logger.info(
+                    f"美团订单号分配器: 前缀={allocator.prefix}, worker={allocator.worker_id}")
+                _default_allocator = allocator
+    return _default_allocator
+
+
+def set_mt_order_id_allocator(allocator: Optional[OrderIdAllocator]) -> None:
+    """替换美团订单号分配器，传 None 时恢复默认"""
+    global _default_allocator
+    _default_allocator = allocator
+
+
+def _reset_after_fork() -> None:
+    # 父进程租用的编号仍归父进程，子进程需要重新租用
+    global _default_allocator, _default_lock
+    _default_allocator = None
+    _default_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,217 @@
+"""增量 JSON 解析：边读响应体边产出结果，调用方可随时停止读取
+
+- JsonArrayStream：定位 "键": [ 后逐个解码数组元素（如订单列表项），
+  只保留未解码完的尾部，不必把整页列表解码成一棵树
+- JsonKeyStream：在字节流中查找候选键的标量值（如详情中的外卖单号字段）
+
+两者都是推式解析器：feed() 送入数据块返回新产出的结果，close() 结束输入。
+构造时传入 source（同步或异步的数据块迭代器）后可直接 for / async for。
+JSON 字符串内的引号必须转义，所以 "键": 这样的片段只会出现在真正的键上，
+按正则定位是可靠的。
+"""
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple, Union
+
+Chunk = Union[bytes, str]
+
+_SKIP_SEPARATORS = re.compile(r"[\s,]*")
+# 值为数字/字面量且恰好位于缓冲区末尾时可能被截断，需等下一块
+_SCALAR_VALUE = r'"(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null'
+# 判断数组元素是否到齐时关心的字符：字符串外的括号与引号，字符串内的引号与转义
+_STRUCTURE_TOKEN = re.compile(r'[{}\[\]"]')
+_STRING_TOKEN = re.compile(r'["\\]')
+
+
+class _StreamParser:
+    def __init__(self, source: Any = None, encoding: str = "utf-8"):
+        self.source = source
+        self.bytes_read = 0
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._buf = ""
+        self._closed = False
+
+    def _decode(self, data: Chunk) -> str:
+        if isinstance(data, bytes):
+            self.bytes_read += len(data)
+            return self._decoder.decode(data)
+        self.bytes_read += len(data)
+        return data
+
+    def _drain(self, final: bool) -> List[Any]:
+        raise NotImplementedError
+
+    def feed(self, data: Chunk) -> List[Any]:
+        """送入一个数据块，返回本块解析出的结果"""
+        self._buf += self._decode(data)
+        return self._drain(final=False)
+
+    def close(self) -> List[Any]:
+        """输入结束，返回剩余结果"""
+        if self._closed:
+            return []
+        self._closed = True
+        self._buf += self._decoder.decode(b"", final=True)
+        return self._drain(final=True)
+
+    def __iter__(self) -> Iterator[Any]:
+        for chunk in self.source:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        async for chunk in self.source:
+            for result in self.feed(chunk):
+                yield result
+        for result in self.close():
+            yield result
+
+
+class JsonArrayStream(_StreamParser):
+    """逐个产出第一个 "array_key": [...] 数组的元素
+
+    响应中没有该数组时（如错误响应）不产出任何元素，close() 后
+    document 为解析出的完整响应体。
+    """
+
+    def __init__(self, array_key: str, source: Any = None, encoding: str = "utf-8"):
+        super().__init__(source, encoding)
+        self.array_key = array_key
+        self.found = False
+        self.finished = False
+        self.items_read = 0
+        self.document: Any = None
+        self._quoted_key = '"%s"' % array_key
+        self._start = re.compile(r'"%s"\s*:\s*\[' % re.escape(array_key))
+        self._start_prefix = re.compile(r'"%s"\s*(?::\s*)?' % re.escape(array_key))
+        self._json = json.JSONDecoder()
+        # 数组起点的搜索位置：之前的内容已确认没有起点，只有末尾可能是被截断的起点
+        self._start_from = 0
+        # 未到齐元素的扫描状态：已扫描到的位置、括号深度、是否在字符串中；None 表示没有未到齐的元素
+        self._item_scan: Optional[int] = None
+        self._item_depth = 0
+        self._item_in_string = False
+
+    def _find_start(self) -> Optional[re.Match]:
+        buf = self._buf
+        match = self._start.search(buf, self._start_from)
+        if match is None:
+            last = buf.rfind(self._quoted_key, self._start_from)
+            if last >= 0 and self._start_prefix.fullmatch(buf, last):
+                self._start_from = last
+            else:
+                self._start_from = max(self._start_from, len(buf) - len(self._quoted_key) + 1)
+        return match
+
+    def _item_arrived(self, buf: str, start: int) -> bool:
+        """从 start 开始的对象/数组/字符串元素是否已完整到达
+
+        只扫描新到的数据并跨数据块保留括号深度，元素到齐前不调用 raw_decode，
+        大元素被切成很多小块时不会反复从头解码。
+        """
+        if self._item_scan is None:
+            self._item_scan, self._item_depth, self._item_in_string = start, 0, False
+        pos, depth, in_string = self._item_scan, self._item_depth, self._item_in_string
+        arrived = False
+        while True:
+            match = (_STRING_TOKEN if in_string else _STRUCTURE_TOKEN).search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            token = match.group()
+            if token == "\\":
+                if match.end() >= len(buf):
+                    # 转义被切开，下次从反斜杠重新扫描
+                    pos = match.start()
+                    break
+                pos = match.end() + 1
+                continue
+            pos = match.end()
+            if token == '"':
+                in_string = not in_string
+            elif token in "{[":
+                depth += 1
+            else:
+                depth -= 1
+            if depth == 0 and not in_string:
+                arrived = True
+                break
+        self._item_scan, self._item_depth, self._item_in_string = pos, depth, in_string
+        return arrived
+
+    def _drain(self, final: bool) -> List[Any]:
+        if not self.found:
+            match = self._find_start()
+            if match is None:
+                if final:
+                    self.document = json.loads(self._buf)
+                return []
+            self.found = True
+            self._buf = self._buf[match.end():]
+
+        items: List[Any] = []
+        buf = self._buf
+        pos = 0
+        while not self.finished:
+            pos = _SKIP_SEPARATORS.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+            if buf[pos] == "]":
+                self.finished = True
+                pos += 1
+                break
+            if not final and buf[pos] in '{["' and not self._item_arrived(buf, pos):
+                break
+            try:
+                value, end = self._json.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break
+            if end == len(buf) and not final and not isinstance(value, (dict, list, str)):
+                break
+            items.append(value)
+            self._item_scan = None
+            pos = end
+        if self._item_scan is not None:
+            self._item_scan -= pos
+        self._buf = buf[pos:]
+        self.items_read += len(items)
+        if final and not self.finished:
+            raise ValueError(f"响应体在 {self.array_key} 数组中途结束")
+        return items
+
+
+class JsonKeyStream(_StreamParser):
+    """按文档顺序产出候选键的 (键, 值)，值为 None 的跳过
+
+    只识别标量值；为处理跨块的匹配，缓冲区保留最多 tail 个字符的尾部，
+    超过该长度的字符串值可能漏检。
+    """
+
+    def __init__(self, keys: Iterable[str], source: Any = None,
+                 encoding: str = "utf-8", tail: int = 4096):
+        super().__init__(source, encoding)
+        self.keys = frozenset(keys)
+        self._tail = tail
+        alternatives = "|".join(re.escape(key) for key in sorted(self.keys, key=len, reverse=True))
+        self._pattern = re.compile(r'"(%s)"\s*:\s*(%s)' % (alternatives, _SCALAR_VALUE))
+
+    def _drain(self, final: bool) -> List[Tuple[str, Any]]:
+        results: List[Tuple[str, Any]] = []
+        buf = self._buf
+        keep_from: Optional[int] = None
+        last_end = 0
+        for match in self._pattern.finditer(buf):
+            if match.end() == len(buf) and not final:
+                keep_from = match.start()
+                break
+            value = json.loads(match.group(2))
+            if value is not None:
+                results.append((match.group(1), value))
+            last_end = match.end()
+        if keep_from is None:
+            keep_from = max(last_end, len(buf) - self._tail)
+        self._buf = buf[keep_from:]
+        return results
@@ -0,0 +1,123 @@
+"""响应字段提取：按候选键查找，并按接口记住字段所在路径
+
+整棵 JSON 遍历的开销与响应大小成正比，而同一接口的响应结构是稳定的。
+KeyPathExtractor 首次全量遍历时记下候选键出现的路径（列表下标统一记为通配），
+之后同一接口的响应先只按已学到的路径取值，取不到（或调用方要找的值不在其中）时
+才回退到全量遍历并补充路径。
+"""
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 路径中的列表通配：匹配列表中的每个元素
+EACH = None
+
+# 路径：从根到候选键的各级键名（列表层为 EACH），最后一级为候选键本身
+KeyPath = Tuple[Optional[str], ...]
+# 匹配结果：(候选键, 值, 所在的 dict)
+KeyMatch = Tuple[str, Any, Dict[str, Any]]
+
+
+def _resolve(node: Any, path: KeyPath, depth: int, out: List[KeyMatch]) -> None:
+    last = len(path) - 1
+    while depth < last:
+        step = path[depth]
+        if step is EACH:
+            if not isinstance(node, list):
+                return
+            for element in node:
+                _resolve(element, path, depth + 1, out)
+            return
+        if not isinstance(node, dict):
+            return
+        node = node.get(step)
+        depth += 1
+    if isinstance(node, dict):
+        key = path[last]
+        value = node.get(key)
+        if value is not None:
+            out.append((key, value, node))
+
+
+class KeyPathExtractor:
+    """按候选键提取字段，按上下文（通常为接口路径）缓存字段路径
+
+    只有候选键的值会被取出，值为 None 视为不存在。同一 dict 内的候选键先于
+    其子结构返回，整体按文档顺序。学到的路径按上下文共享，可跨线程使用。
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = frozenset(keys)
+        self.hits = 0
+        self.misses = 0
+        self._learned: Dict[str, Tuple[KeyPath, ...]] = {}
+        self._lock = threading.Lock()
+
+    def _walk(self, obj: Any) -> Iterator[Tuple[KeyPath, KeyMatch]]:
+        keys = self.keys
+        stack: List[Tuple[Any, KeyPath]] = [(obj, ())]
+        while stack:
+            current, path = stack.pop()
+            if isinstance(current, dict):
+                children = []
+                for key, value in current.items():
+                    if key in keys and value is not None:
+                        yield path + (key,), (key, value, current)
+                    if isinstance(value, (dict, list)):
+                        children.append((value, path + (key,)))
+                stack.extend(reversed(children))
+            elif isinstance(current, list):
+                child_path = path + (EACH,)
+                stack.extend((value, child_path) for value in reversed(current)
+                             if isinstance(value, (dict, list)))
+
+    def learned_paths(self, context: str) -> Tuple[KeyPath, ...]:
+        return self._learned.get(context, ())
+
+    def extract(self, obj: Any, context: str,
+                accept: Optional[Callable[[KeyMatch], bool]] = None) -> List[KeyMatch]:
+        """返回 obj 中候选键的所有匹配
+
+        先按 context 已学到的路径取值，有满足 accept 的结果（未传 accept 时为任意结果）
+        即返回；否则全量遍历，并把本次出现过的路径并入 context 的已学路径。
+        响应结构变化时，要找的值可能在未学到的路径上，调用方应传 accept。
+        """
+        matches: List[KeyMatch] = []
+        paths = self._learned.get(context)
+        if paths:
+            for path in paths:
+                _resolve(obj, path, 0, matches)
+            if matches and (accept is None or any(accept(match) for match in matches)):
+                self.hits += 1
+                return matches
+            matches = []
+
+        self.misses += 1
+        found: Dict[KeyPath, None] = {}
+        for path, match in self._walk(obj):
+            found[path] = None
+            matches.append(match)
+        if found:
+            with self._lock:
+                merged = dict.fromkeys(self._learned.get(context, ()))
+                merged.update(found)
+                self._learned[context] = tuple(merged)
+        return matches
+
+    def first(self, obj: Any, context: str) -> Optional[KeyMatch]:
+        """返回第一个匹配，没有返回 None；命中已学路径时不再解析其余路径"""
+        matches: List[KeyMatch] = []
+        for path in self._learned.get(context, ()):
+            _resolve(obj, path, 0, matches)
+            if matches:
+                self.hits += 1
+                return matches[0]
+        matches = self.extract(obj, context)
+        return matches[0] if matches else None
+
+    def forget(self, context: Optional[str] = None) -> None:
+        """清除某个上下文（默认全部）学到的路径"""
+        with self._lock:
+            if context is None:
+                self._learned.clear()
+            else:
+                self._learned.pop(context, None)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""延迟分布：本地替身服务的响应延迟、客户端故障注入与压测工具共用
+
+支持固定 "5ms"、均匀 "uniform:5ms-50ms"、指数 "exp:10ms"、
+对数正态 "lognormal:median=20ms,p99=200ms"。
+"""
+import math
+import random
+import re
+from typing import Optional, Union
+
+
+_DURATION = re.compile(r"\s*([\d.]+)\s*(ms|s)?\s*")
+
+
+def _seconds(text: str) -> float:
+    """解析时长，如 5ms / 0.2s，纯数字按秒计"""
+    match = _DURATION.fullmatch(text)
+    if not match:
+        raise ValueError(f"无效的时长: {text!r}")
+    return float(match.group(1)) * (0.001 if match.group(2) == "ms" else 1)
+
+
+class LatencyDistribution:
+    """延迟分布，sample() 返回秒
+
+    sample 可传入 random.Random 实例，故障注入器用自己的带种子随机源，保证同一种子下
+    注入的延迟可复现；不传时使用 random 模块的全局随机源。
+    """
+
+    # 标准正态分布的 99 分位点
+    _Z99 = 2.3263
+
+    def __init__(self, kind: str = "fixed", **params: float):
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: Union[str, float, "LatencyDistribution", None]) -> "LatencyDistribution":
+        """解析 5ms / uniform:5ms-50ms / exp:10ms / lognormal:median=20ms,p99=200ms"""
+        if isinstance(spec, LatencyDistribution):
+            return spec
+        if spec is None or spec == "":
+            return cls("fixed", value=0.0)
+        if isinstance(spec, (int, float)):
+            return cls("fixed", value=float(spec))
+        kind, _, args = spec.partition(":")
+        if not args:
+            return cls("fixed", value=_seconds(kind))
+        if kind == "uniform":
+            low, _, high = args.partition("-")
+            return cls("uniform", low=_seconds(low), high=_seconds(high))
+        if kind == "exp":
+            return cls("exp", mean=_seconds(args))
+        if kind == "lognormal":
+            values = dict(part.split("=", 1) for part in args.split(","))
+            median, p99 = _seconds(values["median"]), _seconds(values["p99"])
+            if median <= 0 or p99 < median:
+                raise ValueError(f"对数正态分布要求 0 < median <= p99: {spec!r}")
+            return cls("lognormal", mu=math.log(median), sigma=math.log(p99 / median) / cls._Z99)
+        raise ValueError(f"未知的延迟分布: {spec!r}")
+
+    def sample(self, rng: Optional[random.Random] = None) -> float:
+        rng = rng or random
+        p = self.params
+        if self.kind == "uniform":
+            return rng.uniform(p["low"], p["high"])
+        if self.kind == "exp":
+            return rng.expovariate(1 / p["mean"]) if p["mean"] > 0 else 0.0
+        if self.kind == "lognormal":
+            return rng.lognormvariate(p["mu"], p["sigma"])
+        return p["value"]
+
+    def __repr__(self) -> str:
+        return f"<LatencyDistribution {self.kind} {self.params}>"
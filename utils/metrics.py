@@ -0,0 +1,169 @@
+"""接口指标：按接口模板统计延迟、状态码、重试次数与响应大小
+
+safe_post / async_safe_post 每次请求记录一次（含失败），重试次数由 utils.retry_policy 计数，
+瞬时值（如自适应并发上限）通过 set_gauge 记录最新值。
+延迟使用固定分桶的 LatencyHistogram，响应大小按 2 的幂分桶，记录开销为常数。
+会话结束时由 conftest 输出各接口 p50/p90/p99/max（Allure 附件 + JSON 文件）。
+"""
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional, Union
+from urllib.parse import urlsplit
+
+from utils.histogram import LatencyHistogram
+
+SUMMARY_PERCENTILES = (50.0, 90.0, 99.0)
+
+# 路径中的数字 / 32 位十六进制 / UUID 段视为参数
+_ID_SEGMENT = re.compile(
+    r"^(?:\d+|[0-9a-fA-F]{32}|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$"
+)
+
+
+def endpoint_template(endpoint: str) -> str:
+    """去掉协议/主机与查询串（如 ?newgetTime=），路径中的 ID 段替换为 {id}"""
+    path = urlsplit(endpoint).path or "/"
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment
+                    for segment in path.split("/"))
+
+
+class SizeHistogram:
+    """按 2 的幂分桶的字节数分布，百分位返回桶上界"""
+
+    __slots__ = ("_counts", "count", "total", "max")
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, size: int) -> None:
+        self._counts[size.bit_length()] += 1
+        self.count += 1
+        self.total += size
+        if size > self.max:
+            self.max = size
+
+    def percentile(self, percent: float) -> Optional[int]:
+        if not self.count:
+            return None
+        target = max(1, int(self.count * percent / 100.0 + 0.5))
+        seen = 0
+        for bits in sorted(self._counts):
+            seen += self._counts[bits]
+            if seen >= target:
+                return min((1 << bits) - 1, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Optional[int]]:
+        result: Dict[str, Optional[int]] = {
+            "mean_bytes": self.total // self.count if self.count else None,
+        }
+        for percent in SUMMARY_PERCENTILES:
+            result[f"p{percent:g}_bytes"] = self.percentile(percent)
+        result["max_bytes"] = self.max if self.count else None
+        return result
+
+
+class EndpointMetrics:
+    """单个接口模板的指标"""
+
+    __slots__ = ("latency", "sizes", "statuses", "retries", "gauges")
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.sizes = SizeHistogram()
+        self.statuses: Counter = Counter()
+        self.retries = 0
+        self.gauges: Dict[str, float] = {}
+
+    def summary(self) -> Dict[str, Any]:
+        errors = sum(n for status, n in self.statuses.items() if not status.startswith("2"))
+        result = {
+            "count": self.latency.count,
+            "errors": errors,
+            "retries": self.retries,
+            "status": dict(self.statuses.most_common()),
+            "latency": self.latency.summary(SUMMARY_PERCENTILES),
+            "size": self.sizes.summary(),
+        }
+        if self.gauges:
+            result["gauges"] = dict(self.gauges)
+        return result
+
+
+class MetricsRegistry:
+    """线程安全的接口指标注册表"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointMetrics] = {}
+
+    def _get(self, endpoint: str) -> EndpointMetrics:
+        template = endpoint_template(endpoint)
+        metrics = self._endpoints.get(template)
+        if metrics is None:
+            metrics = self._endpoints[template] = EndpointMetrics()
+        return metrics
+
+    def record(self, endpoint: str, seconds: float, status: Union[int, str],
+               size: Optional[int] = None) -> None:
+        """记录一次请求；status 为 HTTP 状态码，请求未完成时为异常类名"""
+        with self._lock:
+            metrics = self._get(endpoint)
+            metrics.latency.record(seconds)
+            metrics.statuses[str(status)] += 1
+            if size is not None:
+                metrics.sizes.record(size)
+
+    def record_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self._get(endpoint).retries += 1
+
+    def set_gauge(self, endpoint: str, name: str, value: float) -> None:
+        """记录接口的瞬时值（覆盖上一次）"""
+        with self._lock:
+            self._get(endpoint).gauges[name] = value
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """各接口统计，按请求数倒序"""
+        with self._lock:
+            items = sorted(self._endpoints.items(), key=lambda kv: kv[1].latency.count, reverse=True)
+            return {template: metrics.summary() for template, metrics in items}
+
+    def write(self, path: str) -> Dict[str, Dict[str, Any]]:
+        """把统计写入 JSON 文件并返回，path 为空时只返回不写文件"""
+        summary = self.summary()
+        if not path:
+            return summary
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+
+def format_summary(summary: Dict[str, Dict[str, Any]]) -> str:
+    """文本表格形式的接口延迟分布"""
+    lines = []
+    for template, stats in summary.items():
+        latency = stats["latency"]
+        gauges = "".join(f" {name}={value}" for name, value in stats.get("gauges", {}).items())
+        lines.append(
+            f"{template}: n={stats['count']} err={stats['errors']} retry={stats['retries']} "
+            f"p50={latency['p50_ms']}ms p90={latency['p90_ms']}ms "
+            f"p99={latency['p99_ms']}ms max={latency['max_ms']}ms{gauges}"
+        )
+    return "\n".join(lines)
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,129 @@
+"""指数退避轮询：首次立即检查，之后间隔按倍数增长（带抖动）直到上限
+
+替代各处手写的 while time.time() - start < timeout: ...; time.sleep(固定间隔)。
+后端很快时几十毫秒内即可确认，后端慢时间隔逐步拉长、不会持续高频请求。
+截止时间基于 time.monotonic()，最后一次检查恰好落在截止时刻。
+
+    for _ in Poller(timeout, label=f"订单落库 {order_id}"):
+        if query(...):
+            return
+    raise AssertionError(...)
+
+协程中用 async for，休眠不阻塞事件循环。
+"""
+import random
+import time
+from typing import AsyncIterator, Iterator, Optional
+
+from config import config
+from utils import timing
+from utils.logger import logger
+
+
+class PollStats:
+    """一次轮询的统计：检查次数、休眠时间、总耗时"""
+
+    __slots__ = ("label", "polls", "slept", "elapsed", "succeeded")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.polls = 0
+        self.slept = 0.0
+        self.elapsed = 0.0
+        self.succeeded = False
+
+    def __repr__(self) -> str:
+        return (f"<PollStats {self.label} polls={self.polls} slept={self.slept:.3f}s "
+                f"elapsed={self.elapsed:.3f}s succeeded={self.succeeded}>")
+
+
+class Poller:
+    """按指数退避节奏产出轮询序号（从 1 开始），超时或达到最大次数后结束
+
+    调用方在循环体内检查条件，满足即 break/return（视为成功）；
+    循环自然结束说明超时，由调用方抛出各自的断言错误。
+    initial/factor/max_interval/jitter 默认取 POLL_* 配置。
+    """
+
+    def __init__(
+        self,
+        timeout: float,
+        *,
+        initial: Optional[float] = None,
+        factor: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        jitter: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        label: str = "",
+    ):
+        self.timeout = timeout
+        self.initial = initial if initial is not None else config.POLL_INITIAL_INTERVAL
+        self.factor = factor if factor is not None else config.POLL_BACKOFF_FACTOR
+        self.max_interval = max_interval if max_interval is not None else config.POLL_MAX_INTERVAL
+        self.jitter = jitter if jitter is not None else config.POLL_JITTER
+        self.max_attempts = max_attempts
+        self.stats = PollStats(label)
+
+    def delays(self) -> Iterator[float]:
+        """无限的退避间隔序列（未按截止时间裁剪）"""
+        delay = min(self.initial, self.max_interval)
+        while True:
+            if self.jitter:
+                yield min(delay * random.uniform(1 - self.jitter, 1 + self.jitter), self.max_interval)
+            else:
+                yield delay
+            delay = min(delay * self.factor, self.max_interval)
+
+    def _next_sleep(self, delays: Iterator[float], deadline: float) -> Optional[float]:
+        """下一次休眠时长，已到截止时间或最大次数时返回 None"""
+        if self.max_attempts is not None and self.stats.polls >= self.max_attempts:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        return min(next(delays), remaining)
+
+    def _finish(self, started: float, exhausted: bool) -> None:
+        stats = self.stats
+        stats.elapsed = time.monotonic() - started
+        stats.succeeded = not exhausted
+        logger.info(
+            f"轮询{'超时' if exhausted else '完成'}{f'（{stats.label}）' if stats.label else ''}："
+            f"检查 {stats.polls} 次，休眠 {stats.slept:.2f}s，耗时 {stats.elapsed:.2f}s"
+        )
+
+    def __iter__(self) -> Iterator[int]:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        delays = self.delays()
+        exhausted = False
+        try:
+            while True:
+                self.stats.polls += 1
+                yield self.stats.polls
+                delay = self._next_sleep(delays, deadline)
+                if delay is None:
+                    exhausted = True
+                    return
+                timing.sleep(delay, timing.SITE_POLL)
+                self.stats.slept += delay
+        finally:
+            self._finish(started, exhausted)
+
+    async def __aiter__(self) -> AsyncIterator[int]:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        delays = self.delays()
+        exhausted = False
+        try:
+            while True:
+                self.stats.polls += 1
+                yield self.stats.polls
+                delay = self._next_sleep(delays, deadline)
+                if delay is None:
+                    exhausted = True
+                    return
+                await timing.async_sleep(delay, timing.SITE_POLL)
+                self.stats.slept += delay
+        finally:
+            self._finish(started, exhausted)
@@ -0,0 +1,185 @@
+"""按服务前缀的令牌桶限速：同步/异步请求与压测工具共用一个速率预算
+
+并发的测试进程加上异步批量请求可能把共享的 FAT 后端打满，大家一起变慢。
+RATE_LIMITS 为各服务前缀配置每秒请求数（可带突发容量），如：
+
+    RATE_LIMITS=/retail-order-front=50,/dock/mt=100:200
+
+服务前缀的归属与熔断一致（见 utils.circuit_breaker.service_prefix）；未列出的服务
+使用 RATE_LIMIT_DEFAULT（0 为不限速）。每次请求发出前取一个令牌，令牌不足时
+预约下一个令牌并休眠到其可用时刻（先到先得），休眠计入当前用例的 rate_limit 休眠时间。
+
+RATE_LIMIT_STATE_FILE 非空时切换为跨进程模式：桶状态保存在该文件中，读写时加文件锁
+（fcntl.flock），多个 pytest worker 或压测进程共享同一个全局预算。
+不支持 fcntl 的平台退回进程内限速并给出警告。
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from config import config
+from utils import timing
+from utils.circuit_breaker import service_prefix
+from utils.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 桶状态: (令牌数, 更新时刻)，令牌数为负表示已有预约在排队
+BucketState = Tuple[float, float]
+
+
+def parse_rate_limits(text: str) -> Dict[str, Tuple[float, float]]:
+    """解析 "前缀=速率[:突发]" 列表（逗号分隔），返回 {前缀: (每秒速率, 突发容量)}"""
+    limits: Dict[str, Tuple[float, float]] = {}
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        prefix, sep, spec = item.partition("=")
+        if not sep or not prefix.strip():
+            raise ValueError(f"无效的限速配置: {item!r}（应为 前缀=速率[:突发]）")
+        rate_text, _, burst_text = spec.partition(":")
+        rate = float(rate_text)
+        burst = float(burst_text) if burst_text else max(rate, 1.0)
+        limits[prefix.strip().rstrip("/") or "/"] = (rate, max(burst, 1.0))
+    return limits
+
+
+def _take(state: Optional[BucketState], rate: float, burst: float, now: float) -> Tuple[BucketState, float]:
+    """补充令牌后取出一个，返回新状态与需要等待的秒数"""
+    tokens, updated = state if state is not None else (burst, now)
+    tokens = min(burst, tokens + max(now - updated, 0.0) * rate) - 1.0
+    wait = -tokens / rate if tokens < 0 else 0.0
+    return (tokens, now), wait
+
+
+class _LocalStore:
+    """进程内的桶状态"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, BucketState] = {}
+
+    def take(self, prefix: str, rate: float, burst: float) -> float:
+        with self._lock:
+            self._states[prefix], wait = _take(self._states.get(prefix), rate, burst, time.time())
+        return wait
+
+    def reset(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+
+class _FileStore:
+    """保存在本地文件中的桶状态，多进程通过 flock 串行读写"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def take(self, prefix: str, rate: float, burst: float) -> float:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            with os.fdopen(os.dup(fd), "r+", encoding="utf-8") as f:
+                try:
+                    states = json.loads(f.read() or "{}")
+                except ValueError:
+                    states = {}
+                state = states.get(prefix)
+                new_state, wait = _take(tuple(state) if state else None, rate, burst, time.time())
+                states[prefix] = list(new_state)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(states))
+            return wait
+        finally:
+            os.close(fd)  # 关闭即释放锁
+
+    def reset(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RateLimiter:
+    """按服务前缀的令牌桶（线程安全；配置了状态文件时跨进程共享）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._store = None
+        self._store_path: Optional[str] = None
+        self._limits: Dict[str, Tuple[float, float]] = {}
+        self._limits_text: Optional[str] = None
+        self.waits: Dict[str, int] = {}
+        self.wait_s: Dict[str, float] = {}
+
+    def _limit_for(self, prefix: str) -> Optional[Tuple[float, float]]:
+        if self._limits_text != config.RATE_LIMITS:
+            self._limits = parse_rate_limits(config.RATE_LIMITS)
+            self._limits_text = config.RATE_LIMITS
+        limit = self._limits.get(prefix)
+        if limit is None and config.RATE_LIMIT_DEFAULT > 0:
+            limit = (config.RATE_LIMIT_DEFAULT, max(config.RATE_LIMIT_DEFAULT, 1.0))
+        return limit if limit is not None and limit[0] > 0 else None
+
+    def _get_store(self):
+        path = config.RATE_LIMIT_STATE_FILE
+        if self._store is None or self._store_path != path:
+            if path and fcntl is None:
+                logger.warning("当前平台不支持 fcntl，跨进程限速退回为进程内限速")
+                path = ""
+            self._store = _FileStore(path) if path else _LocalStore()
+            self._store_path = config.RATE_LIMIT_STATE_FILE
+        return self._store
+
+    def reserve(self, endpoint: str) -> float:
+        """为一次请求取令牌，返回发出前需要等待的秒数（不限速时为 0）"""
+        if not config.RATE_LIMIT_ENABLED:
+            return 0.0
+        prefix = service_prefix(endpoint)
+        with self._lock:
+            limit = self._limit_for(prefix)
+            if limit is None:
+                return 0.0
+            store = self._get_store()
+        wait = store.take(prefix, *limit)
+        if wait > 0:
+            with self._lock:
+                self.waits[prefix] = self.waits.get(prefix, 0) + 1
+                self.wait_s[prefix] = self.wait_s.get(prefix, 0.0) + wait
+        return wait
+
+    def acquire(self, endpoint: str) -> None:
+        """同步请求发出前调用，令牌不足时休眠"""
+        wait = self.reserve(endpoint)
+        if wait > 0:
+            timing.sleep(wait, timing.SITE_RATE_LIMIT)
+
+    async def async_acquire(self, endpoint: str) -> None:
+        """acquire 的协程版本"""
+        wait = self.reserve(endpoint)
+        if wait > 0:
+            await timing.async_sleep(wait, timing.SITE_RATE_LIMIT)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {prefix: {"waits": count, "wait_s": round(self.wait_s[prefix], 3)}
+                    for prefix, count in self.waits.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            if self._store is not None:
+                self._store.reset()
+            self._store = None
+            self.waits.clear()
+            self.wait_s.clear()
+
+
+rate_limits = RateLimiter()
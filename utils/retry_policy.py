@@ -0,0 +1,177 @@
+"""HTTP 重试策略：只重试可恢复的错误，指数退避 + 全抖动，会话级重试预算
+
+- 只重试连接超时、读超时与 502/503/504；4xx、其他 5xx、连接被拒等直接抛出
+- 第 n 次重试前休眠 uniform(0, min(max_delay, base_delay * 2^(n-1)))，
+  避免大量并发请求在同一时刻集中重试
+- 重试预算：整个会话的重试次数不超过 首次请求数 × RETRY_BUDGET_RATIO + RETRY_BUDGET_MIN，
+  后端整体降级时不再放大流量
+- 默认值在每次调用时读取 config，可按接口模板覆盖（RETRY_OVERRIDES）
+"""
+import json
+import random
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import httpx
+
+from config import config
+from utils import timing
+from utils.logger import logger
+from utils.metrics import endpoint_template, registry as metrics
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = frozenset({502, 503, 504})
+RETRYABLE_EXCEPTIONS = (httpx.ConnectTimeout, httpx.ReadTimeout)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """连接/读超时及 502/503/504 可重试"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, RETRYABLE_EXCEPTIONS)
+
+
+class RetryBudget:
+    """会话级重试预算（令牌按首次请求数累积）"""
+
+    def __init__(self, ratio: Optional[float] = None, min_retries: Optional[int] = None):
+        self._ratio = ratio
+        self._min_retries = min_retries
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+
+    @property
+    def ratio(self) -> float:
+        return self._ratio if self._ratio is not None else config.RETRY_BUDGET_RATIO
+
+    @property
+    def min_retries(self) -> int:
+        return self._min_retries if self._min_retries is not None else config.RETRY_BUDGET_MIN
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_acquire(self) -> bool:
+        """申请一次重试，预算用尽返回 False"""
+        with self._lock:
+            if self.retries < self.requests * self.ratio + self.min_retries:
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = self.retries = self.denied = 0
+
+
+class RetryPolicy:
+    """按接口模板给出最大尝试次数与退避参数，执行带重试的调用
+
+    未显式指定的参数在每次调用时取 config：RETRY_TIMES（最大尝试次数，含首次）、
+    RETRY_INTERVAL（退避基数）、RETRY_MAX_DELAY（单次退避上限）、
+    RETRY_OVERRIDES（JSON，如 {"/dock/mt/v2/order/callback": {"max_attempts": 1}}，
+    按接口模板后缀匹配）。
+    """
+
+    def __init__(
+        self,
+        *,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+        budget: Optional[RetryBudget] = None,
+    ):
+        self._max_attempts = max_attempts
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._overrides = overrides
+        self.budget = budget if budget is not None else RetryBudget()
+
+    def _load_overrides(self) -> Dict[str, Dict[str, Any]]:
+        if self._overrides is not None:
+            return self._overrides
+        raw = config.RETRY_OVERRIDES
+        if not raw:
+            return {}
+        try:
+            overrides = json.loads(raw)
+        except ValueError:
+            logger.warning(f"RETRY_OVERRIDES 不是合法 JSON，已忽略: {raw}")
+            return {}
+        return overrides if isinstance(overrides, dict) else {}
+
+    def settings_for(self, endpoint: str) -> Tuple[int, float, float]:
+        """返回 (最大尝试次数, 退避基数, 单次退避上限)"""
+        settings = {
+            "max_attempts": self._max_attempts if self._max_attempts is not None else config.RETRY_TIMES,
+            "base_delay": self._base_delay if self._base_delay is not None else config.RETRY_INTERVAL,
+            "max_delay": self._max_delay if self._max_delay is not None else config.RETRY_MAX_DELAY,
+        }
+        template = endpoint_template(endpoint)
+        for suffix, override in self._load_overrides().items():
+            if template.endswith(suffix):
+                settings.update(override)
+                break
+        return (max(1, int(settings["max_attempts"])), float(settings["base_delay"]),
+                float(settings["max_delay"]))
+
+    @staticmethod
+    def backoff(retry_number: int, base_delay: float, max_delay: float) -> float:
+        """第 retry_number 次重试（从 1 开始）前的休眠时间：全抖动"""
+        return random.uniform(0, min(max_delay, base_delay * (2 ** (retry_number - 1))))
+
+    def _next_delay(self, endpoint: str, error: httpx.HTTPError, attempt: int,
+                    max_attempts: int, base_delay: float, max_delay: float) -> Optional[float]:
+        """判断是否重试，重试时返回休眠时间，否则记录日志并返回 None"""
+        if not is_retryable(error):
+            logger.error(f"请求失败（不可重试）: {endpoint}: {error}")
+            return None
+        if attempt >= max_attempts:
+            logger.error(f"请求失败，尝试 {max_attempts} 次后仍失败: {endpoint}: {error}")
+            return None
+        if not self.budget.try_acquire():
+            logger.error(f"请求失败，会话重试预算已用尽（已重试 {self.budget.retries} 次），不再重试: {endpoint}: {error}")
+            return None
+        delay = self.backoff(attempt, base_delay, max_delay)
+        logger.warning(f"请求失败，{delay:.2f}s 后重试 ({attempt}/{max_attempts}): {endpoint}: {error}")
+        metrics.record_retry(endpoint)
+        return delay
+
+    def call(self, endpoint: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """执行 func(*args, **kwargs)，按策略重试 httpx.HTTPError"""
+        max_attempts, base_delay, max_delay = self.settings_for(endpoint)
+        self.budget.record_request()
+        attempt = 1
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except httpx.HTTPError as e:
+                delay = self._next_delay(endpoint, e, attempt, max_attempts, base_delay, max_delay)
+                if delay is None:
+                    raise
+            timing.sleep(delay, timing.SITE_RETRY)
+            attempt += 1
+
+    async def acall(self, endpoint: str, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """call 的异步版本"""
+        max_attempts, base_delay, max_delay = self.settings_for(endpoint)
+        self.budget.record_request()
+        attempt = 1
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except httpx.HTTPError as e:
+                delay = self._next_delay(endpoint, e, attempt, max_attempts, base_delay, max_delay)
+                if delay is None:
+                    raise
+            await timing.async_sleep(delay, timing.SITE_RETRY)
+            attempt += 1
+
+
+default_policy = RetryPolicy()
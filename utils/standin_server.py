@@ -0,0 +1,764 @@
+# -*- coding: utf-8 -*-
+"""本地替身服务：用 asyncio 实现的最小 HTTP/1.1 服务，模拟后端接口用于离线压测与离线跑用例
+
+覆盖本项目用到的接口：美团推单/取消/退款回调、订单列表/详情、登录、开交班、
+购物车与下单、现金/积分/购物卡/实体卡支付、购物卡充值与退款、开票申请/详情/刷新/红冲。
+状态全部保存在内存中；订单落库、状态变更与开票结果在 persist_delay 秒后才可见。
+
+延迟与故障可按接口后缀配置：
+- 延迟分布：固定 "5ms"、均匀 "uniform:5ms-50ms"、指数 "exp:10ms"、
+  对数正态 "lognormal:median=20ms,p99=200ms"
+- 故障注入："0.05:503"（5% 返回 503）、"0.01:reset"（断开连接）、"0.01:hang"（挂起直到客户端超时）
+
+用法:
+    python -m utils.standin_server --port 8080 --latency lognormal:median=5ms,p99=80ms \\
+        --persist-delay-ms 500 --error /Order/List=0.05:503
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from utils.latency import LatencyDistribution
+from utils.logger import logger
+
+Handler = Callable[["StandinRequest"], Tuple[int, Any]]
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error",
+            502: "Bad Gateway", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+FAULT_RESET = "reset"
+FAULT_HANG = "hang"
+
+
+class FaultInjection:
+    """按概率注入故障：HTTP 状态码、断开连接（reset）或挂起（hang）"""
+
+    def __init__(self, rate: float, kind: Union[int, str] = 503):
+        self.rate = rate
+        self.kind = kind
+        self.injected = 0
+
+    @classmethod
+    def parse(cls, spec: str) -> "FaultInjection":
+        """解析 0.05 / 0.05:503 / 0.01:reset / 0.01:hang"""
+        rate, _, kind = spec.partition(":")
+        kind = kind or "503"
+        return cls(float(rate), int(kind) if kind.isdigit() else kind)
+
+    def roll(self) -> Optional[Union[int, str]]:
+        if self.rate > 0 and random.random() < self.rate:
+            self.injected += 1
+            return self.kind
+        return None
+
+
+def _parse_route_spec(text: str) -> Tuple[str, str]:
+    """解析命令行的 "接口后缀=取值"，没有后缀时对所有接口生效"""
+    suffix, sep, value = text.rpartition("=") if "=" in text.split(":", 1)[0] else ("", "", text)
+    return (suffix if sep else ""), value
+
+
+class StandinRequest:
+    """替身服务收到的请求"""
+
+    __slots__ = ("method", "path", "query", "headers", "body")
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        return json.loads(self.body or b"{}")
+
+    def form(self) -> Dict[str, str]:
+        return {k: v[-1] for k, v in parse_qs(self.body.decode("utf-8")).items()}
+
+
+STATUS_CREATED = "R1"
+STATUS_RETURNED = "R4"
+
+INVOICE_INVOICING = "INVOICING"
+INVOICE_INVOICED = "INVOICED"
+INVOICE_RED = "RED"
+_INVOICE_STATUS_DESC = {INVOICE_INVOICING: "开票中", INVOICE_INVOICED: "已开票", INVOICE_RED: "已红冲开票"}
+
+TOKEN_EXPIRED = "登录已失效，请重登录或认证"
+
+
+def _ok(data: Any = None) -> Dict[str, Any]:
+    return {"code": "200", "success": True, "msg": "成功", "data": data}
+
+
+def _fail(msg: str, code: str = "500") -> Dict[str, Any]:
+    return {"code": code, "success": False, "msg": msg, "data": None}
+
+
+def _legacy_ok(**fields: Any) -> Dict[str, Any]:
+    """老接口（/app/Business/...）的响应格式：ResultInt/ResultString，列表放在 DataLine"""
+    return {"ResultInt": 0, "ResultString": "success", **fields}
+
+
+def _token_expired() -> Dict[str, Any]:
+    return {"code": "9999", "success": False, "msg": "登录已失效，请重登录",
+            "ResultInt": 9999, "ResultString": TOKEN_EXPIRED}
+
+
+def _amount(value: Any, default: float = 0.0) -> float:
+    try:
+        return round(float(value), 2)
+    except (TypeError, ValueError):
+        return default
+
+
+class StandinOrder:
+    """替身服务内存中的订单：状态变更在 ready_at 之后才对查询接口可见，模拟异步落库"""
+
+    __slots__ = ("internal_id", "source_no", "ctime", "payload", "_states")
+
+    def __init__(self, source_no: str, ctime: int, payload: Dict[str, Any], ready_at: float):
+        self.internal_id = uuid.uuid4().hex
+        self.source_no = source_no
+        self.ctime = ctime
+        self.payload = payload
+        self._states = [(ready_at, STATUS_CREATED)]
+
+    def change_status(self, status: str, ready_at: float) -> None:
+        self._states.append((ready_at, status))
+
+    def visible(self, now: float) -> bool:
+        return self._states[0][0] <= now
+
+    def status(self, now: float) -> Optional[str]:
+        current = None
+        for ready_at, status in self._states:
+            if ready_at <= now:
+                current = status
+        return current
+
+
+class StandinPosOrder:
+    """收银端订单（下单后待支付）或购物卡充值单"""
+
+    __slots__ = ("order_id", "order_type", "amount", "paid", "refunded", "invoiced_amount", "member_id")
+
+    def __init__(self, order_type: str, amount: float, member_id: str = ""):
+        self.order_id = uuid.uuid4().hex
+        self.order_type = order_type
+        self.amount = amount
+        self.paid = False
+        self.refunded = False
+        self.invoiced_amount = 0.0
+        self.member_id = member_id
+
+
+class StandinInvoice:
+    """开票申请：INVOICING 状态在 ready_at 之后变为 INVOICED"""
+
+    __slots__ = ("invoice_id", "order_ids", "amount", "ready_at", "red")
+
+    def __init__(self, order_ids: List[str], amount: float, ready_at: float):
+        self.invoice_id = uuid.uuid4().hex
+        self.order_ids = order_ids
+        self.amount = amount
+        self.ready_at = ready_at
+        self.red = False
+
+    def status(self, now: float) -> str:
+        if self.red:
+            return INVOICE_RED
+        return INVOICE_INVOICED if self.ready_at <= now else INVOICE_INVOICING
+
+
+class StandinServer:
+    """替身服务
+
+    路由按路径后缀匹配，因此无论 base_url 是否带 /api 之类的前缀都能命中。
+    处理函数签名为 handler(request) -> (状态码, 可 JSON 序列化的响应体)。
+    订单在 persist_delay 秒后才能被列表/详情查到、开票在 persist_delay 秒后才变为已开票，
+    用于离线跑通订单全生命周期与用例。
+    latency 为全局延迟（秒数或分布描述），可用 set_latency / inject_fault 按接口后缀覆盖。
+    收银端接口校验 tokenId 是否由登录接口签发。
+    """
+
+    # 收银端商品单价，开票金额不能超过订单金额
+    ITEM_PRICE = 2.0
+    CARD_SALE_VALUE = 10.0
+    ENTITY_CARD_BALANCE = 1000.0
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *,
+                 latency: Union[str, float, LatencyDistribution] = 0.0, persist_delay: float = 0.0,
+                 hang_seconds: float = 60.0):
+        self.host = host
+        self.port = port
+        self.persist_delay = persist_delay
+        self.hang_seconds = hang_seconds
+        self.routes: Dict[str, Handler] = {}
+        self.latencies: Dict[str, LatencyDistribution] = {"": LatencyDistribution.parse(latency)}
+        self.faults: Dict[str, FaultInjection] = {}
+        self.orders: Dict[str, StandinOrder] = {}
+        self._orders_by_internal_id: Dict[str, StandinOrder] = {}
+        self.pos_orders: Dict[str, StandinPosOrder] = {}
+        self.invoices: Dict[str, StandinInvoice] = {}
+        self.tokens: Set[str] = set()
+        self.carts: Dict[str, List[Dict[str, Any]]] = {}
+        self.handover_open = False
+        self._route_cache: Dict[str, Optional[Handler]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set["asyncio.Task"] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._register_default_routes()
+
+    # ============ 路由与故障配置 ============
+
+    def route(self, path: str, handler: Handler) -> None:
+        """注册（或覆盖）路由"""
+        self.routes[path] = handler
+        self._route_cache.clear()
+
+    def set_latency(self, suffix: str, spec: Union[str, float, LatencyDistribution]) -> None:
+        """设置接口后缀的延迟分布，空后缀为全局默认"""
+        self.latencies[suffix] = LatencyDistribution.parse(spec)
+
+    def inject_fault(self, suffix: str, spec: Union[str, FaultInjection]) -> None:
+        """按接口后缀注入故障，空后缀对所有接口生效"""
+        self.faults[suffix] = spec if isinstance(spec, FaultInjection) else FaultInjection.parse(spec)
+
+    @staticmethod
+    def _longest_suffix(path: str, table: Dict[str, Any]) -> Any:
+        best = None
+        for suffix in table:
+            if path.endswith(suffix) and (best is None or len(suffix) > len(best)):
+                best = suffix
+        return table[best] if best is not None else None
+
+    def _match(self, path: str) -> Optional[Handler]:
+        if path in self._route_cache:
+            return self._route_cache[path]
+        handler = self._longest_suffix(path, self.routes)
+        self._route_cache[path] = handler
+        return handler
+
+    def _register_default_routes(self) -> None:
+        self.route("/dock/mt/v2/order/callback", self._handle_push_order)
+        self.route("/dock/mt/v2/order/cancel/callback", self._handle_cancel_order)
+        self.route("/dock/mt/v2/order/refund/callback", self._handle_refund_order)
+        self.route("/app/Business/Order/List", self._handle_order_list)
+        self.route("/app/Business/Order/Dock/Detail", self._handle_order_detail)
+        self.route("/user/login", self._handle_login)
+
+        self.route("/Handover/v2/GetHandoverState", self._handle_handover_state)
+        self.route("/app/Handover/Confirm", self._handle_handover_confirm)
+        self.route("/app/Handover/ADD", self._handle_handover_add)
+
+        cart = "/app/shopping/cart"
+        self.route(f"{cart}/clearUpShopCartProduct", self._handle_cart_clear)
+        self.route(f"{cart}/item/addShopCartItem", self._handle_cart_add_item)
+        self.route(f"{cart}/getShoppingCartDetail", self._handle_cart_detail)
+        self.route(f"{cart}/shopCartGiftList", self._handle_cart_gift_list)
+        self.route(f"{cart}/entityCard/shopCartEntityCardPreCalculate", self._handle_entity_card_pre_calculate)
+        for action in ("updateItemStaff", "updateShopCartCustomDiscount", "updateShopCartPromotionPlan",
+                       "updateShopCartMemberInfo", "shopCartGiftSelection"):
+            self.route(f"{cart}/{action}", self._handle_cart_update)
+        self.route("/appc/custompay/systemPayType", self._handle_system_pay_type)
+        self.route("/app/sales/order/add", self._handle_add_order)
+        for pay_type in ("CashPay", "IntegralPay", "MCardPay", "EntityCard"):
+            self.route(f"/app/pay/{pay_type}", self._handle_pay)
+
+        self.route("/app/Business/Member/CardOptions", self._handle_card_options)
+        self.route("/app/Business/Member/CardOptions/GiveItem", self._handle_card_update)
+        self.route("/app/Business/Member/CardRechargeOptions", self._handle_card_update)
+        self.route("/app/Business/Member/CardTopUp", self._handle_card_top_up)
+        self.route("/app/Business/Member/CardTop/refund", self._handle_card_refund)
+        self.route("/mem/card/amount/records", self._handle_card_records)
+        self.route("/app/Business/member/card_bag", self._handle_card_bag)
+
+        invoice = "/hr/retail/invoice"
+        self.route(f"{invoice}/batchApply", self._handle_invoice_apply)
+        self.route(f"{invoice}/detail", self._handle_invoice_detail)
+        self.route(f"{invoice}/refreshInvoiceStatus", self._handle_invoice_refresh)
+        self.route(f"{invoice}/redPunch", self._handle_invoice_red_punch)
+
+    def _authorized(self, body: Any) -> Optional[str]:
+        """返回请求携带的有效令牌，未登录返回 None"""
+        if not isinstance(body, dict):
+            return None
+        token = body.get("tokenId") or body.get("token")
+        return token if token in self.tokens else None
+
+    # ============ 美团回调 / 订单列表与详情 ============
+
+    def _handle_push_order(self, request: StandinRequest) -> Tuple[int, Any]:
+        try:
+            order = json.loads(request.form()["order"])
+            order_id = str(order["orderId"])
+        except (KeyError, ValueError, TypeError) as e:
+            return 200, {"data": "ERROR", "msg": f"推单参数错误: {e}"}
+        # 与真实服务一致：重复推单幂等返回 OK
+        if order_id not in self.orders:
+            standin_order = StandinOrder(
+                order_id, int(order.get("ctime") or 0), order,
+                time.monotonic() + self.persist_delay)
+            self.orders[order_id] = standin_order
+            self._orders_by_internal_id[standin_order.internal_id] = standin_order
+        return 200, {"data": "OK"}
+
+    def _handle_reverse(self, request: StandinRequest, field: str) -> Tuple[int, Any]:
+        try:
+            order_id = str(json.loads(request.form()[field])["orderId"])
+        except (KeyError, ValueError, TypeError) as e:
+            return 200, {"data": "ERROR", "msg": f"回调参数错误: {e}"}
+        order = self.orders.get(order_id)
+        if order is None:
+            return 200, {"data": "ERROR", "msg": f"订单不存在: {order_id}"}
+        order.change_status(STATUS_RETURNED, time.monotonic() + self.persist_delay)
+        return 200, {"data": "OK"}
+
+    def _handle_cancel_order(self, request: StandinRequest) -> Tuple[int, Any]:
+        return self._handle_reverse(request, "orderCancel")
+
+    def _handle_refund_order(self, request: StandinRequest) -> Tuple[int, Any]:
+        return self._handle_reverse(request, "orderRefund")
+
+    def _handle_login(self, request: StandinRequest) -> Tuple[int, Any]:
+        token = uuid.uuid4().hex
+        self.tokens.add(token)
+        return 200, _ok({"tokenId": token})
+
+    def _handle_order_list(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        if not self._authorized(body):
+            return 200, _token_expired()
+        page_index = max(int(body.get("pageIndex") or 1), 1)
+        page_size = max(int(body.get("pageSize") or 20), 1)
+
+        now = time.monotonic()
+        visible = sorted(
+            (order for order in self.orders.values() if order.visible(now)),
+            key=lambda order: order.ctime,
+            reverse=True,
+        )
+        page = visible[(page_index - 1) * page_size: page_index * page_size]
+        return 200, _ok({
+            "total": len(visible),
+            "list": [
+                {
+                    "orderId": order.internal_id,
+                    "orderStatus": order.status(now),
+                    "createDate": order.ctime,
+                }
+                for order in page
+            ],
+        })
+
+    def _handle_order_detail(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        if not self._authorized(body):
+            return 200, _token_expired()
+        now = time.monotonic()
+        order = self._orders_by_internal_id.get(str(body.get("orderId")))
+        if order is None or not order.visible(now):
+            return 200, _fail("订单不存在")
+        return 200, _ok({
+            "orderId": order.internal_id,
+            "SourceNo": order.source_no,
+            "orderStatus": order.status(now),
+            "createDate": order.ctime,
+        })
+
+    # ============ 开交班 ============
+
+    def _handle_handover_state(self, request: StandinRequest) -> Tuple[int, Any]:
+        if not self._authorized(request.json()):
+            return 200, _token_expired()
+        return 200, _ok({"code": 0 if self.handover_open else 1})
+
+    def _handle_handover_confirm(self, request: StandinRequest) -> Tuple[int, Any]:
+        if not self._authorized(request.json()):
+            return 200, _token_expired()
+        self.handover_open = False
+        return 200, _legacy_ok()
+
+    def _handle_handover_add(self, request: StandinRequest) -> Tuple[int, Any]:
+        if not self._authorized(request.json()):
+            return 200, _token_expired()
+        self.handover_open = True
+        return 200, _legacy_ok(dhId=uuid.uuid4().hex)
+
+    # ============ 购物车与下单 ============
+
+    def _cart_total(self, token: str) -> float:
+        return round(sum(item["quantity"] * self.ITEM_PRICE for item in self.carts.get(token, [])), 2)
+
+    def _handle_cart_clear(self, request: StandinRequest) -> Tuple[int, Any]:
+        token = self._authorized(request.json())
+        if not token:
+            return 200, _token_expired()
+        self.carts.pop(token, None)
+        return 200, _ok(True)
+
+    def _handle_cart_add_item(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        token = self._authorized(body)
+        if not token:
+            return 200, _token_expired()
+        self.carts.setdefault(token, []).append(
+            {"specId": body.get("specId"), "quantity": int(body.get("quantity") or 1)})
+        return 200, _ok(True)
+
+    def _handle_cart_update(self, request: StandinRequest) -> Tuple[int, Any]:
+        if not self._authorized(request.json()):
+            return 200, _token_expired()
+        return 200, _ok(True)
+
+    def _handle_cart_detail(self, request: StandinRequest) -> Tuple[int, Any]:
+        token = self._authorized(request.json())
+        if not token:
+            return 200, _token_expired()
+        return 200, _ok({"items": self.carts.get(token, []), "totalAmount": self._cart_total(token)})
+
+    def _handle_cart_gift_list(self, request: StandinRequest) -> Tuple[int, Any]:
+        if not self._authorized(request.json()):
+            return 200, _token_expired()
+        return 200, _ok({"itemsPage": {"content": [{"specId": "standin-gift"}]}, "quantity": 1})
+
+    def _handle_system_pay_type(self, request: StandinRequest) -> Tuple[int, Any]:
+        token = self._authorized(request.json())
+        if not token:
+            return 200, _token_expired()
+        return 200, _ok({"itemsAmountActuallyPaid": self._cart_total(token)})
+
+    def _handle_entity_card_pre_calculate(self, request: StandinRequest) -> Tuple[int, Any]:
+        token = self._authorized(request.json())
+        if not token:
+            return 200, _token_expired()
+        return 200, _ok({"payAmount": self._cart_total(token)})
+
+    def _handle_add_order(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        token = self._authorized(body)
+        if not token:
+            return 200, _token_expired()
+        amount = self._cart_total(token)
+        if not amount:
+            return 200, _fail("购物车为空")
+        order = StandinPosOrder("order", amount)
+        self.pos_orders[order.order_id] = order
+        self.carts.pop(token, None)
+        return 200, _ok({"orderId": order.order_id, "amount": amount})
+
+    def _handle_pay(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        if not self._authorized(body):
+            return 200, _token_expired()
+        order = self.pos_orders.get(str(body.get("orderId")))
+        if order is None:
+            return 200, _fail(f"订单【{body.get('orderId', '')}】不存在")
+        if order.paid:
+            return 200, _fail("订单已支付")
+        order.paid = True
+        return 200, _ok({"orderId": order.order_id, "payAmount": order.amount})
+
+    # ============ 购物卡 ============
+
+    def _handle_card_options(self, request: StandinRequest) -> Tuple[int, Any]:
+        if not self._authorized(request.json()):
+            return 200, _token_expired()
+        return 200, _legacy_ok(DataLine=[{"coId": "standin-card-option", "giveItemId": "standin-give-item",
+                                          "saleValue": self.CARD_SALE_VALUE}])
+
+    def _handle_card_update(self, request: StandinRequest) -> Tuple[int, Any]:
+        if not self._authorized(request.json()):
+            return 200, _token_expired()
+        return 200, _ok(True)
+
+    def _handle_card_top_up(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        if not self._authorized(body):
+            return 200, _token_expired()
+        order = StandinPosOrder("card", _amount(body.get("salePrice"), self.CARD_SALE_VALUE),
+                                str(body.get("memberId") or ""))
+        self.pos_orders[order.order_id] = order
+        return 200, _legacy_ok(orderId=order.order_id, payAmount=order.amount, orderType=order.order_type)
+
+    def _handle_card_refund(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        if not self._authorized(body):
+            return 200, _token_expired()
+        order = self.pos_orders.get(str(body.get("cardOrderId")))
+        if order is None or order.order_type != "card":
+            return 200, _fail(f"充值单【{body.get('cardOrderId', '')}】不存在")
+        if not order.paid or order.refunded:
+            return 200, _fail("充值单未支付或已退款")
+        order.refunded = True
+        return 200, _ok(True)
+
+    def _handle_card_records(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        if not self._authorized(body):
+            return 200, _token_expired()
+        member_id = str(body.get("id") or "")
+        content = [{"sourceId": order.order_id, "amount": order.amount}
+                   for order in reversed(list(self.pos_orders.values()))
+                   if order.order_type == "card" and order.member_id == member_id]
+        return 200, _ok({"pageData": {"content": content}})
+
+    def _handle_card_bag(self, request: StandinRequest) -> Tuple[int, Any]:
+        if not self._authorized(request.json()):
+            return 200, _token_expired()
+        return 200, _legacy_ok(DataLine=[{"cardNo": "STANDIN0001", "balance": self.ENTITY_CARD_BALANCE}])
+
+    # ============ 开票 ============
+
+    def _handle_invoice_apply(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        if not self._authorized(body):
+            return 200, _token_expired()
+        order_ids = [str(order_id) for order_id in body.get("orderIds") or []]
+        amounts = {str(item.get("orderId")): _amount(item.get("currentInvoiceAmount"))
+                   for item in body.get("orderAmountList") or [] if isinstance(item, dict)}
+
+        total = 0.0
+        for order_id in order_ids or list(amounts):
+            order = self.pos_orders.get(order_id)
+            if order is None or not order.paid:
+                return 200, _fail(f"订单【{order_id}】不存在")
+            amount = amounts.get(order_id, order.amount - order.invoiced_amount)
+            if amount > order.amount - order.invoiced_amount:
+                return 200, _fail(f"订单【{order_id}】开票金额大于可开票金额")
+            total += amount
+        if not order_ids:
+            # 无订单开票按明细金额开票
+            total = sum(_amount(item.get("amount")) * _amount(item.get("quantity"), 1)
+                        for item in body.get("invoiceApplyItems") or [] if isinstance(item, dict))
+            if not total:
+                return 200, _fail("开票明细为空")
+        for order_id in order_ids:
+            order = self.pos_orders[order_id]
+            order.invoiced_amount += amounts.get(order_id, order.amount - order.invoiced_amount)
+
+        invoice = StandinInvoice(order_ids, round(total, 2), time.monotonic() + self.persist_delay)
+        self.invoices[invoice.invoice_id] = invoice
+        return 200, _ok({"invoiceId": invoice.invoice_id, "orderIds": order_ids,
+                         "successCount": max(len(order_ids), 1), "errorCount": 0})
+
+    def _find_invoice(self, body: Any) -> Optional[StandinInvoice]:
+        return self.invoices.get(str(body.get("id"))) if isinstance(body, dict) else None
+
+    def _handle_invoice_detail(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        if not self._authorized(body):
+            return 200, _token_expired()
+        invoice = self._find_invoice(body)
+        if invoice is None:
+            return 200, _fail(f"开票记录【{body.get('id', '')}】不存在")
+        status = invoice.status(time.monotonic())
+        data: Dict[str, Any] = {
+            "invoiceId": invoice.invoice_id,
+            "orderId": invoice.order_ids[0] if invoice.order_ids else None,
+            "joinOrderList": [{"orderId": order_id} for order_id in invoice.order_ids],
+            "amount": invoice.amount,
+            "status": status,
+            "statusDesc": _INVOICE_STATUS_DESC[status],
+        }
+        if status != INVOICE_INVOICING:
+            data["invoiceNumber"] = invoice.invoice_id[:20]
+            data["invoiceUrl"] = f"http://{self.host}:{self.port}/invoice/{invoice.invoice_id}.pdf"
+        return 200, _ok(data)
+
+    def _handle_invoice_refresh(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        if not self._authorized(body):
+            return 200, _token_expired()
+        if self._find_invoice(body) is None:
+            return 200, _fail(f"开票记录【{body.get('id', '')}】不存在")
+        return 200, _ok(True)
+
+    def _handle_invoice_red_punch(self, request: StandinRequest) -> Tuple[int, Any]:
+        body = request.json()
+        if not self._authorized(body):
+            return 200, _token_expired()
+        invoice = self._find_invoice(body)
+        if invoice is None:
+            return 200, _fail(f"开票记录【{body.get('id', '')}】不存在")
+        if invoice.status(time.monotonic()) != INVOICE_INVOICED:
+            return 200, _fail("只有已开票的记录可以红冲")
+        invoice.red = True
+        for order_id in invoice.order_ids:
+            self.pos_orders[order_id].invoiced_amount = 0.0
+        return 200, _ok(True)
+
+    # ============ HTTP ============
+
+    async def _dispatch(self, request: StandinRequest) -> Tuple[int, Any]:
+        latency = self._longest_suffix(request.path, self.latencies)
+        delay = latency.sample() if latency is not None else 0.0
+        if delay > 0:
+            await asyncio.sleep(delay)
+        handler = self._match(request.path)
+        if handler is None:
+            return 404, {"code": "404", "success": False, "msg": f"未知接口: {request.path}"}
+        try:
+            return handler(request)
+        except Exception as e:
+            logger.error(f"替身服务处理 {request.path} 异常: {e}")
+            return 500, {"code": "500", "success": False, "msg": str(e)}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method, target, _ = request_line.split(" ", 2)
+                headers: Dict[str, str] = {}
+                for line in header_lines:
+                    if line:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                body = await reader.readexactly(length) if length else b""
+
+                request = StandinRequest(method, target, headers, body)
+                fault = self._longest_suffix(request.path, self.faults)
+                injected = fault.roll() if fault is not None else None
+                if injected == FAULT_RESET:
+                    writer.transport.abort()
+                    return
+                if injected == FAULT_HANG:
+                    await asyncio.sleep(self.hang_seconds)
+                    return
+                if injected is not None:
+                    status, payload = int(injected), _fail(f"替身服务注入故障 {injected}", str(injected))
+                else:
+                    status, payload = await self._dispatch(request)
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}\r\n"
+                    f"Content-Type: application/json;charset=UTF-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    f"\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    # ============ 生命周期 ============
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> str:
+        """在当前事件循环中启动服务，返回 base_url"""
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"替身服务已启动: {self.base_url}")
+        return self.base_url
+
+    async def stop(self) -> None:
+        """停止监听并断开仍保持的 keep-alive 连接"""
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._connections):
+                task.cancel()
+            if self._connections:
+                await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> str:
+        """在后台线程的独立事件循环中启动服务，返回 base_url"""
+        ready = threading.Event()
+
+        def _run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=_run, name="standin-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.base_url
+
+    def stop_thread(self) -> None:
+        """停止 start_in_thread 启动的服务"""
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def from_config(config: Any) -> StandinServer:
+    """按 STANDIN_* 配置创建替身服务（conftest 在 STANDIN=true 时使用）"""
+    server = StandinServer(latency=config.STANDIN_LATENCY, persist_delay=config.STANDIN_PERSIST_DELAY)
+    for item in filter(None, (part.strip() for part in config.STANDIN_FAULTS.split(";"))):
+        suffix, spec = _parse_route_spec(item)
+        server.inject_fault(suffix, spec)
+    return server
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="本地替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每个请求的固定延迟（毫秒）")
+    parser.add_argument("--latency", default=None,
+                        help="全局延迟分布，如 uniform:5ms-50ms / lognormal:median=5ms,p99=80ms（覆盖 --latency-ms）")
+    parser.add_argument("--route-latency", action="append", default=[], metavar="后缀=分布",
+                        help="按接口后缀设置延迟分布，如 /Order/List=exp:20ms，可重复")
+    parser.add_argument("--error", action="append", default=[], metavar="[后缀=]比例[:类型]",
+                        help="故障注入，如 /Order/List=0.05:503、0.01:reset、/invoice/detail=0.02:hang，可重复")
+    parser.add_argument("--persist-delay-ms", type=float, default=0.0, help="订单落库/状态变更/开票可见前的延迟（毫秒）")
+    args = parser.parse_args(argv)
+
+    server = StandinServer(args.host, args.port,
+                           latency=args.latency if args.latency else args.latency_ms / 1000,
+                           persist_delay=args.persist_delay_ms / 1000)
+    for item in args.route_latency:
+        suffix, spec = item.split("=", 1)
+        server.set_latency(suffix, spec)
+    for item in args.error:
+        suffix, spec = _parse_route_spec(item)
+        server.inject_fault(suffix, spec)
+
+    async def _serve():
+        await server.start()
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""用例耗时拆分：休眠、网络、等待共享轮询器与 CPU 时间
+
+conftest 在每个用例开始时 begin()、结束时 end()，其间重试/轮询的休眠、
+safe_post 的请求耗时、阻塞等待共享监视器/轮询器的时间都会记到当前用例上。
+只统计执行用例的线程（后台监视器/轮询器线程的开销由所有用例共享，不计入单个用例）。
+CPU 时间取进程 CPU 时间的增量。没有进行中的用例时（如压测脚本）记录为空操作。
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+SITE_RETRY = "retry"
+SITE_POLL = "poll"
+SITE_RATE_LIMIT = "rate_limit"
+
+
+class TimeAccount:
+    """单个用例的耗时账本"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.thread_id = threading.get_ident()
+        self.sleep_s = 0.0
+        self.sleeps = 0
+        self.sleep_by_site: Counter = Counter()
+        self.network_s = 0.0
+        self.network_calls = 0
+        self.wait_s = 0.0
+        self.waits = 0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+
+    def snapshot(self) -> None:
+        """刷新墙钟与 CPU 时间"""
+        self.wall_s = time.perf_counter() - self._started
+        self.cpu_s = time.process_time() - self._cpu_started
+
+    def to_dict(self) -> Dict[str, Any]:
+        self.snapshot()
+        other = self.wall_s - self.sleep_s - self.network_s - self.wait_s
+        return {
+            "test": self.name,
+            "wall_s": round(self.wall_s, 3),
+            "sleep_s": round(self.sleep_s, 3),
+            "sleeps": self.sleeps,
+            "sleep_by_site": {site: round(s, 3) for site, s in self.sleep_by_site.items()},
+            "network_s": round(self.network_s, 3),
+            "network_calls": self.network_calls,
+            "wait_s": round(self.wait_s, 3),
+            "waits": self.waits,
+            "cpu_s": round(self.cpu_s, 3),
+            # 墙钟减去休眠/网络/等待，含 CPU 与其他阻塞（如数据库查询）
+            "other_s": round(max(other, 0.0), 3),
+        }
+
+
+_lock = threading.Lock()
+_current: Optional[TimeAccount] = None
+_finished: List[Dict[str, Any]] = []
+
+
+def begin(name: str) -> TimeAccount:
+    """开始记录一个用例"""
+    global _current
+    account = TimeAccount(name)
+    with _lock:
+        _current = account
+    return account
+
+
+def end() -> Optional[Dict[str, Any]]:
+    """结束当前用例，返回其耗时拆分并计入会话汇总"""
+    global _current
+    with _lock:
+        account, _current = _current, None
+    if account is None:
+        return None
+    summary = account.to_dict()
+    with _lock:
+        _finished.append(summary)
+    return summary
+
+
+def current() -> Optional[TimeAccount]:
+    return _current
+
+
+def _account_for_this_thread() -> Optional[TimeAccount]:
+    account = _current
+    if account is None or account.thread_id != threading.get_ident():
+        return None
+    return account
+
+
+def record_sleep(seconds: float, site: str) -> None:
+    account = _account_for_this_thread()
+    if account is not None:
+        account.sleep_s += seconds
+        account.sleeps += 1
+        account.sleep_by_site[site] += seconds
+
+
+def record_network(seconds: float) -> None:
+    account = _account_for_this_thread()
+    if account is not None:
+        account.network_s += seconds
+        account.network_calls += 1
+
+
+def record_wait(seconds: float) -> None:
+    account = _account_for_this_thread()
+    if account is not None:
+        account.wait_s += seconds
+        account.waits += 1
+
+
+def sleep(seconds: float, site: str) -> None:
+    """time.sleep 并计入当前用例的休眠时间"""
+    time.sleep(seconds)
+    record_sleep(seconds, site)
+
+
+async def async_sleep(seconds: float, site: str) -> None:
+    """asyncio.sleep 并计入当前用例的休眠时间"""
+    await asyncio.sleep(seconds)
+    record_sleep(seconds, site)
+
+
+def session_summary() -> Dict[str, Any]:
+    """会话汇总：总计与按休眠时间倒序的用例列表"""
+    with _lock:
+        tests = sorted(_finished, key=lambda t: t["sleep_s"], reverse=True)
+    totals = {
+        key: round(sum(t[key] for t in tests), 3)
+        for key in ("wall_s", "sleep_s", "network_s", "wait_s", "cpu_s", "other_s")
+    }
+    totals["tests"] = len(tests)
+    if totals["wall_s"]:
+        totals["sleep_ratio"] = round(totals["sleep_s"] / totals["wall_s"], 3)
+    return {"totals": totals, "tests": tests}
+
+
+def write_summary(path: str) -> Dict[str, Any]:
+    """把会话汇总写入 JSON 文件并返回，path 为空时只返回不写文件"""
+    summary = session_summary()
+    if not path:
+        return summary
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary